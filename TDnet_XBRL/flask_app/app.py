@@ -1,8 +1,16 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, request
 import sqlite3
 import os
-from datetime import datetime, timedelta
-import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from response_cache import ResponseCache
+    from price_store import PriceStore
+    import downsample
+except ImportError:
+    from flask_app.response_cache import ResponseCache
+    from flask_app.price_store import PriceStore
+    from flask_app import downsample
 
 app = Flask(__name__)
 
@@ -11,10 +19,17 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 BS_DB_PATH = os.path.join(project_root, 'db', 'BS_DB.db')
 PL_DB_PATH = os.path.join(project_root, 'db', 'PL_DB.db')
+PRICE_DB_PATH = os.path.join(project_root, 'db', 'PRICE_DB.db')
 
 print(f"BSデータベースパス: {BS_DB_PATH}")
 print(f"PLデータベースパス: {PL_DB_PATH}")
 
+# DB を読む API のレスポンスキャッシュ（DB ファイルが更新されたら破棄される）
+response_cache = ResponseCache([BS_DB_PATH, PL_DB_PATH])
+
+# 株価の保存先（取得済みの日足はここから返し、足りない分だけ yfinance から取得する）
+price_store = PriceStore(PRICE_DB_PATH)
+
 
 def get_bs_db_connection():
     conn = sqlite3.connect(BS_DB_PATH)
@@ -28,6 +43,14 @@ def get_pl_db_connection():
     return conn
 
 
+def get_dashboard_db_connection():
+    """BS_DB.db に PL_DB.db を ATTACH した接続（BS と PL を1つの接続で読む）"""
+    conn = sqlite3.connect(BS_DB_PATH)
+    conn.execute('ATTACH DATABASE ? AS pl', (PL_DB_PATH,))
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
 def convert_to_quarterly_from_period(data):
     """Period情報を使って累計データを四半期ごとの差分に変換"""
     if not data:
@@ -132,13 +155,137 @@ def convert_to_quarterly_from_period(data):
     return result
 
 
+def get_pl_quarterly(conn, code):
+    """
+    取り込み時に計算済みの PL_QUARTERLY から四半期ごとのデータを読む
+    （convert_to_quarterly_from_period() と同じ形式）。
+    テーブルがない、またはその企業の行がない場合は None を返す（呼び出し側で PL から計算する）。
+    """
+    try:
+        rows = conn.execute('''
+            SELECT FiscalYear, Quarter, Period, PublicDay, NetSales, OperatingIncome, OrdinaryIncome, NetIncome
+            FROM PL_QUARTERLY
+            WHERE Code = ?
+            ORDER BY FiscalYear, Quarter
+        ''', (code,)).fetchall()
+    except sqlite3.OperationalError:
+        # PL_QUARTERLY がまだない DB
+        return None
+    if not rows:
+        return None
+
+    def to_number(x):
+        if x is not None and float(x).is_integer():
+            return int(x)
+        return x
+
+    result = []
+    for row in rows:
+        fiscal_year = row['FiscalYear']
+        quarter = row['Quarter']
+        result.append({
+            'term': f"{str(fiscal_year)[-2:]}.Q{quarter}",
+            'period': row['Period'],
+            'fiscalYear': fiscal_year,
+            'publicDay': row['PublicDay'],
+            'netSales': to_number(row['NetSales']),
+            'operatingIncome': to_number(row['OperatingIncome']),
+            'ordinaryIncome': to_number(row['OrdinaryIncome']),
+            'netIncome': to_number(row['NetIncome']),
+            '_fiscalYear': fiscal_year,
+            '_quarter': quarter
+        })
+    return result
+
+
+def load_pl_rows(conn, code):
+    """PL の累計値を画面用のリストにする（四半期への変換前）"""
+    rows = conn.execute('''
+        SELECT 
+            PublicDay,
+            Period,
+            FiscalYear,
+            NetSales,
+            OperatingIncome,
+            OrdinaryIncome,
+            NetIncome,
+            RevenueIFRS,
+            OperatingProfitLossIFRS,
+            ProfitLossIFRS
+        FROM PL 
+        WHERE Code = ?
+        ORDER BY FiscalYear, Period
+    ''', (code,)).fetchall()
+
+    data = []
+    for row in rows:
+        data.append({
+            'term': row['PublicDay'][:7] if row['PublicDay'] else None,
+            'period': row['Period'],
+            'fiscalYear': row['FiscalYear'],
+            'publicDay': row['PublicDay'],
+            'netSales': row['NetSales'] or row['RevenueIFRS'],
+            'operatingIncome': row['OperatingIncome'] or row['OperatingProfitLossIFRS'],
+            'ordinaryIncome': row['OrdinaryIncome'],
+            'netIncome': row['NetIncome'] or row['ProfitLossIFRS']
+        })
+    return data
+
+
+def load_pl_data(conn, code):
+    """四半期ごとの PL（PL_QUARTERLY があればそこから、なければ PL から計算）"""
+    converted_data = get_pl_quarterly(conn, code)
+    if converted_data is None:
+        converted_data = convert_to_quarterly_from_period(load_pl_rows(conn, code))
+    return converted_data
+
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 
-@app.route('/api/companies')
-def get_companies():
+def load_companies(conn, query=None, limit=None, offset=0):
+    """
+    取り込み時に作成済みの COMPANIES から企業一覧を読み、(一覧, 全件数) を返す。
+    query は企業コードの前方一致または企業名の部分一致。
+    テーブルがない、または空の場合は None を返す（呼び出し側で BS / PL から集計する）。
+    """
+    where, params = '', []
+    if query:
+        where = 'WHERE (Code >= ? AND Code < ?) OR instr(CompanyName, ?) > 0'
+        params = [query, query + '\uffff', query]
+
+    try:
+        total = conn.execute(f'SELECT COUNT(*) FROM COMPANIES {where}', params).fetchone()[0]
+        if total == 0 and conn.execute('SELECT 1 FROM COMPANIES LIMIT 1').fetchone() is None:
+            return None
+        rows = conn.execute(f'''
+            SELECT Code, CompanyName, HasBS, HasPL, AccountingStandard, LatestPublicDay, BSRows, PLRows
+            FROM COMPANIES
+            {where}
+            ORDER BY Code
+            LIMIT ? OFFSET ?
+        ''', params + [-1 if limit is None else limit, offset]).fetchall()
+    except sqlite3.OperationalError:
+        # COMPANIES がまだない DB
+        return None
+
+    companies = [{
+        'name': row['CompanyName'] or f"Company {row['Code']}",
+        'code': row['Code'],
+        'hasBS': bool(row['HasBS']),
+        'hasPL': bool(row['HasPL']),
+        'accountingStandard': row['AccountingStandard'],
+        'latestPublicDay': row['LatestPublicDay'],
+        'bsRows': row['BSRows'],
+        'plRows': row['PLRows'],
+    } for row in rows]
+    return companies, total
+
+
+def load_companies_live():
+    """COMPANIES がない DB 用: BS / PL 全体から企業一覧を集計する（以前の /api/companies の処理）"""
     companies_dict = {}
 
     # BSから取得
@@ -166,13 +313,59 @@ def get_companies():
     except Exception as e:
         print(f"PL会社リスト取得エラー: {e}")
 
-    return jsonify(list(companies_dict.values()))
+    return sorted(companies_dict.values(), key=lambda company: company['code'])
+
+
+@app.route('/api/companies')
+@response_cache.cached
+def get_companies():
+    """
+    企業一覧。?q=（企業コードの前方一致 / 企業名の部分一致）で絞り込み、?limit= / ?offset= でページ分割する。
+    絞り込み後の全件数は X-Total-Count ヘッダーで返す。
+    """
+    query = request.args.get('q', '').strip()
+    limit = request.args.get('limit', type=int)
+    offset = max(request.args.get('offset', default=0, type=int), 0)
+    if limit is not None and limit < 0:
+        return jsonify({'error': 'limit は0以上を指定してください'}), 400
+
+    conn = get_bs_db_connection()
+    try:
+        loaded = load_companies(conn, query, limit, offset)
+    finally:
+        conn.close()
+
+    if loaded is None:
+        companies = load_companies_live()
+        if query:
+            companies = [c for c in companies if c['code'].startswith(query) or query in (c['name'] or '')]
+        total = len(companies)
+        companies = companies[offset:] if limit is None else companies[offset:offset + limit]
+    else:
+        companies, total = loaded
+
+    response = jsonify(companies)
+    response.headers['X-Total-Count'] = str(total)
+    return response
 
 
 @app.route('/api/bs-data/<company_name>')
+@response_cache.cached
 def get_bs_data(company_name):
     """BSデータを取得（FinancialReportType/FiscalYearを使用、PublicDayベース）"""
     conn = get_bs_db_connection()
+    data = load_bs_data(conn, company_name)
+    conn.close()
+
+    print(f"BSデータ取得: {len(data)}件")
+    if len(data) > 0:
+        print(f"最初のデータ: {data[0]}")
+
+    return jsonify(data)
+
+
+def load_bs_data(conn, company_name):
+    """BS の行を画面用のリストにする（/api/bs-data と /api/dashboard で共通）"""
     rows = conn.execute('''
         SELECT 
             PublicDay,
@@ -188,7 +381,6 @@ def get_bs_data(company_name):
         WHERE CompanyName = ?
         ORDER BY FiscalYear, FinancialReportType
     ''', (company_name,)).fetchall()
-    conn.close()
 
     data = []
     period_map = {'Q1': 1, 'Q2': 2, 'Q3': 3, 'Q4': 4}
@@ -222,49 +414,25 @@ def get_bs_data(company_name):
 
     # FiscalYearとFinancialReportTypeでソート
     data.sort(key=lambda x: (x.get('fiscalYear') or 0, period_map.get(x.get('period'), 0)))
-
-    print(f"BSデータ取得: {len(data)}件")
-    if len(data) > 0:
-        print(f"最初のデータ: {data[0]}")
-
-    return jsonify(data)
+    return data
 
 
 @app.route('/api/pl-data/<code>')
+@response_cache.cached
 def get_pl_data(code):
     """PLデータを取得し、Periodを使って四半期ごとの差分に変換"""
     try:
         conn = get_pl_db_connection()
-        rows = conn.execute('''
-            SELECT 
-                PublicDay,
-                Period,
-                FiscalYear,
-                NetSales,
-                OperatingIncome,
-                OrdinaryIncome,
-                NetIncome,
-                RevenueIFRS,
-                OperatingProfitLossIFRS,
-                ProfitLossIFRS
-            FROM PL 
-            WHERE Code = ?
-            ORDER BY FiscalYear, Period
-        ''', (code,)).fetchall()
-        conn.close()
 
-        data = []
-        for row in rows:
-            data.append({
-                'term': row['PublicDay'][:7] if row['PublicDay'] else None,
-                'period': row['Period'],
-                'fiscalYear': row['FiscalYear'],
-                'publicDay': row['PublicDay'],
-                'netSales': row['NetSales'] or row['RevenueIFRS'],
-                'operatingIncome': row['OperatingIncome'] or row['OperatingProfitLossIFRS'],
-                'ordinaryIncome': row['OrdinaryIncome'],
-                'netIncome': row['NetIncome'] or row['ProfitLossIFRS']
-            })
+        # 取り込み時に計算済みの四半期データがあればそれを返す
+        converted_data = get_pl_quarterly(conn, code)
+        if converted_data is not None:
+            conn.close()
+            print(f"PLデータ取得（PL_QUARTERLY）: {len(converted_data)}件（四半期ごと）")
+            return jsonify(converted_data)
+
+        data = load_pl_rows(conn, code)
+        conn.close()
 
         # ===== ここにデバッグ追加 =====
         print(f"\n=== 変換前の生データ ===")
@@ -328,28 +496,107 @@ def get_pl_data(code):
 
 
 
+def get_price_columns(code, points=None, resolution=None):
+    """
+    株価を週足・月足にまとめたり（resolution）、LTTB で points 点に間引いたりして
+    列ごとの配列（{'dates': [...], 'prices': [...]}）で返す。
+    """
+    series = price_store.get_series(code)
+    if resolution:
+        series = downsample.resample(series, resolution)
+    if points:
+        series = downsample.lttb(series, points)
+
+    prices = [round(price, 2) if price == price else None for price in series['close'].tolist()]
+    result = {'code': code, 'resolution': resolution or 'daily', 'dates': series['dates'].tolist(), 'prices': prices}
+    if resolution and resolution != 'daily':
+        for key, name in (('open', 'opens'), ('high', 'highs'), ('low', 'lows')):
+            result[name] = [round(v, 2) if v == v else None for v in series[key].tolist()]
+    return result
+
+
+def get_downsample_args():
+    """?points=N / ?resolution=weekly|monthly を読む（不正な値は ValueError）"""
+    points = request.args.get('points', type=int)
+    resolution = request.args.get('resolution')
+    if resolution is not None and resolution not in downsample.RESOLUTIONS:
+        raise ValueError(f"resolution は {', '.join(downsample.RESOLUTIONS)} のいずれかを指定してください")
+    if points is not None and points < 3:
+        raise ValueError("points は3以上を指定してください")
+    return points, resolution
+
+
+# ダッシュボードで株価の取得を DB の読み込みと並行して行うためのスレッドプール
+dashboard_executor = ThreadPoolExecutor(max_workers=4)
+
+
+@app.route('/api/dashboard/<code>')
+def get_dashboard(code):
+    """
+    BS・PL・株価を1回のリクエストでまとめて返す。
+    株価（外部取得がありうる）はスレッドプールで並行して取得し、BS と PL は1つの接続で読む。
+    BS は社名で検索する（?name= で指定。省略時は直近の決算短信の社名）。
+    ?points= / ?resolution= を指定すると株価は間引いた列形式（/api/stock-price と同じ）で返す。
+    """
+    try:
+        points, resolution = get_downsample_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if points or resolution:
+        stock_future = dashboard_executor.submit(get_price_columns, code, points, resolution)
+    else:
+        stock_future = dashboard_executor.submit(price_store.get_prices, code)
+
+    company = None
+    bs, pl = [], []
+    try:
+        conn = get_dashboard_db_connection()
+        try:
+            name = request.args.get('name')
+            if not name:
+                row = conn.execute('SELECT CompanyName FROM BS WHERE Code = ? ORDER BY PublicDay DESC LIMIT 1',
+                                   (code,)).fetchone()
+                name = row['CompanyName'] if row else None
+            if name:
+                company = {'name': name, 'code': code}
+                bs = load_bs_data(conn, name)
+            pl = load_pl_data(conn, code)
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"ダッシュボード DB 読み込みエラー ({code}): {e}")
+
+    try:
+        stock = stock_future.result()
+    except Exception as e:
+        print(f"株価取得エラー ({code}): {e}")
+        stock = {'code': code, 'resolution': resolution or 'daily', 'dates': [], 'prices': []} \
+            if points or resolution else []
+
+    stock_count = len(stock['dates']) if isinstance(stock, dict) else len(stock)
+    print(f"ダッシュボード: {code} BS {len(bs)}件 / PL {len(pl)}件 / 株価 {stock_count}件")
+    return jsonify({'company': company, 'bs': bs, 'pl': pl, 'stock': stock})
+
+
 @app.route('/api/stock-price/<code>')
 def get_stock_price(code):
-    """株価データを日次で取得"""
+    """
+    株価データを日次で取得（PRICE_DB.db に保存済みの分 + 足りない直近分）。
+    ?points=N（LTTB で N 点に間引く）/ ?resolution=weekly|monthly（週足・月足）を指定すると
+    {'dates': [...], 'prices': [...]} の列形式で返す。
+    """
     try:
-        ticker = f"{code}.T"
-        stock = yf.Ticker(ticker)
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=10 * 365)
-        hist = stock.history(start=start_date, end=end_date, interval="1d")
-
-        if hist.empty:
-            return jsonify([])
-
-        # 日次データを配列形式で返す
-        data = []
-        for date, row in hist.iterrows():
-            data.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'price': round(float(row['Close']), 2)
-            })
-
-        print(f"株価データ取得: {len(data)}件（日次）")
+        points, resolution = get_downsample_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        if points or resolution:
+            return jsonify(get_price_columns(code, points, resolution))
+
+        data = price_store.get_prices(code)
+        print(f"株価データ: {len(data)}件（日次）")
         return jsonify(data)
 
     except Exception as e:
@@ -358,6 +605,7 @@ def get_stock_price(code):
 
 
 @app.route('/api/company/<code>')
+@response_cache.cached
 def get_company_by_code(code):
     conn = get_bs_db_connection()
     row = conn.execute('SELECT DISTINCT CompanyName FROM BS WHERE Code = ? LIMIT 1', (code,)).fetchone()
@@ -368,6 +616,7 @@ def get_company_by_code(code):
 
 
 @app.route('/api/financial-summary/<code>')
+@response_cache.cached
 def get_financial_summary(code):
     try:
         conn_bs = get_bs_db_connection()
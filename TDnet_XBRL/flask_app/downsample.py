@@ -0,0 +1,87 @@
+"""
+株価の日足をグラフ用に間引く処理（NumPy）。
+
+幅数百ピクセルのグラフに10年分（約2,500点）の日足を送っても見た目は変わらないため、
+サーバー側で点数を減らしてから返す。
+
+- resample(series, 'weekly' / 'monthly'): 週足・月足にまとめる（始値・高値・安値・終値・出来高）
+- lttb(series, points): Largest-Triangle-Three-Buckets で指定した点数に間引く
+  （山と谷が残るので、単純な間引きより形が崩れにくい）
+
+series は {'dates': 日付の配列, 'open': ..., 'high': ..., 'low': ..., 'close': ..., 'volume': ...}
+（PriceStore.get_series() の戻り値）で、日付順に並んでいること。
+"""
+
+from typing import Dict
+
+import numpy as np
+
+RESOLUTIONS = ('daily', 'weekly', 'monthly')
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def _period_keys(dates: np.ndarray, resolution: str) -> np.ndarray:
+    days = dates.astype('datetime64[D]')
+    if resolution == 'weekly':
+        # 1970-01-01 は木曜日なので、3日ずらして月曜始まりの週番号にする
+        return (days.astype(np.int64) + 3) // 7
+    if resolution == 'monthly':
+        return days.astype('datetime64[M]').astype(np.int64)
+    raise ValueError(f"resolution は {', '.join(RESOLUTIONS)} のいずれかを指定してください: {resolution}")
+
+
+def resample(series: Dict[str, np.ndarray], resolution: str) -> Dict[str, np.ndarray]:
+    """日足を週足 / 月足にまとめる（日付は各期間の最終取引日）"""
+    dates = series['dates']
+    if resolution == 'daily' or len(dates) == 0:
+        return series
+
+    keys = _period_keys(dates, resolution)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+    ends = np.concatenate((starts[1:], [len(dates)])) - 1
+
+    return {
+        'dates': dates[ends],
+        'open': series['open'][starts],
+        'high': np.fmax.reduceat(series['high'], starts),
+        'low': np.fmin.reduceat(series['low'], starts),
+        'close': series['close'][ends],
+        'volume': np.add.reduceat(np.nan_to_num(series['volume']), starts),
+    }
+
+
+def lttb(series: Dict[str, np.ndarray], points: int) -> Dict[str, np.ndarray]:
+    """
+    終値を基準に Largest-Triangle-Three-Buckets で points 点に間引く。
+    最初と最後の点は必ず残す。各バケットの中の三角形の面積の計算は NumPy でまとめて行う。
+    """
+    dates = series['dates']
+    count = len(dates)
+    if points >= count or points < 3:
+        return series
+
+    x = dates.astype('datetime64[D]').astype(np.float64)
+    y = series['close']
+
+    # 最初と最後を除いた点を points - 2 個のバケットに分ける
+    edges = np.linspace(1, count - 1, points - 1).astype(np.int64)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = count - 1
+
+    previous = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        # 次のバケットの平均（最後のバケットの次は最後の点）
+        next_start, next_end = end, (edges[i + 2] if i + 2 < len(edges) else count)
+        next_x = x[next_start:next_end].mean()
+        next_y = np.nanmean(y[next_start:next_end]) if np.isfinite(y[next_start:next_end]).any() else y[previous]
+
+        areas = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        areas = np.nan_to_num(areas, nan=-1.0)
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return {key: values[selected] for key, values in series.items()}
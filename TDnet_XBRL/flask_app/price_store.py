@@ -0,0 +1,233 @@
+"""
+株価（日足）を SQLite に保存しておき、/api/stock-price から返すためのモジュール。
+
+以前はページを開くたびに yfinance で10年分の日足を取得していた。PriceStore は
+
+- 取得済みの日足を PRICE テーブル（db/PRICE_DB.db、(Code, Date) が主キー）に保存し、そこから返す
+- 足りないのは最後に保存した日以降だけなので、その分だけ取得して追加する
+  （最終日も取り直す: 取引時間中に取得した途中の値を確定値で上書きするため）
+- 同じ企業への同時リクエストは1回の取得にまとめる（SingleFlight）
+- 読み込んだ日足は企業ごとに NumPy の配列でメモリに持つ（get_series()。取得し直したら読み直す）
+- 取得処理（fetcher）は差し替え可能（テストではネットワークを使わない偽物を渡せる）
+
+    store = PriceStore(PRICE_DB_PATH)                       # yfinance から取得
+    store = PriceStore(path, fetcher=lambda code, start, end: [...])   # テスト用
+
+fetcher は fetcher(code, start: date, end: date) を呼ぶと
+[(日付 'YYYY-MM-DD', 始値, 高値, 安値, 終値, 出来高), ...] を返す関数（end は含まない）。
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PriceRow = Tuple[str, Optional[float], Optional[float], Optional[float], Optional[float], Optional[float]]
+Fetcher = Callable[[str, date, date], Sequence[PriceRow]]
+
+PRICE_TABLE_DDL = '''CREATE TABLE IF NOT EXISTS PRICE (
+    Code TEXT NOT NULL,
+    Date TEXT NOT NULL,
+    Open REAL,
+    High REAL,
+    Low REAL,
+    Close REAL,
+    Volume REAL,
+    PRIMARY KEY (Code, Date)
+) WITHOUT ROWID'''
+
+# 企業ごとの最終取得日時（同じ日に何度も取りに行かないため）
+PRICE_FETCH_DDL = '''CREATE TABLE IF NOT EXISTS PRICE_FETCH (
+    Code TEXT PRIMARY KEY,
+    FetchedAt TEXT NOT NULL
+)'''
+
+
+def yfinance_fetcher(code: str, start: date, end: date) -> List[PriceRow]:
+    """yfinance から東証の日足を取得する（既定の fetcher）"""
+    import yfinance as yf
+
+    hist = yf.Ticker(f"{code}.T").history(start=start, end=end, interval="1d")
+    rows = []
+    for day, row in hist.iterrows():
+        rows.append((day.strftime('%Y-%m-%d'), float(row['Open']), float(row['High']), float(row['Low']),
+                     float(row['Close']), float(row['Volume'])))
+    return rows
+
+
+class SingleFlight:
+    """
+    同じキーの処理が実行中なら、終わるのを待ってその結果を受け取る。
+    （同じ企業の株価を同時に10回要求されても、取得は1回だけ行う）
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, dict] = {}
+
+    def do(self, key: str, func: Callable):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'event': threading.Event(), 'result': None, 'error': None}
+                self._calls[key] = call
+
+        if not leader:
+            call['event'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = func()
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['event'].set()
+
+
+class PriceStore:
+    """
+    株価の保存先と取得処理をまとめたクラス。
+
+    Args:
+        db_path: 保存先の SQLite ファイル
+        fetcher: 日足の取得関数（None なら yfinance）
+        history_years: 初回に取得する年数
+        refresh_interval: 前回の取得からこの時間が経つまでは取りに行かない
+        max_cached_series: メモリに持つ企業数の上限
+    """
+
+    def __init__(self, db_path: str, fetcher: Optional[Fetcher] = None, history_years: int = 10,
+                 refresh_interval: timedelta = timedelta(hours=1), max_cached_series: int = 256):
+        self.db_path = db_path
+        self.fetcher = fetcher or yfinance_fetcher
+        self.history_years = history_years
+        self.refresh_interval = refresh_interval
+        self.max_cached_series = max_cached_series
+        self._single_flight = SingleFlight()
+        self.fetch_count = 0
+
+        # 企業コード → (最終取得日時, 日足の配列)。最終取得日時が変わったら読み直す
+        self._series: "OrderedDict[str, Tuple[Optional[str], Dict[str, np.ndarray]]]" = OrderedDict()
+        self._series_lock = threading.Lock()
+
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(PRICE_TABLE_DDL)
+            conn.execute(PRICE_FETCH_DDL)
+            conn.commit()
+        finally:
+            conn.close()
+
+    # ===========================================================================
+    # 読み込み
+    # ===========================================================================
+
+    def get_prices(self, code: str) -> List[dict]:
+        """
+        直近 history_years 年分の終値を [{'date': 'YYYY-MM-DD', 'price': 終値}, ...] で返す。
+        取得に失敗しても保存済みのデータがあればそれを返す。
+        """
+        series = self.get_series(code)
+        return [{'date': day, 'price': round(float(close), 2)}
+                for day, close in zip(series['dates'].tolist(), series['close'].tolist()) if close == close]
+
+    def get_series(self, code: str) -> Dict[str, np.ndarray]:
+        """
+        直近 history_years 年分の日足を列ごとの配列で返す
+        （{'dates': 'YYYY-MM-DD' の配列, 'open', 'high', 'low', 'close', 'volume': float の配列}、欠損は NaN）。
+        同じ企業の2回目以降は、取得し直していなければメモリ上の配列を返す。
+        """
+        try:
+            self.update(code)
+        except Exception as e:
+            print(f"株価取得エラー ({code}): {e}")
+            if self.last_date(code) is None:
+                raise
+
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT FetchedAt FROM PRICE_FETCH WHERE Code = ?', (code,)).fetchone()
+            fetched_at = row[0] if row else None
+
+            with self._series_lock:
+                cached = self._series.get(code)
+                if cached is not None and cached[0] == fetched_at:
+                    self._series.move_to_end(code)
+                    return cached[1]
+
+            start = (datetime.now() - timedelta(days=self.history_years * 365)).strftime('%Y-%m-%d')
+            rows = conn.execute(
+                'SELECT Date, Open, High, Low, Close, Volume FROM PRICE WHERE Code = ? AND Date >= ? ORDER BY Date',
+                (code, start)).fetchall()
+        finally:
+            conn.close()
+
+        columns = list(zip(*rows)) if rows else [()] * 6
+        series = {'dates': np.array(columns[0], dtype='U10')}
+        for name, values in zip(('open', 'high', 'low', 'close', 'volume'), columns[1:]):
+            series[name] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+        with self._series_lock:
+            self._series[code] = (fetched_at, series)
+            self._series.move_to_end(code)
+            while len(self._series) > self.max_cached_series:
+                self._series.popitem(last=False)
+        return series
+
+    def last_date(self, code: str) -> Optional[str]:
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT MAX(Date) FROM PRICE WHERE Code = ?', (code,)).fetchone()[0]
+        finally:
+            conn.close()
+
+    # ===========================================================================
+    # 取得
+    # ===========================================================================
+
+    def update(self, code: str) -> int:
+        """足りない分を取得して保存し、保存した行数を返す（同じ企業の同時呼び出しは1回にまとまる）"""
+        return self._single_flight.do(code, lambda: self._update(code))
+
+    def _update(self, code: str) -> int:
+        now = datetime.now()
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT FetchedAt FROM PRICE_FETCH WHERE Code = ?', (code,)).fetchone()
+            if row and now - datetime.fromisoformat(row[0]) < self.refresh_interval:
+                return 0
+
+            last = conn.execute('SELECT MAX(Date) FROM PRICE WHERE Code = ?', (code,)).fetchone()[0]
+            if last is None:
+                start = now.date() - timedelta(days=self.history_years * 365)
+            else:
+                start = date.fromisoformat(last)
+
+            rows = self.fetcher(code, start, now.date() + timedelta(days=1))
+            self.fetch_count += 1
+
+            with conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO PRICE (Code, Date, Open, High, Low, Close, Volume) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    [(code, *price) for price in rows])
+                conn.execute('INSERT OR REPLACE INTO PRICE_FETCH (Code, FetchedAt) VALUES (?, ?)',
+                             (code, now.isoformat(timespec='seconds')))
+            print(f"株価データ取得: {code} {start} 以降 {len(rows)}件")
+            return len(rows)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
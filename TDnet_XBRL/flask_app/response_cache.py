@@ -0,0 +1,172 @@
+"""
+Flask API のレスポンスキャッシュ。
+
+DB の内容は main.py で取り込んだときしか変わらないのに、/api/... は毎回 DB に接続して
+同じ JSON を作り直していた。ResponseCache は
+
+- エンドポイント + 引数（URL とクエリ文字列）ごとにレスポンスを保存する（LRU、件数とバイト数の上限付き）
+- DB ファイル（と -wal ファイル）の更新日時・サイズをデータのバージョンとし、変わったら全て破棄する
+- ETag を付け、ブラウザが If-None-Match で同じ ETag を送ってきたら 304 を返す
+
+    cache = ResponseCache([BS_DB_PATH, PL_DB_PATH])
+
+    @app.route('/api/companies')
+    @cache.cached
+    def get_companies():
+        ...
+
+200 以外のレスポンス（エラー）はキャッシュしない。ヘッダーは X- で始まるもの（X-Total-Count など）だけ保存する。
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Iterable, Optional, Tuple
+
+from flask import make_response, request
+
+
+class ResponseCache:
+    """
+    DB のバージョンで無効化されるレスポンスの LRU キャッシュ。
+
+    Args:
+        db_paths: バージョンの判定に使う DB ファイル
+        max_entries: 保存するレスポンスの最大件数
+        max_bytes: 保存するレスポンス本文の合計の上限（バイト）
+    """
+
+    def __init__(self, db_paths: Iterable[str], max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024):
+        self.db_paths = list(db_paths)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        # キー → (本文, mimetype, 追加のヘッダー)
+        self._entries: "OrderedDict[str, Tuple[bytes, str, list]]" = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[str] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    # ===========================================================================
+    # データのバージョン
+    # ===========================================================================
+
+    def data_version(self) -> str:
+        """DB と -wal ファイルの更新日時・サイズから作ったバージョン文字列（DB を開かずに判定できる）"""
+        parts = []
+        for db_path in self.db_paths:
+            for path in (db_path, db_path + '-wal'):
+                try:
+                    stat = os.stat(path)
+                    parts.append(f'{stat.st_mtime_ns}:{stat.st_size}')
+                except OSError:
+                    parts.append('-')
+        return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:16]
+
+    def _make_etag(self, version: str, key: str) -> str:
+        return hashlib.sha1(f'{version}:{key}'.encode()).hexdigest()[:20]
+
+    # ===========================================================================
+    # 取得 / 保存
+    # ===========================================================================
+
+    def get(self, key: str, version: str) -> Optional[Tuple[bytes, str, list]]:
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, version: str, body: bytes, mimetype: str, headers: Optional[list] = None):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._check_version(version)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = (body, mimetype, headers or [])
+            self._bytes += len(body)
+
+            # 古いものから捨てる
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (old_body, _, _) = self._entries.popitem(last=False)
+                self._bytes -= len(old_body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries), 'bytes': self._bytes,
+                'hits': self.hits, 'misses': self.misses, 'not_modified': self.not_modified,
+            }
+
+    def _check_version(self, version: str):
+        """バージョンが変わっていたら全て破棄する（ロック内で呼ぶ）"""
+        if version != self._version:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    # ===========================================================================
+    # デコレーター
+    # ===========================================================================
+
+    def cached(self, view):
+        """Flask のビュー関数に付けるデコレーター（@app.route の下に付ける）"""
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.full_path
+            version = self.data_version()
+            etag = self._make_etag(version, key)
+
+            # ブラウザが同じバージョンのレスポンスを持っていれば本文は返さない
+            if request.if_none_match.contains(etag):
+                with self._lock:
+                    self.not_modified += 1
+                return self._respond(b'', None, etag, status=304)
+
+            entry = self.get(key, version)
+            if entry is not None:
+                body, mimetype, headers = entry
+                response = self._respond(body, mimetype, etag)
+                response.headers.extend(headers)
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+
+            body = response.get_data()
+            headers = [(name, value) for name, value in response.headers.items() if name.startswith('X-')]
+            self.put(key, version, body, response.mimetype, headers)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        return wrapper
+
+    @staticmethod
+    def _respond(body: bytes, mimetype: Optional[str], etag: str, status: int = 200):
+        response = make_response(body, status)
+        if mimetype:
+            response.mimetype = mimetype
+        response.set_etag(etag)
+        # 毎回 If-None-Match で問い合わせてもらう（DB が更新されたらすぐ反映される）
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
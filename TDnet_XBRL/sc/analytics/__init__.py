@@ -0,0 +1 @@
+# analytics/__init__.py
@@ -0,0 +1,241 @@
+# analytics/fundamentals.py
+"""
+PL / BS の全企業分をまとめて pandas で読み込み、企業・四半期ごとの指標を計算して
+FUNDAMENTALS テーブル（PL_DB.db）に保存するモジュール。
+
+計算する指標（1行 = 企業 × 年度 × 四半期）:
+    - 四半期の売上高・営業利益・経常利益・純利益（累計値から前の四半期を引いた値）
+    - 直近4四半期の合計（TTM）
+    - 前年同四半期比（YoY）
+    - 営業利益率（四半期）
+    - 自己資本比率（期末の BS）
+    - ROE（TTM 純利益 ÷ 期末と前年同期末の自己資本の平均）
+
+IFRS と日本GAAP はカラムが違うため、日本GAAP の値がなければ IFRS の値を使う
+（売上高 = NetSales / RevenueIFRS、自己資本 = NetAssets / Equity など）。
+企業ごとのループは使わず、前の四半期・前年同期の値は (企業コード, 四半期番号) での結合で求める。
+
+使い方（TDnet_XBRL フォルダで）:
+    python -m sc.analytics.fundamentals
+"""
+
+import sqlite3
+import time
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from sc.fileio.filing_catalog import FILENAME_PATTERN
+from sc.inserter import DB_TIMEOUT, db_schema
+
+FUNDAMENTALS_DDL = '''CREATE TABLE IF NOT EXISTS FUNDAMENTALS (
+    Code TEXT NOT NULL,
+    FiscalYear INTEGER NOT NULL,
+    Quarter INTEGER NOT NULL,
+    PeriodEnd TEXT,
+    PublicDay TEXT,
+    Revenue REAL,
+    OperatingIncome REAL,
+    OrdinaryIncome REAL,
+    NetIncome REAL,
+    RevenueTTM REAL,
+    OperatingIncomeTTM REAL,
+    NetIncomeTTM REAL,
+    RevenueYoY REAL,
+    OperatingIncomeYoY REAL,
+    OperatingMargin REAL,
+    Assets REAL,
+    Equity REAL,
+    EquityRatio REAL,
+    ROE REAL,
+    PRIMARY KEY (Code, FiscalYear, Quarter)
+)'''
+
+FUNDAMENTAL_COLUMNS = [
+    'Code', 'FiscalYear', 'Quarter', 'PeriodEnd', 'PublicDay',
+    'Revenue', 'OperatingIncome', 'OrdinaryIncome', 'NetIncome',
+    'RevenueTTM', 'OperatingIncomeTTM', 'NetIncomeTTM',
+    'RevenueYoY', 'OperatingIncomeYoY', 'OperatingMargin',
+    'Assets', 'Equity', 'EquityRatio', 'ROE',
+]
+
+QUARTERS = {'Q1': 1, 'Q2': 2, 'Q3': 3, 'Q4': 4}
+
+# 統一後のカラム → (日本GAAP のカラム, IFRS のカラム)
+PL_METRICS = {
+    'Revenue': ('NetSales', 'RevenueIFRS'),
+    'OperatingIncome': ('OperatingIncome', 'OperatingProfitLossIFRS'),
+    'OrdinaryIncome': ('OrdinaryIncome', None),
+    'NetIncome': ('NetIncome', 'ProfitLossIFRS'),
+}
+BS_METRICS = {
+    'Assets': ('Assets', None),
+    'Equity': ('NetAssets', 'Equity'),
+}
+
+# TTM を計算する指標
+TTM_METRICS = ('Revenue', 'OperatingIncome', 'NetIncome')
+
+
+# ===========================================================================
+# 読み込み
+# ===========================================================================
+
+def _unify(frame: pd.DataFrame, metrics: dict) -> pd.DataFrame:
+    """日本GAAP / IFRS のカラムを1つにまとめ、数値に変換する（0 や空なら IFRS の値を使う）"""
+    result = pd.DataFrame(index=frame.index)
+    for name, (primary, fallback) in metrics.items():
+        values = pd.to_numeric(frame[primary], errors='coerce')
+        if fallback:
+            values = values.where(values.fillna(0) != 0, pd.to_numeric(frame[fallback], errors='coerce'))
+        result[name] = values
+    return result
+
+
+def _period_end(file_names: pd.Series) -> pd.Series:
+    """ファイル名から期末日を取り出す"""
+    return file_names.str.extract(FILENAME_PATTERN.pattern, flags=FILENAME_PATTERN.flags)['period_end']
+
+
+def load_pl(conn: sqlite3.Connection) -> pd.DataFrame:
+    """
+    PL を読み込み、(Code, FiscalYear, Quarter) ごとに1行の累計値にする。
+    同じ四半期の行が複数あれば後から登録された行を使う（PL_QUARTERLY と同じ）。
+    """
+    columns = sorted({column for pair in PL_METRICS.values() for column in pair if column})
+    pl = pd.read_sql_query(
+        f"SELECT rowid AS _rowid, Code, FileName, PublicDay, Period, FiscalYear, {', '.join(columns)} FROM PL", conn)
+
+    frame = pd.DataFrame({
+        'Code': pl['Code'],
+        'FiscalYear': pd.to_numeric(pl['FiscalYear'], errors='coerce'),
+        'Quarter': pl['Period'].map(QUARTERS),
+        'PeriodEnd': _period_end(pl['FileName']),
+        'PublicDay': pl['PublicDay'],
+        '_rowid': pl['_rowid'],
+    }).join(_unify(pl, PL_METRICS))
+
+    frame = frame.dropna(subset=['Code', 'FiscalYear', 'Quarter'])
+    frame = (frame.sort_values('_rowid')
+             .drop_duplicates(['Code', 'FiscalYear', 'Quarter'], keep='last')
+             .drop(columns='_rowid'))
+    frame['FiscalYear'] = frame['FiscalYear'].astype(int)
+    frame['Quarter'] = frame['Quarter'].astype(int)
+    return frame.reset_index(drop=True)
+
+
+def load_bs(conn: sqlite3.Connection) -> pd.DataFrame:
+    """BS を読み込み、(Code, PeriodEnd) ごとに1行にする（後から登録された行を使う）"""
+    columns = sorted({column for pair in BS_METRICS.values() for column in pair if column})
+    bs = pd.read_sql_query(f"SELECT rowid AS _rowid, Code, FileName, {', '.join(columns)} FROM BS", conn)
+
+    frame = pd.DataFrame({
+        'Code': bs['Code'],
+        'PeriodEnd': _period_end(bs['FileName']),
+        '_rowid': bs['_rowid'],
+    }).join(_unify(bs, BS_METRICS))
+
+    frame = frame.dropna(subset=['Code', 'PeriodEnd'])
+    return (frame.sort_values('_rowid')
+            .drop_duplicates(['Code', 'PeriodEnd'], keep='last')
+            .drop(columns='_rowid')
+            .reset_index(drop=True))
+
+
+# ===========================================================================
+# 計算
+# ===========================================================================
+
+def _lag(frame: pd.DataFrame, columns: List[str], quarters: int) -> pd.DataFrame:
+    """
+    各行について quarters 四半期前の同じ企業の値を返す（なければ NaN）。
+    frame は Code と四半期番号 _index を持ち、(Code, _index) で一意であること。
+    """
+    shifted = frame[['Code', '_index'] + columns].copy()
+    shifted['_index'] += quarters
+    lagged = frame[['Code', '_index']].merge(shifted, on=['Code', '_index'], how='left')
+    lagged.index = frame.index
+    return lagged[columns]
+
+
+def _ratio(numerator: pd.Series, denominator: pd.Series) -> pd.Series:
+    return numerator / denominator.where(denominator != 0)
+
+
+def compute_fundamentals(pl: pd.DataFrame, bs: pd.DataFrame) -> pd.DataFrame:
+    """load_pl() / load_bs() の結果から FUNDAMENTALS の行を計算する"""
+    frame = pl.copy()
+    frame['_index'] = frame['FiscalYear'] * 4 + frame['Quarter'] - 1
+    metrics = list(PL_METRICS)
+
+    # 四半期の値: Q1 は累計値そのまま、Q2 以降は前の四半期の累計値との差（前の四半期がなければ NaN）
+    previous = _lag(frame, metrics, 1)
+    is_q1 = (frame['Quarter'] == 1).to_numpy()[:, None]
+    frame[metrics] = np.where(is_q1, frame[metrics], frame[metrics] - previous)
+
+    # TTM: 直近4四半期がそろっている場合だけ合計する
+    ttm_columns = list(TTM_METRICS)
+    ttm = frame[ttm_columns].copy()
+    for quarters in (1, 2, 3):
+        ttm = ttm + _lag(frame, ttm_columns, quarters)
+    for column in ttm_columns:
+        frame[f'{column}TTM'] = ttm[column]
+
+    # 前年同四半期比（基準がマイナスでも符号が分かるよう、分母は絶対値）
+    last_year = _lag(frame, ['Revenue', 'OperatingIncome'], 4)
+    frame['RevenueYoY'] = _ratio(frame['Revenue'] - last_year['Revenue'], last_year['Revenue'].abs())
+    frame['OperatingIncomeYoY'] = _ratio(frame['OperatingIncome'] - last_year['OperatingIncome'],
+                                         last_year['OperatingIncome'].abs())
+    frame['OperatingMargin'] = _ratio(frame['OperatingIncome'], frame['Revenue'])
+
+    # 期末の BS を結合
+    frame = frame.merge(bs, on=['Code', 'PeriodEnd'], how='left')
+    frame['EquityRatio'] = _ratio(frame['Equity'], frame['Assets'])
+    equity_last_year = _lag(frame, ['Equity'], 4)['Equity']
+    average_equity = pd.concat([frame['Equity'], equity_last_year], axis=1).mean(axis=1)
+    frame['ROE'] = _ratio(frame['NetIncomeTTM'], average_equity.where(frame['Equity'].notna()))
+
+    frame = frame.replace([np.inf, -np.inf], np.nan)
+    return frame.sort_values(['Code', 'FiscalYear', 'Quarter'])[FUNDAMENTAL_COLUMNS].reset_index(drop=True)
+
+
+# ===========================================================================
+# 保存
+# ===========================================================================
+
+def write_fundamentals(conn: sqlite3.Connection, frame: pd.DataFrame) -> int:
+    """FUNDAMENTALS を1トランザクションで入れ替え、書き込んだ行数を返す"""
+    rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+    placeholders = ', '.join('?' * len(FUNDAMENTAL_COLUMNS))
+    with conn:
+        conn.execute(FUNDAMENTALS_DDL)
+        conn.execute('DELETE FROM FUNDAMENTALS')
+        conn.executemany(f"INSERT INTO FUNDAMENTALS ({', '.join(FUNDAMENTAL_COLUMNS)}) VALUES ({placeholders})",
+                         rows)
+    return len(frame)
+
+
+def rebuild(pl_db_path: Optional[str] = None, bs_db_path: Optional[str] = None) -> int:
+    """
+    全企業の指標を計算し直して FUNDAMENTALS（PL_DB.db）に保存する。
+
+    Returns:
+        書き込んだ行数
+    """
+    start = time.perf_counter()
+    pl_conn = sqlite3.connect(pl_db_path or db_schema.get_db_path(db_schema.PL_DB_NAME), timeout=DB_TIMEOUT)
+    bs_conn = sqlite3.connect(bs_db_path or db_schema.get_db_path(db_schema.BS_DB_NAME), timeout=DB_TIMEOUT)
+    try:
+        frame = compute_fundamentals(load_pl(pl_conn), load_bs(bs_conn))
+        written = write_fundamentals(pl_conn, frame)
+    finally:
+        pl_conn.close()
+        bs_conn.close()
+
+    print(f"[INFO] FUNDAMENTALS: {written}行 / {frame['Code'].nunique()}社（{time.perf_counter() - start:.2f}秒）")
+    return written
+
+
+if __name__ == '__main__':
+    rebuild()
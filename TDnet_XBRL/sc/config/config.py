@@ -13,11 +13,56 @@ class Config:
     - 企業コード一覧
     - ダウンロードフォルダ
     - 処理用のXBRLファイル保存フォルダ
+    - XBRL 解析バックエンド（'lxml' / 'bs4' / 'regex'）
+    - パースキャッシュの使用有無と保存先（None なら db/PARSE_CACHE.db）
+    - ZIP を解凍せずに直接読むかどうか（True なら ZIP は削除せず残す）
+    - 1社分のファイルをプロセスプールで並列に抽出するかどうかとプロセス数（None ならコア数）
+    - 同時に処理する企業数（2以上なら企業ごとに staging_folder/<code> にダウンロード）
+    - パイプライン実行の有無、ステージ間キューの上限、待ち数の表示間隔（秒、0 で表示しない）
+    - ダウンロードせずに、企業フォルダ・アーカイブにある Zip で処理し直すかどうか
+    - DB 書き込みをまとめる行数（企業の区切りに加えて、この行数ごとにもコミット）
+    - 差分取り込み（True なら DB に登録済みのファイルは解析しない）
+    - 差分ダウンロード（True なら DB の最新の公開日以降の開示だけをダウンロードする）
+    - 処理完了後に全企業の指標（FUNDAMENTALS テーブル）を計算し直すかどうか
+    - ダウンロードに使う Chrome の数（None なら同時処理企業数）、ヘッドレスで起動するかどうか、
+      ダウンロードが進まないときに打ち切るまでの秒数
+    - ダウンロード方法（'selenium' / 'http'）、'http' の場合の開示一覧の URL
+      （'{code}' を企業コードに置き換える。None なら JPX）
+    - ダウンロードした Zip を内容ごとに1つだけ保存するアーカイブを使うかどうかと保存先
+      （None なら xbrlfile_folder/_archive）
+    - サイトへの1秒あたりのリクエスト数（0 なら制限しない）とまとめて送ってよい数、
+      同時ダウンロード数の上限（実際の同時数はこの範囲で自動で増減する）
     """
 
     codes: List[str]
     source_folder: Path
     xbrlfile_folder: Path
+    parser_backend: str = "lxml"
+    use_parse_cache: bool = False
+    parse_cache_path: Optional[Path] = None
+    read_from_zip: bool = False
+    parallel_parse: bool = False
+    parse_workers: Optional[int] = None
+    company_workers: int = 1
+    staging_folder: Optional[Path] = None
+    use_pipeline: bool = False
+    pipeline_queue_size: int = 4
+    pipeline_report_interval: float = 10.0
+    skip_download: bool = False
+    db_flush_rows: int = 1000
+    incremental: bool = False
+    delta_download: bool = False
+    update_fundamentals: bool = False
+    browser_sessions: Optional[int] = None
+    headless_browser: bool = True
+    download_timeout: float = 60.0
+    downloader: str = "selenium"
+    listing_url: Optional[str] = None
+    requests_per_second: float = 2.0
+    request_burst: int = 4
+    download_concurrency: int = 4
+    use_archive: bool = False
+    archive_folder: Optional[Path] = None
 
     # --------------------------------------------------------
     # デフォルト設定で初期化
@@ -57,6 +102,27 @@ class Config:
             xbrlfile_folder=xbrlfile_folder or Path(r"E:\Zip_files")
         )
 
+    # --------------------------------------------------------
+    # 企業ごとのダウンロードフォルダの親フォルダ
+    # --------------------------------------------------------
+    def get_staging_folder(self) -> Path:
+        """staging_folder が未指定なら xbrlfile_folder/_staging を使う"""
+        return self.staging_folder or self.xbrlfile_folder / '_staging'
+
+    # --------------------------------------------------------
+    # Zip のアーカイブの保存先
+    # --------------------------------------------------------
+    def get_archive_folder(self) -> Path:
+        """archive_folder が未指定なら xbrlfile_folder/_archive を使う"""
+        return self.archive_folder or self.xbrlfile_folder / '_archive'
+
+    # --------------------------------------------------------
+    # ダウンロードに使う Chrome の数
+    # --------------------------------------------------------
+    def get_browser_sessions(self) -> int:
+        """browser_sessions が未指定なら同時処理企業数と同じ数にする"""
+        return self.browser_sessions or max(1, self.company_workers)
+
     # --------------------------------------------------------
     # 型チェック／ディレクトリ存在チェック（必要なら拡張可）
     # --------------------------------------------------------
@@ -67,4 +133,16 @@ class Config:
 
         # 各要素が文字列かチェック
         if not all(isinstance(code, str) for code in self.codes):
-            raise ValueError("All codes must be strings")
\ No newline at end of file
+            raise ValueError("All codes must be strings")
+
+        # 使えるバックエンドは fact_backends に登録されているもの（'lxml' / 'bs4' / 'regex'）
+        from sc.parser.fact_backends import available_backends
+        if self.parser_backend not in available_backends():
+            raise ValueError(f"parser_backend must be one of {available_backends()}")
+
+        if self.downloader not in ("selenium", "http"):
+            raise ValueError("downloader must be 'selenium' or 'http'")
+        if self.requests_per_second < 0:
+            raise ValueError("requests_per_second must be >= 0")
+        if self.download_concurrency < 1:
+            raise ValueError("download_concurrency must be >= 1")
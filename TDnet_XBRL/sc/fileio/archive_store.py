@@ -0,0 +1,263 @@
+# fileio/archive_store.py
+"""
+ダウンロードした Zip を内容の SHA-256 をキーにして1つずつ保存するアーカイブ。
+
+以前は Zip を企業フォルダに移動し、解凍後に削除していたので、処理し直すたびに
+ダウンロードし直す必要があり、同じ内容の Zip をダウンロードし直すと同じ処理を繰り返していた。
+
+    root/
+      objects/ab/cd/abcd....zip     Zip 本体（SHA-256 の先頭2文字・次の2文字でフォルダを分ける）
+      index.db                      企業コード・ファイル名 → SHA-256 の対応表
+
+- add(): ダウンロードした Zip をアーカイブに移す。同じ内容が既にあれば元のファイルを消すだけ
+- restore(): 企業のアーカイブ済みの Zip を企業フォルダに置く（ハードリンク。できなければコピー）。
+  ダウンロード後は新しい内容の Zip だけを置き、アーカイブ全体を置くのは処理し直すとき（skip_download）だけ
+- known_names(): 企業のアーカイブ済みのファイル名（差分ダウンロードでダウンロード済みとして扱う）
+
+    store = get_archive_store(Path(r"E:\\Zip_files\\_archive"))
+    store.add('2780', r"C:\\Users\\SONY\\Downloads\\081220241011543262.zip")
+    store.restore('2780', Path(r"E:\\Zip_files\\2780"))
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+OBJECTS_DIR = 'objects'
+INDEX_NAME = 'index.db'
+CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_of_file(path) -> str:
+    """ファイルの SHA-256（大きなファイルも少しずつ読む）"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_or_copy(source: Path, destination: Path):
+    """ハードリンクを作る（別のドライブなどで作れなければコピーする）"""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+class ArchiveStore:
+    """
+    内容の SHA-256 で Zip を保存するアーカイブ。
+    index.db への接続は1つをロックで守り、スレッド間で共有できるようにしている。
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.objects_dir = self.root / OBJECTS_DIR
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / INDEX_NAME), timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS archive_index (
+                code TEXT NOT NULL,
+                file_name TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                added_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+                PRIMARY KEY (code, file_name)
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_archive_sha256 ON archive_index (sha256)')
+        self._conn.commit()
+
+        self.added = 0
+        self.duplicates = 0
+
+    def object_path(self, sha256: str) -> Path:
+        """SHA-256 に対応する Zip の保存先（objects/ab/cd/<sha256>.zip）"""
+        return self.objects_dir / sha256[:2] / sha256[2:4] / f'{sha256}.zip'
+
+    # ===========================================================================
+    # 保存
+    # ===========================================================================
+
+    def add(self, code, path, keep: bool = False) -> Tuple[str, bool]:
+        """
+        Zip をアーカイブに保存し、(SHA-256, 新しい内容なら True) を返す。
+
+        Args:
+            code: 企業コード
+            path: 保存する Zip
+            keep: True なら元のファイルを残す（企業フォルダにある Zip を取り込むとき）。
+                  False なら移動する（同じ内容が既にあれば元のファイルを削除するだけ）
+        """
+        path = Path(path)
+        sha256 = sha256_of_file(path)
+        size = path.stat().st_size
+        destination = self.object_path(sha256)
+
+        is_new = not destination.exists()
+        if is_new:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            # 途中のファイルを本体と取り違えないように、一時ファイルに置いてから名前を変える
+            temp = destination.with_name(f'{destination.name}.{threading.get_ident()}.tmp')
+            if keep:
+                _link_or_copy(path, temp)
+            else:
+                shutil.move(str(path), str(temp))
+            os.replace(temp, destination)
+        elif not keep:
+            path.unlink()
+
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO archive_index (code, file_name, sha256, size) VALUES (?, ?, ?, ?)',
+                (str(code), path.name, sha256, size)
+            )
+            self._conn.commit()
+            if is_new:
+                self.added += 1
+            else:
+                self.duplicates += 1
+        return sha256, is_new
+
+    def add_folder(self, code, folder: Path, keep: bool = False) -> List[str]:
+        """
+        フォルダ内の Zip を全てアーカイブに保存し、その企業にとって新しい内容の Zip のファイル名を返す
+        （企業に同じ内容の Zip が既にあるものは含めない。処理し直す必要がないため）。
+        keep=True のときは、索引に同じファイル名があるものは読まない（毎回 SHA-256 を計算し直さない）。
+        """
+        folder = Path(folder)
+        if not folder.is_dir():
+            return []
+
+        entries = self.entries(code)
+        known_names = {file_name for file_name, _ in entries} if keep else set()
+        known_hashes = {sha256 for _, sha256 in entries}
+        added = []
+        for path in sorted(folder.glob('*.zip')):
+            if path.name in known_names:
+                continue
+            sha256, _ = self.add(code, path, keep=keep)
+            if sha256 not in known_hashes:
+                known_hashes.add(sha256)
+                added.append(path.name)
+            elif not keep:
+                print(f"{path.name}: 同じ内容の Zip がアーカイブにあるので保存しません（{sha256[:12]}）")
+        return added
+
+    # ===========================================================================
+    # 取得
+    # ===========================================================================
+
+    def lookup(self, code, file_name: str) -> Optional[str]:
+        """企業コード・ファイル名の SHA-256（なければ None）"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT sha256 FROM archive_index WHERE code = ? AND file_name = ?',
+                (str(code), file_name)
+            ).fetchone()
+        return row[0] if row else None
+
+    def entries(self, code) -> List[Tuple[str, str]]:
+        """企業のアーカイブ済みの (ファイル名, SHA-256) のリスト"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT file_name, sha256 FROM archive_index WHERE code = ? ORDER BY file_name',
+                (str(code),)
+            ).fetchall()
+        return [(file_name, sha256) for file_name, sha256 in rows]
+
+    def known_names(self, code) -> List[str]:
+        """企業のアーカイブ済みの Zip のファイル名"""
+        return [file_name for file_name, _ in self.entries(code)]
+
+    def restore(self, code, folder: Path, names: Optional[Iterable[str]] = None) -> int:
+        """
+        企業のアーカイブ済みの Zip のうち、folder にないものを folder に置き、置いた数を返す。
+        names を渡すと、そのファイル名の Zip だけを置く。
+        本体がなくなっているもの（手で消したなど）は索引から外す。
+        """
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        names = None if names is None else set(names)
+
+        restored = 0
+        missing = []
+        for file_name, sha256 in self.entries(code):
+            if names is not None and file_name not in names:
+                continue
+            destination = folder / file_name
+            if destination.exists():
+                continue
+            source = self.object_path(sha256)
+            if not source.exists():
+                missing.append(file_name)
+                continue
+            _link_or_copy(source, destination)
+            restored += 1
+
+        if missing:
+            print(f"警告: {code} のアーカイブに本体のない Zip が {len(missing)}件あったので索引から外しました")
+            with self._lock:
+                self._conn.executemany(
+                    'DELETE FROM archive_index WHERE code = ? AND file_name = ?',
+                    [(str(code), file_name) for file_name in missing]
+                )
+                self._conn.commit()
+        return restored
+
+    # ===========================================================================
+    # メンテナンス
+    # ===========================================================================
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, codes, objects = self._conn.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT code), COUNT(DISTINCT sha256) FROM archive_index'
+            ).fetchone()
+            # 同じ内容は1つしか保存しないので、内容ごとに1回だけ数える
+            size = self._conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT sha256, size FROM archive_index)'
+            ).fetchone()[0]
+        return {'entries': entries, 'codes': codes, 'objects': objects, 'bytes': size,
+                'added': self.added, 'duplicates': self.duplicates}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ===========================================================================
+# 共有インスタンス
+# ===========================================================================
+
+_instances: Dict[str, ArchiveStore] = {}
+_instances_lock = threading.Lock()
+
+
+def get_archive_store(root: Path) -> ArchiveStore:
+    """フォルダごとに1つの ArchiveStore を返す"""
+    key = str(Path(root).resolve())
+
+    with _instances_lock:
+        store = _instances.get(key)
+        if store is None:
+            store = ArchiveStore(Path(root))
+            _instances[key] = store
+        return store
+
+
+if __name__ == '__main__':
+    import sys
+
+    store = get_archive_store(Path(sys.argv[1]) if len(sys.argv) > 1 else Path(r"E:\Zip_files\_archive"))
+    print(f"アーカイブ: {store.root}")
+    print(f"状態: {store.stats()}")
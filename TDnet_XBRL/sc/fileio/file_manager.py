@@ -75,7 +75,8 @@ class FileManager:
             folder: Path,
             statement_type: str,
             period_type: str,
-            consolidation: str
+            consolidation: str,
+            from_zip: bool = False
     ) -> List[str]:
         """
         BS/PL のファイルリストを取得する統合関数。
@@ -87,50 +88,21 @@ class FileManager:
             statement_type: 'bs' or 'pl'
             period_type: 'annual' / 'quarterly' / 'semiannual'
             consolidation: 'consolidated' or 'standalone'
+            from_zip: True なら ZIP 内のファイル（仮想パス）も含める
 
         Returns:
             ファイルパスのリスト（bs系 + fs系、または pl系 + pc系の順）
         """
 
-        from sc.fileio import bs_filelist_maker
-        from sc.fileio import pl_filelist_maker
+        from sc.fileio.filing_catalog import FilingCatalog
+        catalog = FilingCatalog.build(str(folder), include_zip=from_zip)
+        return catalog.get_files(statement_type, period_type, consolidation)
 
-        # annual → a、quarterly → q、semiannual → s
-        period_code = {
-            'annual': 'a',
-            'quarterly': 'q',
-            'semiannual': 's'
-        }[period_type]
-
-        # consolidated → c、standalone → n
-        consolidation_code = {
-            'consolidated': 'c',
-            'standalone': 'n'
-        }[consolidation]
-
-        # 組み合わせ例：ac / qc / sn
-        code = f"{period_code}{consolidation_code}"
-
-        if statement_type == 'bs':
-            # bs系ファイルを取得
-            bs_method_name = f"get_{code}bs_list"
-            bs_files = getattr(bs_filelist_maker, bs_method_name)(str(folder))
-
-            # fs系ファイルを取得
-            fs_method_name = f"get_{code}fs_list"
-            fs_files = getattr(bs_filelist_maker, fs_method_name)(str(folder))
-
-            # bs系 + fs系 の順で結合
-            return bs_files + fs_files
-
-        else:  # PL
-            # pl系ファイルを取得
-            pl_method_name = f"get_{code}pl_list"
-            pl_files = getattr(pl_filelist_maker, pl_method_name)(str(folder))
-
-            # pc系ファイルを取得
-            pc_method_name = f"get_{code}pc_list"
-            pc_files = getattr(pl_filelist_maker, pc_method_name)(str(folder))
-
-            # pl系 + pc系 の順で結合
-            return pl_files + pc_files
\ No newline at end of file
+    @staticmethod
+    def build_catalog(folder: Path, from_zip: bool = False):
+        """
+        企業フォルダを1回だけ走査して FilingCatalog を作る。
+        同じフォルダから何度もファイルリストを取る場合はこちらを使う。
+        """
+        from sc.fileio.filing_catalog import FilingCatalog
+        return FilingCatalog.build(str(folder), include_zip=from_zip)
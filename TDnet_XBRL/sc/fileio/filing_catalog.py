@@ -0,0 +1,190 @@
+"""
+企業フォルダ内の iXBRL ファイル一覧（カタログ）を作るモジュール。
+
+これまでは bs_filelist_maker / pl_filelist_maker の get_xxxx_list() が
+種類ごとに glob を実行しており、1社あたり約24回フォルダを走査していた。
+FilingCatalog はフォルダを os.scandir で1回だけ走査し（ZIP 内のメンバーも含む）、
+ファイル名を1つの正規表現で1回だけ解析して (種類, 期間, 連結/単独) ごとに索引化する。
+
+ファイル名の例:
+    0102010-acpl01-tse-acedjpfr-27800-2014-03-31-02-2014-10-10-ixbrl.htm
+    │       │││ │      │   │    │     │          │  └ 公開日
+    │       │││ │      │   │    │     │          └ 提出回
+    │       │││ │      │   │    │     └ 期末日
+    │       │││ │      │   │    └ 証券コード（5桁）
+    │       │││ │      │   └ 会計基準（jpfr: 日本基準 / iffr: IFRS）
+    │       │││ │      └ 報告書の種類
+    │       │││ └ 連番
+    │       ││└ 財務諸表（bs / fs / pl / pc）
+    │       │└ 連結(c) / 単独(n)
+    │       └ 本決算(a) / 四半期(q) / 中間期(s)
+"""
+
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from sc.fileio import zip_reader
+
+FILENAME_PATTERN = re.compile(
+    r'^(?P<sequence>\d+)-'
+    r'(?P<period>[aqs])(?P<consolidation>[cn])(?P<statement>bs|fs|pl|pc)(?P<number>\d*)-'
+    r'(?P<exchange>[a-z]+)-'
+    r'(?P<report>[a-z]*?)(?P<standard>[a-z]{4})-'
+    r'(?P<code>\w+)-'
+    r'(?P<period_end>\d{4}-\d{2}-\d{2})-'
+    r'(?P<revision>\d+)-'
+    r'(?P<public_day>\d{4}-\d{2}-\d{2})-'
+    r'ixbrl\.htm$',
+    re.IGNORECASE,
+)
+
+# annual → a、quarterly → q、semiannual → s
+PERIOD_CODES = {
+    'annual': 'a',
+    'quarterly': 'q',
+    'semiannual': 's',
+}
+
+# consolidated → c、standalone → n
+CONSOLIDATION_CODES = {
+    'consolidated': 'c',
+    'standalone': 'n',
+}
+
+# BS は bs系 + fs系、PL は pl系 + pc系 の順
+STATEMENT_KINDS = {
+    'bs': ('bs', 'fs'),
+    'pl': ('pl', 'pc'),
+}
+
+
+class FilingRecord:
+    """ファイル名から読み取った1ファイル分の情報"""
+
+    __slots__ = ('path', 'file_name', 'code', 'period', 'consolidation',
+                 'statement', 'standard', 'period_end', 'public_day')
+
+    def __init__(self, path: str, file_name: str, code: str, period: str, consolidation: str,
+                 statement: str, standard: str, period_end: str, public_day: str):
+        self.path = path
+        self.file_name = file_name
+        self.code = code
+        self.period = period
+        self.consolidation = consolidation
+        self.statement = statement
+        self.standard = standard
+        self.period_end = period_end
+        self.public_day = public_day
+
+    @classmethod
+    def from_path(cls, path: str) -> Optional["FilingRecord"]:
+        """パス（仮想パス可）から作る。ファイル名が形式に合わなければ None"""
+        file_name = os.path.basename(path)
+        match = FILENAME_PATTERN.match(file_name)
+        if match is None:
+            return None
+        return cls(
+            path=path,
+            file_name=file_name,
+            code=match.group('code')[:4],
+            period=match.group('period').lower(),
+            consolidation=match.group('consolidation').lower(),
+            statement=match.group('statement').lower(),
+            standard=match.group('standard').lower(),
+            period_end=match.group('period_end'),
+            public_day=match.group('public_day'),
+        )
+
+    @property
+    def statement_type(self) -> str:
+        """'bs'（bs / fs）または 'pl'（pl / pc）"""
+        return 'bs' if self.statement in STATEMENT_KINDS['bs'] else 'pl'
+
+    def __repr__(self):
+        return f"FilingRecord({self.file_name!r})"
+
+
+class FilingCatalog:
+    """
+    企業フォルダ内の iXBRL ファイルを (財務諸表の種類, 期間, 連結/単独) で引けるようにしたもの。
+    """
+
+    def __init__(self, records: List[FilingRecord]):
+        self.records = records
+        self._index: Dict[Tuple[str, str, str], List[FilingRecord]] = {}
+        for record in records:
+            key = (record.statement, record.period, record.consolidation)
+            self._index.setdefault(key, []).append(record)
+
+    @classmethod
+    def build(cls, folder_path: str, include_zip: bool = False) -> "FilingCatalog":
+        """
+        フォルダを1回だけ走査してカタログを作る。
+
+        Args:
+            folder_path: 企業フォルダ
+            include_zip: True なら ZIP 内のメンバー（仮想パス）も含める。
+                         解凍済みのファイルと同名のメンバーは除く
+        """
+        records = []
+        seen = set()
+        zip_paths = []
+
+        if os.path.isdir(folder_path):
+            with os.scandir(folder_path) as entries:
+                for entry in sorted(entries, key=lambda e: e.name):
+                    if not entry.is_file():
+                        continue
+                    if entry.name.lower().endswith('.zip'):
+                        zip_paths.append(entry.path)
+                        continue
+                    record = FilingRecord.from_path(entry.path)
+                    if record is not None:
+                        records.append(record)
+                        seen.add(record.file_name)
+
+        if include_zip:
+            for zip_path in zip_paths:
+                for member in zip_reader.list_statement_members(zip_path):
+                    record = FilingRecord.from_path(zip_reader.make_member_path(zip_path, member))
+                    if record is not None and record.file_name not in seen:
+                        records.append(record)
+                        seen.add(record.file_name)
+
+        return cls(records)
+
+    def get_records(self, statement_type: str, period_type: str, consolidation: str) -> List[FilingRecord]:
+        """
+        Args:
+            statement_type: 'bs' or 'pl'
+            period_type: 'annual' / 'quarterly' / 'semiannual'
+            consolidation: 'consolidated' or 'standalone'
+
+        Returns:
+            bs系 + fs系（または pl系 + pc系）の順のレコード
+        """
+        period_code = PERIOD_CODES[period_type]
+        consolidation_code = CONSOLIDATION_CODES[consolidation]
+        records = []
+        for statement in STATEMENT_KINDS[statement_type]:
+            records.extend(self._index.get((statement, period_code, consolidation_code), ()))
+        return records
+
+    def get_files(self, statement_type: str, period_type: str, consolidation: str) -> List[str]:
+        """get_records() のパスだけのリスト"""
+        return [record.path for record in self.get_records(statement_type, period_type, consolidation)]
+
+    def __len__(self):
+        return len(self.records)
+
+
+if __name__ == "__main__":
+    folder_path = r"E:\Zip_files\2780"
+    catalog = FilingCatalog.build(folder_path, include_zip=True)
+    print(f'{len(catalog)}件')
+    for statement_type in STATEMENT_KINDS:
+        for period_type in PERIOD_CODES:
+            for consolidation in CONSOLIDATION_CODES:
+                files = catalog.get_files(statement_type, period_type, consolidation)
+                print(f'{statement_type} {period_type} {consolidation}: {len(files)}件')
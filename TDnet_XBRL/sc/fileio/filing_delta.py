@@ -0,0 +1,70 @@
+"""
+差分ダウンロード: DB に登録済みの開示より新しいものだけをダウンロードするための判定。
+
+以前は毎回、企業の全期間の Zip をダウンロードしていた。DeltaFilter は
+
+- since: その企業の BS / PL で最も新しい PublicDay（DBWriter.latest_public_day()）
+- known_names: 企業フォルダに既にある Zip のファイル名
+
+を持ち、開示一覧の各行（Zip のファイル名と開示日）について
+「既にある Zip ではなく、開示日が since 以降（または開示日が読めない）」ものだけをダウンロード対象にする。
+since と同じ日の開示は、同じ日に複数の開示がありうるので対象に含める
+（登録済みのファイルは解析前に DBWriter.is_known() で除かれる）。
+
+    delta = DeltaFilter(since='2024-08-09', known_names={'081220241011543262.zip'})
+    delta.wants('140120241108570066.zip', '2024-11-08')   # True
+"""
+
+import os
+import re
+from typing import Iterable, Optional
+
+# 開示一覧の日付（2024/08/09 / 2024-08-09 / 2024年8月9日）
+_DATE_PATTERN = re.compile(r'(\d{4})\s*[/\-年]\s*(\d{1,2})\s*[/\-月]\s*(\d{1,2})')
+
+
+def parse_listing_date(text: str) -> Optional[str]:
+    """開示一覧の1行のテキストから最初の日付を 'YYYY-MM-DD' で返す（なければ None）"""
+    match = _DATE_PATTERN.search(text or '')
+    if not match:
+        return None
+    year, month, day = match.groups()
+    return f'{year}-{int(month):02d}-{int(day):02d}'
+
+
+class DeltaFilter:
+    """
+    ダウンロードする開示を選ぶ条件。
+
+    Args:
+        since: この日（'YYYY-MM-DD'）以降の開示だけをダウンロードする。None なら全て
+        known_names: ダウンロード済みの Zip のファイル名
+    """
+
+    def __init__(self, since: Optional[str] = None, known_names: Iterable[str] = ()):
+        self.since = since
+        self.known_names = set(known_names)
+        self.skipped = 0
+
+    @classmethod
+    def for_company(cls, since: Optional[str], company_folder) -> 'DeltaFilter':
+        """企業フォルダにある Zip をダウンロード済みとして扱う"""
+        folder = str(company_folder)
+        names = []
+        if os.path.isdir(folder):
+            names = [name for name in os.listdir(folder) if name.lower().endswith('.zip')]
+        return cls(since=since, known_names=names)
+
+    def is_older(self, public_day: Optional[str]) -> bool:
+        """since より前の開示なら True（開示日が読めなければ False）"""
+        return bool(self.since and public_day and public_day < self.since)
+
+    def wants(self, name: str, public_day: Optional[str]) -> bool:
+        """ダウンロードするなら True（しないものは skipped に数える）"""
+        if name in self.known_names or self.is_older(public_day):
+            self.skipped += 1
+            return False
+        return True
+
+    def describe(self) -> str:
+        return f"{self.since or '全期間'} 以降（ダウンロード済み {len(self.known_names)}件を除く）"
@@ -0,0 +1,293 @@
+"""
+HttpFetcher をネットワークなしで動かすためのローカル HTTP サーバー。
+
+記録しておいた開示一覧のページと Zip をフォルダから返す（Range リクエストにも対応）。
+
+    root/
+      listing/<企業コード>.html     開示一覧のページ（Zip へのリンクはルートからのパス）
+      disc/.../<ファイル名>.zip     Zip（ページのリンクと同じパスに置く）
+
+    with FixtureServer(root) as server:
+        fetcher = HttpFetcher(listing_url=server.listing_url, rate=0)
+        zip_download('2780', download_dir=..., fetcher=fetcher)
+
+latency / error_rate を指定すると、応答を遅らせたり一定の割合で 503（error_status）を返したりして、
+混雑したサイトを再現できる（rate_limiter の AIMD・やり直しの確認用）。
+
+    with FixtureServer(root, latency=(0.05, 0.3), error_rate=0.2, error_status=429) as server:
+        ...
+
+record() で本物のサイトから記録できる（リンクはルートからのパスに書き換えて保存する）。
+Zip しか手元にない場合は write_listing() で一覧のページを作れる。
+
+    python -m sc.fileio.fixture_server <root> [port]    # 記録したフォルダを配信する
+"""
+
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+from sc.fileio import zip_reader
+
+LISTING_DIR = 'listing'
+
+
+class _FixtureHandler(SimpleHTTPRequestHandler):
+    """
+    静的ファイルを返す。Range: bytes=N- / bytes=N-M なら 206 で一部だけ返す。
+    fixture（FixtureServer）の設定に従って、応答の前に待ったりエラーを返したりする。
+    """
+
+    fixture: 'FixtureServer' = None
+
+    def send_head(self):
+        if self.fixture is not None and self.fixture._inject(self):
+            return None
+
+        range_header = self.headers.get('Range')
+        if not range_header:
+            return super().send_head()
+
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return None
+
+        size = os.path.getsize(path)
+        try:
+            first, last = range_header.replace('bytes=', '').split('-', 1)
+            first = int(first)
+            last = int(last) if last else size - 1
+        except ValueError:
+            return super().send_head()
+
+        if first >= size:
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header('Content-Range', f'bytes */{size}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+
+        last = min(last, size - 1)
+        f = open(path, 'rb')
+        f.seek(first)
+        self.send_response(HTTPStatus.PARTIAL_CONTENT)
+        self.send_header('Content-Type', self.guess_type(path))
+        self.send_header('Content-Range', f'bytes {first}-{last}/{size}')
+        self.send_header('Content-Length', str(last - first + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        return _LimitedReader(f, last - first + 1)
+
+    def log_message(self, format, *args):
+        # テストの出力を埋めないようにアクセスログは出さない
+        pass
+
+
+class _LimitedReader:
+    """copyfile() に渡すファイルのうち、先頭から length バイトだけを読ませる"""
+
+    def __init__(self, f, length: int):
+        self._f = f
+        self._remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b''
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._f.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._f.close()
+
+
+class FixtureServer:
+    """
+    root のファイルを返すローカル HTTP サーバー（別スレッドで動く）。
+
+    Args:
+        root: 記録したページと Zip のフォルダ
+        host / port: 待ち受けるアドレス（port=0 なら空いているポート）
+        latency: 応答の前に待つ秒数（(最小, 最大) ならその間でランダム）
+        error_rate: error_status を返す割合（0〜1）
+        error_status: 返すエラーの HTTP ステータス（429 なら Retry-After も付ける）
+        seed: エラー・待ち時間の乱数の種（同じ結果を再現したいとき）
+    """
+
+    def __init__(self, root, host: str = '127.0.0.1', port: int = 0,
+                 latency: Union[float, Tuple[float, float]] = 0.0,
+                 error_rate: float = 0.0, error_status: int = 503, seed: Optional[int] = None):
+        self.root = str(root)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        root_dir = self.root
+        fixture = self
+
+        class Handler(_FixtureHandler):
+            def __init__(self, *args, **kwargs):
+                self.fixture = fixture
+                super().__init__(*args, directory=root_dir, **kwargs)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def listing_url(self) -> str:
+        """HttpFetcher の listing_url に渡す URL"""
+        return f'{self.url}/{LISTING_DIR}/{{code}}.html'
+
+    def _inject(self, handler) -> bool:
+        """待ち時間を入れ、エラーを返したら True（リクエスト数・エラー数を数える）"""
+        with self._lock:
+            self.requests += 1
+            if isinstance(self.latency, (tuple, list)):
+                delay = self._random.uniform(*self.latency)
+            else:
+                delay = self.latency
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if delay > 0:
+            time.sleep(delay)
+        if not fail:
+            return False
+        handler.send_response(self.error_status)
+        if self.error_status == HTTPStatus.TOO_MANY_REQUESTS:
+            handler.send_header('Retry-After', '1')
+        handler.send_header('Content-Length', '0')
+        handler.end_headers()
+        return True
+
+    def serve_forever(self):
+        """このスレッドで配信する（Ctrl+C で止める）"""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def start(self) -> 'FixtureServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+# ===========================================================================
+# 記録
+# ===========================================================================
+
+def _zip_public_day(zip_path: str) -> str:
+    """Zip 内の iXBRL のファイル名から公開日を読む（読めなければ空文字）"""
+    from sc.fileio.filing_catalog import FILENAME_PATTERN
+
+    days = []
+    for member in zip_reader.list_statement_members(zip_path):
+        match = FILENAME_PATTERN.match(os.path.basename(member))
+        if match:
+            days.append(match.group('public_day'))
+    return max(days, default='')
+
+
+def write_listing(root, code, zip_paths: Iterable[str]) -> List[str]:
+    """
+    手元の Zip から開示一覧のページを作り、Zip を root/disc/<企業コード>/ にコピーする。
+    各行の開示日は Zip 内の iXBRL のファイル名の公開日にする（新しい順に並べる）。
+    作ったページのリンク（ルートからのパス）を返す。
+    """
+    root = Path(root)
+    disc_dir = root / 'disc' / str(code)
+    disc_dir.mkdir(parents=True, exist_ok=True)
+    (root / LISTING_DIR).mkdir(parents=True, exist_ok=True)
+
+    entries = []
+    for zip_path in zip_paths:
+        name = os.path.basename(zip_path)
+        shutil.copyfile(zip_path, disc_dir / name)
+        entries.append((_zip_public_day(zip_path).replace('-', '/'), f'/disc/{code}/{name}'))
+    entries.sort(reverse=True)
+    links = [link for _, link in entries]
+
+    rows = '\n'.join(f'<tr><td>{day}</td><td><a href="{link}"><img src="/images/xbrl.gif" alt="XBRL"></a></td></tr>'
+                     for day, link in entries)
+    html = f'<html><body><table>\n{rows}\n</table></body></html>\n'
+    (root / LISTING_DIR / f'{code}.html').write_text(html, encoding='utf-8')
+    return links
+
+
+def record(root, code, fetcher) -> int:
+    """
+    fetcher（HttpFetcher）で本物の開示一覧と Zip を取得して root に保存する。
+    ページ中の Zip へのリンクはルートからのパスに書き換える。保存した Zip の数を返す。
+    """
+    from bs4 import BeautifulSoup
+    from sc.fileio.http_fetcher import extract_zip_urls
+
+    root = Path(root)
+    url = fetcher.listing_url.format(code=code)
+    response = fetcher.session.get(url, timeout=fetcher.timeout)
+    response.raise_for_status()
+
+    zip_urls = extract_zip_urls(response.text, response.url)
+    for zip_url in zip_urls:
+        folder = root / os.path.dirname(urlparse(zip_url).path).lstrip('/')
+        folder.mkdir(parents=True, exist_ok=True)
+        fetcher.download_file(zip_url, folder)
+
+    # XBRL の画像のリンクを、記録した Zip のルートからのパスにする
+    soup = BeautifulSoup(response.text, 'html.parser')
+    for img in soup.find_all('img', alt='XBRL'):
+        found = extract_zip_urls(str(img.find_parent('a') or img), response.url)
+        if found:
+            link = img.find_parent('a')
+            if link is None:
+                link = img.wrap(soup.new_tag('a'))
+            link['href'] = urlparse(found[0]).path
+            link.attrs.pop('onclick', None)
+            img.attrs.pop('onclick', None)
+
+    (root / LISTING_DIR).mkdir(parents=True, exist_ok=True)
+    (root / LISTING_DIR / f'{code}.html').write_text(str(soup), encoding='utf-8')
+    print(f"{code}: 開示一覧と Zip {len(zip_urls)}件を {root} に記録しました")
+    return len(zip_urls)
+
+
+if __name__ == '__main__':
+    server = FixtureServer(sys.argv[1], port=int(sys.argv[2]) if len(sys.argv) > 2 else 8765)
+    print(f"{server.root} を {server.url} で配信します（listing_url: {server.listing_url}）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,331 @@
+"""
+Selenium を使わずに HTTP だけで XBRL の Zip をダウンロードするモジュール（zipfile_downloader の代わり）。
+
+zipfile_downloader はブラウザで XBRL のアイコンを1つずつクリックするため、ダウンロードが1件ずつしか進まない。
+HttpFetcher は
+
+- 開示一覧のページ（HTML）から XBRL の Zip の URL を取り出し（extract_zip_urls）
+- 接続を使い回す requests.Session で、最大 max_workers 件を同時にダウンロードする
+- 途中で切れたファイル（.part）は Range ヘッダーで続きから取得する
+- 同じホストへのリクエストの速さと同時数は rate_limiter.HostLimiter で調整する
+  （トークンバケットで毎秒 rate 回まで。429 / 5xx / タイムアウトで同時数を半分にし、ばらつかせた間隔でやり直す）
+- 実際に出た速さ（件/秒、MB/秒）を ThroughputMeter で計る
+- delta（filing_delta.DeltaFilter）を渡すと、一覧の開示日を見て新しい開示だけをダウンロードする
+
+    fetcher = HttpFetcher(max_workers=4)
+    zip_download('7003', download_dir='/path/to/staging/7003', fetcher=fetcher)
+
+開示一覧の URL は listing_url（'{code}' を企業コードに置き換える）で指定する。
+テストでは fixture_server.FixtureServer（記録したページと Zip を返すローカルのサーバー）の URL を渡せば、
+ネットワークなしで全体を動かせる。
+"""
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+from urllib.parse import urljoin, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from sc.fileio import filing_delta, rate_limiter, zip_reader
+
+# 開示一覧のページ（'{code}' を企業コードに置き換える）
+LISTING_URL = "https://www2.jpx.co.jp/tseHpFront/JJK010030Action.do?Show=Show&eqMgrCd={code}"
+
+USER_AGENT = "Mozilla/5.0 (compatible; TDnet_XBRL)"
+
+# onclick などに書かれた Zip の URL
+_ZIP_URL_PATTERN = re.compile(r"""['"]([^'"]+?\.zip)['"]""", re.IGNORECASE)
+
+# ダウンロード途中のファイルの拡張子
+PARTIAL_SUFFIX = '.part'
+
+CHUNK_SIZE = 256 * 1024
+
+
+class Filing(NamedTuple):
+    """開示一覧の1行（XBRL の Zip）"""
+    url: str
+    name: str                   # Zip のファイル名
+    public_day: Optional[str]   # 開示日（'YYYY-MM-DD'、読めなければ None）
+
+
+def extract_filings(html: str, base_url: str) -> List[Filing]:
+    """
+    開示一覧の HTML から XBRL の Zip を取り出す（ページ内の順番、重複なし）。
+    alt="XBRL" の画像を囲むリンクの href、または画像・リンクの onclick に書かれた .zip の URL を使い、
+    開示日は画像と同じ行（tr）の日付を使う。
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    filings = []
+    seen = set()
+    for img in soup.find_all('img', alt='XBRL'):
+        candidates = []
+        link = img.find_parent('a')
+        if link is not None:
+            candidates.append(link.get('href') or '')
+            candidates.append(link.get('onclick') or '')
+        candidates.append(img.get('onclick') or '')
+
+        for candidate in candidates:
+            if candidate.lower().endswith('.zip') and not candidate.lower().startswith('javascript:'):
+                url = candidate
+            else:
+                match = _ZIP_URL_PATTERN.search(candidate)
+                if not match:
+                    continue
+                url = match.group(1)
+            url = urljoin(base_url, url)
+            if url not in seen:
+                seen.add(url)
+                row = img.find_parent('tr')
+                public_day = filing_delta.parse_listing_date(row.get_text(' ')) if row is not None else None
+                filings.append(Filing(url, os.path.basename(urlparse(url).path), public_day))
+            break
+    return filings
+
+
+def extract_zip_urls(html: str, base_url: str) -> List[str]:
+    """開示一覧の HTML から XBRL の Zip の URL を取り出す（ページ内の順番、重複なし）"""
+    return [filing.url for filing in extract_filings(html, base_url)]
+
+
+class HttpFetcher:
+    """
+    開示一覧と Zip を HTTP で取得するクラス。
+
+    Args:
+        max_workers: 同時にダウンロードするファイル数の上限（全企業で共有。実際の同時数は AIMD で調整）
+        rate: 同じホストへの1秒あたりのリクエスト数
+        burst: 同じホストへまとめて送ってよいリクエスト数
+        timeout: 1回のリクエストのタイムアウト（秒）
+        retries: 1回のリクエストを試す回数（Zip の2回目以降は続きから取得する）
+        listing_url: 開示一覧の URL（'{code}' を企業コードに置き換える）
+        limiter: 速さと同時数の調整（None なら rate / burst / max_workers から作る）
+    """
+
+    def __init__(self, max_workers: int = 4, rate: float = 2.0, burst: int = 4, timeout: float = 30,
+                 retries: int = 4, listing_url: str = LISTING_URL,
+                 limiter: Optional[rate_limiter.HostLimiter] = None):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.retries = max(1, retries)
+        self.listing_url = listing_url
+        self.limiter = limiter or rate_limiter.HostLimiter(rate=rate, burst=burst, max_concurrency=self.max_workers)
+        self.meter = rate_limiter.ThroughputMeter()
+
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        # やり直しは urllib3 に任せず _request() で行う（制限がかかったことを limiter に伝えるため）
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='http-fetch')
+
+    # ===========================================================================
+    # 開示一覧
+    # ===========================================================================
+
+    def list_filings(self, code) -> List[Filing]:
+        """企業コードの開示一覧から XBRL の Zip（URL・ファイル名・開示日）を取り出す"""
+        url = self.listing_url.format(code=code)
+
+        def fetch():
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            return response
+
+        response = self._request(url, fetch)
+        return extract_filings(response.text, response.url)
+
+    def list_zip_urls(self, code) -> List[str]:
+        """企業コードの開示一覧から XBRL の Zip の URL を取り出す"""
+        return [filing.url for filing in self.list_filings(code)]
+
+    # ===========================================================================
+    # ダウンロード
+    # ===========================================================================
+
+    def download(self, code, download_dir, delta: Optional[filing_delta.DeltaFilter] = None) -> List[str]:
+        """
+        企業コードの XBRL の Zip を download_dir にダウンロードし、保存したパスを返す。
+        delta を渡すと、その条件に合う（新しい）開示だけをダウンロードする。
+        """
+        filings = self.list_filings(code)
+        if not filings:
+            print("XBRLファイルが見つかりませんでした")
+            return []
+        if delta is not None:
+            filings = [filing for filing in filings if delta.wants(filing.name, filing.public_day)]
+            print(f'差分ダウンロード: {delta.describe()} → {len(filings)}件（{delta.skipped}件はスキップ）')
+        urls = [filing.url for filing in filings]
+        if not urls:
+            return []
+        print(f'ダウンロード総数：{len(urls)}件')
+
+        os.makedirs(download_dir, exist_ok=True)
+        futures = [self._executor.submit(self.download_file, url, download_dir) for url in urls]
+
+        files = []
+        failed_downloads = 0
+        for url, future in zip(urls, futures):
+            try:
+                files.append(future.result())
+            except Exception as e:
+                print(f"ダウンロードでエラー: {url}: {e}")
+                failed_downloads += 1
+
+        print(f"完了: 成功 {len(files)}件, 失敗 {failed_downloads}件")
+        return files
+
+    def download_file(self, url: str, download_dir) -> str:
+        """
+        1ファイルをダウンロードして保存先のパスを返す。
+        <ファイル名>.part に書き込み、CRC を確認してから名前を変える。
+        .part が残っていれば続きから取得する（サーバーが Range に対応していなければ最初から）。
+        """
+        path = os.path.join(str(download_dir), os.path.basename(urlparse(url).path))
+        if os.path.exists(path) and zip_reader.is_valid_zip(path):
+            return path
+        partial = path + PARTIAL_SUFFIX
+
+        def fetch():
+            self._fetch_to(url, partial)
+            if not zip_reader.is_valid_zip(partial):
+                # 続きから取得したものが壊れていたら、次は最初から取得する
+                os.remove(partial)
+                raise IOError('Zip の CRC が一致しません')
+            os.replace(partial, path)
+            return path
+
+        self._request(url, fetch)
+        self.meter.add(files=1)
+        return path
+
+    def _request(self, url: str, func):
+        """
+        limiter の枠とトークンを取って func() を実行し、失敗したらばらつかせた間隔をあけてやり直す。
+        429 / 5xx / タイムアウト / 接続エラーは制限がかかったとみなして同時数を減らす。
+        それ以外の HTTP エラー（404 など）はやり直さない。
+        """
+        for attempt in range(self.retries):
+            try:
+                with self.limiter.request(url):
+                    result = func()
+                self.limiter.success(url)
+                return result
+            except (requests.RequestException, IOError) as e:
+                if not _is_retryable(e) or attempt + 1 >= self.retries:
+                    raise
+                if _is_throttle(e):
+                    self.limiter.throttled(url)
+                delay = rate_limiter.jittered_backoff(attempt)
+                print(f"警告: {os.path.basename(urlparse(url).path)} の取得に失敗しました"
+                      f"（{attempt + 1}/{self.retries}、{delay:.1f}秒後にやり直し）: {e}")
+                time.sleep(delay)
+
+    def _fetch_to(self, url: str, partial: str):
+        offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416:
+                # 既に最後まで取得済み
+                return
+            response.raise_for_status()
+            # 206 なら続きを追記、200 ならサーバーが Range に対応していないので最初から
+            mode = 'ab' if response.status_code == 206 else 'wb'
+            with open(partial, mode) as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    self.meter.add(nbytes=len(chunk))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+        print(f"[INFO] HTTP ダウンロード: {self.meter.format()} / {self.limiter.describe()}")
+
+
+def _is_throttle(error: Exception) -> bool:
+    """サイト側で制限がかかったとみなすエラー（429 / 5xx / タイムアウト / 接続エラー）"""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in rate_limiter.THROTTLE_STATUSES
+    return isinstance(error, (requests.Timeout, requests.ConnectionError))
+
+
+def _is_retryable(error: Exception) -> bool:
+    """やり直す価値のあるエラー（制限、途中で切れた転送、壊れた Zip）"""
+    if isinstance(error, requests.HTTPError):
+        return _is_throttle(error)
+    return True
+
+
+# ===========================================================================
+# 共有インスタンス
+# ===========================================================================
+
+_fetcher: Optional[HttpFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher(**kwargs) -> HttpFetcher:
+    """プロセスで1つの HttpFetcher を返す（最初に呼んだときの引数で作る）"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = HttpFetcher(**kwargs)
+        return _fetcher
+
+
+def close_fetcher():
+    """共有の HttpFetcher を閉じる（全処理の最後に呼ぶ）"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is not None:
+            _fetcher.close()
+            _fetcher = None
+
+
+def zip_download(code, download_dir=None, fetcher: Optional[HttpFetcher] = None,
+                 delta: Optional[filing_delta.DeltaFilter] = None) -> int:
+    """
+    zipfile_downloader.zip_download() と同じく、企業コードの XBRL の Zip を download_dir に置く。
+
+    Args:
+        code: 企業コード
+        download_dir: ダウンロード先フォルダ。None なら ~/Downloads
+        fetcher: 使う HttpFetcher。None なら共有のもの（get_fetcher()）
+        delta: 差分ダウンロードの条件（None なら全てダウンロード）
+
+    Returns:
+        ダウンロードできた Zip の数
+    """
+    print(f"★{code}のzipダウンロードを実行（HTTP）")
+    start = time.perf_counter()
+
+    download_dir = str(download_dir or Path.home() / 'Downloads')
+    fetcher = fetcher or get_fetcher()
+
+    try:
+        files = fetcher.download(code, download_dir, delta=delta)
+    except Exception as e:
+        print(f"予期しないエラーが発生しました: {str(e)}")
+        return 0
+
+    rate = rate_limiter.format_rate(len(files), rate_limiter.total_size(files), time.perf_counter() - start)
+    print(f"{code}: Zip {len(files)}件をダウンロードしました（{rate}）")
+    return len(files)
+
+
+if __name__ == '__main__':
+    try:
+        zip_download(7003)
+    finally:
+        close_fetcher()
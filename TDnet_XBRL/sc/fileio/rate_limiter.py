@@ -0,0 +1,255 @@
+"""
+ダウンロード（JPX のサイト）へのリクエストの速さと同時数を調整する部品。
+
+並列にダウンロードすると、速すぎればサイト側で制限（429 / 5xx / タイムアウト）がかかる。
+
+- TokenBucket: 1秒あたり rate 回、まとめて burst 回までのリクエストを許す
+- AIMDLimiter: 同時に実行するリクエスト数。成功が続けば1つずつ増やし（加算）、
+  制限がかかったら半分にする（乗算）。TCP の輻輳制御と同じ考え方
+- jittered_backoff(): やり直すまでの待ち時間（指数的に伸ばし、ランダムにばらつかせる）
+- ThroughputMeter: 実際に出た速さ（ファイル数/秒、バイト数/秒）
+- HostLimiter: 上の TokenBucket と AIMDLimiter をホストごとに持ち、まとめて使う
+
+    limiter = HostLimiter(rate=2.0, burst=4, max_concurrency=4)
+    with limiter.request(url):          # 同時数の枠とトークンを取ってから実行する
+        response = session.get(url)
+    if response.status_code in THROTTLE_STATUSES:
+        limiter.throttled(url)          # 同時数を減らす
+        time.sleep(jittered_backoff(attempt))
+    else:
+        limiter.success(url)            # 同時数を少しずつ増やす
+"""
+
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+# サイト側で制限がかかったとみなす HTTP ステータス
+THROTTLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """
+    トークンバケット。1秒に rate 個ずつトークンが溜まり（最大 capacity 個）、
+    acquire() はトークンが取れるまで待つ（複数スレッドから使える）。
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AIMDLimiter:
+    """
+    同時実行数の上限を AIMD（Additive Increase / Multiplicative Decrease）で調整する。
+
+    - on_success(): 現在の上限と同じ回数だけ成功したら上限を1増やす（1往復ごとに +1）
+    - on_throttle(): 上限を backoff 倍にする。続けて失敗しても cooldown 秒に1回しか減らさない
+      （同時に実行していたリクエストがまとめて失敗しても、一度に最小まで落ちないように）
+
+    Args:
+        initial: 最初の上限
+        minimum / maximum: 上限の範囲
+        backoff: 制限がかかったときに掛ける値
+        cooldown: 続けて減らさない秒数
+    """
+
+    def __init__(self, initial: int = 2, minimum: int = 1, maximum: int = 8,
+                 backoff: float = 0.5, cooldown: float = 1.0):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self._limit = min(max(initial, self.minimum), self.maximum)
+        self._in_flight = 0
+        self._successes = 0
+        self._last_decrease = float('-inf')
+        self._condition = threading.Condition()
+
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self):
+        """実行中の数が上限未満になるまで待ってから枠を1つ取る"""
+        with self._condition:
+            while self._in_flight >= self._limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def on_success(self):
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self._limit and self._limit < self.maximum:
+                self._successes = 0
+                self._limit += 1
+                self.increases += 1
+                self._condition.notify_all()
+
+    def on_throttle(self):
+        with self._condition:
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self._successes = 0
+            new_limit = max(self.minimum, int(self._limit * self.backoff))
+            if new_limit < self._limit:
+                self._limit = new_limit
+                self.decreases += 1
+
+
+def jittered_backoff(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """
+    attempt 回目（0 始まり）のやり直しまでの待ち時間（秒）。
+    base * 2^attempt を上限に 0 からランダムに選ぶ（Full Jitter。複数スレッドのやり直しが重ならない）。
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class ThroughputMeter:
+    """ダウンロードしたファイル数・バイト数から実際の速さを計る（複数スレッドから使える）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self.files = 0
+        self.bytes = 0
+
+    def add(self, files: int = 0, nbytes: int = 0):
+        with self._lock:
+            self.files += files
+            self.bytes += nbytes
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = max(time.monotonic() - self._start, 1e-9)
+            return {
+                'elapsed': elapsed,
+                'files': self.files,
+                'bytes': self.bytes,
+                'files_per_sec': self.files / elapsed,
+                'bytes_per_sec': self.bytes / elapsed,
+            }
+
+    def format(self) -> str:
+        s = self.snapshot()
+        return f"{s['files']}件 / {s['bytes'] / 1e6:.1f}MB（{format_rate(s['files'], s['bytes'], s['elapsed'])}）"
+
+
+def format_rate(files: int, nbytes: int, elapsed: float) -> str:
+    """'12.3秒、0.81件/秒、1.25MB/秒' の形にする"""
+    elapsed = max(elapsed, 1e-9)
+    return f"{elapsed:.1f}秒、{files / elapsed:.2f}件/秒、{nbytes / elapsed / 1e6:.2f}MB/秒"
+
+
+def total_size(paths) -> int:
+    """ファイルの合計サイズ（なくなったファイルは数えない）"""
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+
+class HostLimiter:
+    """
+    ホストごとの TokenBucket と AIMDLimiter をまとめたもの（ダウンローダーで共有する）。
+
+    Args:
+        rate: ホストごとの1秒あたりのリクエスト数（0 以下なら制限しない）
+        burst: まとめて送ってよいリクエスト数
+        max_concurrency: ホストごとの同時実行数の上限（AIMD で 1〜この値の間を動く）
+        initial_concurrency: 最初の同時実行数（None なら max_concurrency の半分）
+    """
+
+    def __init__(self, rate: float = 2.0, burst: int = 4, max_concurrency: int = 4,
+                 initial_concurrency: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max(1, max_concurrency)
+        self.initial_concurrency = initial_concurrency or max(1, self.max_concurrency // 2)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._limiters: Dict[str, AIMDLimiter] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlparse(url).netloc or url
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = self._host(url)
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._buckets[host]
+
+    def limiter(self, url: str) -> AIMDLimiter:
+        host = self._host(url)
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = AIMDLimiter(initial=self.initial_concurrency, maximum=self.max_concurrency)
+            return self._limiters[host]
+
+    def wait(self, url: str):
+        """トークンだけ取る（同時実行数は数えない）"""
+        self.bucket(url).acquire()
+
+    @contextmanager
+    def request(self, url: str):
+        """同時実行の枠とトークンを取ってから実行する"""
+        with self.limiter(url).slot():
+            self.bucket(url).acquire()
+            yield
+
+    def concurrency(self, url: str) -> int:
+        return self.limiter(url).limit
+
+    def success(self, url: str):
+        self.limiter(url).on_success()
+
+    def throttled(self, url: str):
+        self.limiter(url).on_throttle()
+
+    def describe(self) -> str:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return ', '.join(f'{host}: 同時 {l.limit}（増 {l.increases}回 / 減 {l.decreases}回）'
+                         for host, l in limiters.items()) or '-'
@@ -0,0 +1,183 @@
+"""
+ZIP ファイルを解凍せずに、中の BS/PL の iXBRL ファイルを直接読むモジュール。
+
+ZipFile.infolist() を1回走査し、ファイル名が
+    <数字>-<a|q|s><c|n><bs|fs|pl|pc>NN-...-ixbrl.htm
+のメンバーだけを取り出す（XBRLData/Attachment 以下のもの）。
+
+ZIP 内のファイルは「ZIPファイルのパス + '!' + メンバー名」という仮想パスで表す。
+    例: E:\\Zip_files\\2780\\081220241011543262.zip!XBRLData/Attachment/0102010-acpl01-...-ixbrl.htm
+メンバー名の区切りは常に '/' に揃えるので、os.path.basename() / Path().name はメンバーのファイル名を返し、
+ファイル名を見て判定している既存の処理（BS/PL 判定・ファイル名パーサー等）はそのまま使える。
+"""
+
+import os
+import re
+import threading
+import zipfile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# ZIPファイルのパスとメンバー名の区切り
+MEMBER_SEPARATOR = '!'
+
+# BS/PL 系の iXBRL ファイル名（例: 0102010-acpl01-tse-acedjpfr-27800-2014-03-31-02-2014-10-10-ixbrl.htm）
+STATEMENT_MEMBER_PATTERN = re.compile(r'^\d+-[aqs][cn](?:bs|fs|pl|pc)\d*-.*ixbrl\.htm$', re.IGNORECASE)
+
+# ZIP ごとのメンバー一覧のキャッシュ（パス → ((更新日時, サイズ), メンバー名リスト)）
+_member_cache: Dict[str, Tuple[tuple, List[str]]] = {}
+_member_cache_lock = threading.Lock()
+
+
+# ===========================================================================
+# 仮想パス
+# ===========================================================================
+
+def make_member_path(zip_path: str, member: str) -> str:
+    """ZIPファイルのパスとメンバー名から仮想パスを作る"""
+    return f'{zip_path}{MEMBER_SEPARATOR}{member}'
+
+
+def split_member_path(path: str) -> Optional[Tuple[str, str]]:
+    """
+    仮想パスを (ZIPファイルのパス, メンバー名) に分解する。
+    仮想パスでなければ None を返す。
+    """
+    path = str(path)
+    zip_path, separator, member = path.rpartition(MEMBER_SEPARATOR)
+    if not separator or not zip_path.lower().endswith('.zip'):
+        return None
+    return zip_path, member
+
+
+def is_member_path(path: str) -> bool:
+    return split_member_path(path) is not None
+
+
+# ===========================================================================
+# 読み込み
+# ===========================================================================
+
+def _get_info(zip_ref: zipfile.ZipFile, member: str) -> zipfile.ZipInfo:
+    """メンバー名（'/' 区切り）から ZipInfo を探す。'\\' 区切りで格納された ZIP にも対応"""
+    try:
+        return zip_ref.getinfo(member)
+    except KeyError:
+        return zip_ref.getinfo(member.replace('/', '\\'))
+
+
+def open_member(path: str):
+    """
+    仮想パスのメンバーをバイナリのファイルオブジェクトとして開く（ディスクには書き出さない）。
+    返したオブジェクトを閉じるまで ZIP ファイルは開いたままになる。
+    """
+    zip_path, member = split_member_path(path)
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        return zip_ref.open(_get_info(zip_ref, member))
+
+
+def read_member(path: str) -> bytes:
+    """仮想パスのメンバーの内容をバイト列で返す"""
+    zip_path, member = split_member_path(path)
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        return zip_ref.read(_get_info(zip_ref, member))
+
+
+def member_signature(path: str) -> tuple:
+    """
+    仮想パスの内容が変わったかどうかの判定に使う値を返す。
+    ZIP ファイル自体の更新日時・サイズとメンバー名の組。
+    """
+    zip_path, member = split_member_path(path)
+    stat = os.stat(zip_path)
+    return stat.st_mtime_ns, stat.st_size, member
+
+
+# ===========================================================================
+# メンバー一覧
+# ===========================================================================
+
+def list_statement_members(zip_path: str) -> List[str]:
+    """
+    ZIP 内の BS/PL 系 iXBRL ファイルのメンバー名を返す（infolist() を1回だけ走査）。
+    ZIP の作成環境によって区切りが '\\' の場合もあるため、メンバー名は '/' 区切りに揃えて返す。
+    """
+    stat = os.stat(zip_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _member_cache_lock:
+        cached = _member_cache.get(zip_path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+    members = []
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            for info in zip_ref.infolist():
+                if info.is_dir():
+                    continue
+                member = info.filename.replace('\\', '/')
+                if STATEMENT_MEMBER_PATTERN.match(member.rsplit('/', 1)[-1]):
+                    members.append(member)
+    except zipfile.BadZipFile as e:
+        print(f"警告: ZIPファイルを読めませんでした - {zip_path}: {e}")
+
+    with _member_cache_lock:
+        _member_cache[zip_path] = (signature, members)
+
+    return members
+
+
+def is_valid_zip(path: str) -> bool:
+    """ZIP として開けて、全メンバーの CRC が正しければ True（ダウンロードの完了確認に使う）"""
+    try:
+        with zipfile.ZipFile(path) as zip_ref:
+            return zip_ref.testzip() is None
+    except (zipfile.BadZipFile, OSError):
+        return False
+
+
+def list_zip_files(folder_path: str) -> List[str]:
+    """フォルダ直下の ZIP ファイルのパス（ファイル名順）"""
+    with os.scandir(folder_path) as entries:
+        zip_paths = [entry.path for entry in entries
+                     if entry.is_file() and entry.name.lower().endswith('.zip')]
+    return sorted(zip_paths)
+
+
+def list_statement_files(folder_path: str, kinds: Iterable[str],
+                         exclude: Iterable[str] = ()) -> Dict[str, List[str]]:
+    """
+    フォルダ内の全 ZIP から、指定した種類（'acbs', 'qcfs' など）の仮想パスを集める。
+
+    Args:
+        folder_path: 企業フォルダ
+        kinds: ファイル名の2番目の区切りの先頭（例: 'acbs'）
+        exclude: 除外するファイル名（既に解凍済みのファイルなど）
+
+    Returns:
+        種類 → 仮想パスのリスト。同じファイル名のメンバーは最初の1つだけ
+    """
+    kinds = [kind.lower() for kind in kinds]
+    seen = {os.path.basename(name) for name in exclude}
+    result: Dict[str, List[str]] = {kind: [] for kind in kinds}
+
+    for zip_path in list_zip_files(folder_path):
+        for member in list_statement_members(zip_path):
+            file_name = member.rsplit('/', 1)[-1]
+            if file_name in seen:
+                continue
+            kind = file_name.split('-')[1][:4].lower()
+            if kind in result:
+                seen.add(file_name)
+                result[kind].append(make_member_path(zip_path, member))
+
+    return result
+
+
+if __name__ == "__main__":
+    folder_path = r"E:\Zip_files\2780"
+    files = list_statement_files(folder_path, ['acbs', 'acfs', 'acpl', 'acpc'])
+    for kind, paths in files.items():
+        print(f'{kind}: {len(paths)}件')
+        for path in paths:
+            print(f'  {path}')
@@ -1,103 +1,270 @@
 """
 東証上場会社情報サービス（https://www2.jpx.co.jp/tseHpFront/JJK010010Action.do?Show=Show）から
 指定した企業コードのZipをダウンロードするプログラム
+
+以前は企業ごとに Chrome を起動・終了し、各操作の後に time.sleep() で固定時間待っていた。
+
+- BrowserSessionPool: 起動済みの Chrome（ヘッドレス、画像・CSS なし）を使い回す
+  （同時に使えるのは size 個。セッションごとに専用のダウンロードフォルダを持つ）
+- 画面の操作は固定時間待たず、ボタンの表示・画面の読み込み完了を待つ
+- ダウンロードの完了は、.crdownload が残っていないことと Zip の CRC が正しいことで判定する
+- delta（filing_delta.DeltaFilter）を渡すと、一覧の開示日を見て新しい開示だけをクリックする
+- 画面の表示・クリックは rate_limiter.HostLimiter（プールで共有）でサイトへの速さと同時数を調整する
+  （トークンバケットで毎秒 rate 回まで。同時にダウンロード中の数は AIMD で増減し、
+  タイムアウト・ダウンロードの停止で半分にする。画面の表示の失敗はばらつかせた間隔でやり直す）
+- 実際に出た速さ（件/秒、MB/秒）を ThroughputMeter で計り、プールを閉じるときに表示する
+
+    pool = get_session_pool(size=2)
+    zip_download('7003', download_dir='/path/to/staging/7003', pool=pool)
+    close_session_pool()
 """
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
 import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
 from tqdm import tqdm
 
-def zip_download(code):
-    print(f"★{code}のzipダウンロードを実行")
+from sc.fileio import filing_delta, rate_limiter, zip_reader
 
-    driver = None
-    try:
-        # ブラウザを起動
-        driver = webdriver.Chrome()
-        wait = WebDriverWait(driver, 10)  # 最大10秒待機
+SEARCH_URL = "https://www2.jpx.co.jp/tseHpFront/JJK010010Action.do?Show=Show"
+
+# ダウンロード途中のファイルの拡張子（Chrome）
+PARTIAL_SUFFIXES = ('.crdownload', '.tmp')
+
+# リンク先（href / onclick）の Zip のファイル名
+_ZIP_NAME_PATTERN = re.compile(r"""([^/'"]+\.zip)""", re.IGNORECASE)
+
+
+def _create_options(download_dir, headless: bool = False):
+    """
+    ダウンロード先を指定した Chrome のオプションを作る。
+    企業ごと（セッションごと）に別のフォルダを指定すれば、複数企業を同時にダウンロードしても混ざらない。
+    画像と CSS は読み込まない（ボタンの操作には不要で、ページの表示が速くなる）。
+    """
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument('--headless=new')
+    options.add_argument('--disable-gpu')
+    options.add_experimental_option('prefs', {
+        'download.default_directory': os.path.abspath(str(download_dir)),
+        'download.prompt_for_download': False,
+        'download.directory_upgrade': True,
+        'safebrowsing.enabled': True,
+        # 複数ファイルの連続ダウンロードを確認なしで許可する
+        'profile.default_content_setting_values.automatic_downloads': 1,
+        'profile.managed_default_content_settings.images': 2,
+        'profile.managed_default_content_settings.stylesheets': 2,
+    })
+    return options
+
+
+# ===========================================================================
+# 待機
+# ===========================================================================
+
+def _wait_for_page_load(driver, timeout: float = 10):
+    WebDriverWait(driver, timeout).until(lambda d: d.execute_script('return document.readyState') == 'complete')
+
+
+def wait_for_downloads(folder: str, expected: int, idle_timeout: float = 60.0,
+                       poll_interval: float = 0.2) -> List[str]:
+    """
+    folder に expected 個の Zip が揃うまで待ち、ダウンロードできた Zip のパスを返す。
+
+    完了の条件: .crdownload / .tmp が残っていない、かつ Zip が expected 個以上あり全て CRC が正しい。
+    ファイルのサイズが idle_timeout 秒変わらなければ（転送が止まったら）そこで打ち切る
+    （転送が続いている間は待ち続けるので、大きいファイルでも途中で打ち切らない）。
+    壊れた Zip は削除し、返すリストには含めない。
+    """
+    checked: Dict[str, tuple] = {}  # パス → 検査したときの (サイズ, 更新日時)（同じファイルを何度も検査しない）
+    valid = set()
+    last_state = None
+    last_progress = time.monotonic()
+
+    while True:
+        names = os.listdir(folder)
+        partial = [name for name in names if name.endswith(PARTIAL_SUFFIXES)]
+        zips = [os.path.join(folder, name) for name in names if name.lower().endswith('.zip')]
+
+        state = []
+        for path in zips:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            state.append((path, signature))
+            if not partial and checked.get(path) != signature:
+                checked[path] = signature
+                if zip_reader.is_valid_zip(path):
+                    valid.add(path)
+                else:
+                    valid.discard(path)
+        for name in partial:
+            try:
+                state.append((name, (os.path.getsize(os.path.join(folder, name)),)))
+            except OSError:
+                pass
+
+        if not partial and len(zips) >= expected and all(path in valid for path in zips):
+            return sorted(zips)
 
-        driver.get("https://www2.jpx.co.jp/tseHpFront/JJK010010Action.do?Show=Show")
+        state = sorted(state)
+        now = time.monotonic()
+        if state != last_state:
+            last_state = state
+            last_progress = now
+        elif now - last_progress > idle_timeout:
+            broken = [path for path in zips if path not in valid]
+            print(f"警告: ダウンロードが {idle_timeout:.0f}秒進まないため打ち切ります"
+                  f"（Zip {len(zips) - len(broken)}/{expected}件、途中 {len(partial)}件、破損 {len(broken)}件）")
+            for path in broken:
+                os.remove(path)
+                print(f"破損した Zip を削除しました: {os.path.basename(path)}")
+            return sorted(path for path in zips if path in valid)
+
+        time.sleep(poll_interval)
+
+
+# ===========================================================================
+# ブラウザのセッション
+# ===========================================================================
+
+class BrowserSession:
+    """
+    使い回す Chrome 1つ分。専用のダウンロードフォルダを持つ。
+    Chrome は最初に使うときに起動し、エラーが起きたら終了して次に使うときに起動し直す。
+    limiter / meter はプールの全セッションで共有する。
+    """
+
+    def __init__(self, headless: bool = True, wait_timeout: float = 10, download_timeout: float = 60.0,
+                 limiter: Optional[rate_limiter.HostLimiter] = None,
+                 meter: Optional[rate_limiter.ThroughputMeter] = None, retries: int = 3):
+        self.headless = headless
+        self.wait_timeout = wait_timeout
+        self.download_timeout = download_timeout
+        self.limiter = limiter or rate_limiter.HostLimiter()
+        self.meter = meter or rate_limiter.ThroughputMeter()
+        self.retries = max(1, retries)
+        self.download_dir = tempfile.mkdtemp(prefix='tdnet_download_')
+        self.driver = None
+
+    def _ensure_driver(self):
+        if self.driver is None:
+            self.driver = webdriver.Chrome(options=_create_options(self.download_dir, headless=self.headless))
+            try:
+                # ヘッドレスでもダウンロードを許可する
+                self.driver.execute_cdp_cmd('Page.setDownloadBehavior',
+                                            {'behavior': 'allow', 'downloadPath': self.download_dir})
+            except Exception:
+                pass
+        return self.driver
+
+    def download(self, code, delta: Optional[filing_delta.DeltaFilter] = None) -> List[str]:
+        """
+        企業コードの XBRL の Zip をダウンロードし、セッションのフォルダに置いた Zip のパスを返す。
+        delta を渡すと、その条件に合う（新しい）開示だけをダウンロードする。
+        """
+        # 前の企業の残りがあれば消す
+        for name in os.listdir(self.download_dir):
+            os.remove(os.path.join(self.download_dir, name))
+
+        driver = self._ensure_driver()
+        wait = WebDriverWait(driver, self.wait_timeout)
 
         # 検索ボックスに企業コードを入力
-        input_box = wait.until(EC.presence_of_element_located((By.NAME, "eqMgrCd")))
+        input_box = self._open_search_page(driver, wait)
         input_box.clear()
-        input_box.send_keys(code)
+        input_box.send_keys(str(code))
         print(f"企業コード {code} を入力しました")
 
         # 検索ボタンを押す
         search_button = driver.find_element(By.NAME, 'searchButton')
+        self.limiter.wait(SEARCH_URL)
         search_button.click()
         print("検索ボタンをクリックしました")
-        time.sleep(3)  # 検索結果の読み込みを待つ
 
-        # 検索結果があるか確認
+        # 検索結果があるか確認（詳細ボタンが表示されるまで待つ）
         try:
-            # 詳細ボタンを待機して取得
             detail_button = wait.until(
-                EC.presence_of_element_located((By.NAME, 'detail_button'))
+                EC.element_to_be_clickable((By.NAME, 'detail_button'))
             )
             print("詳細ボタンが見つかりました")
+            self.limiter.wait(SEARCH_URL)
             detail_button.click()
-            time.sleep(2)
+            wait.until(EC.staleness_of(detail_button))
+            _wait_for_page_load(driver, self.wait_timeout)
 
         except TimeoutException:
             print(f"エラー: 企業コード {code} の検索結果が見つかりません")
             print("検索結果が0件の可能性があります")
-            return
+            return []
 
         # JavaScriptを実行してタブを切り替え
         js_code = "javascript:changeTab('2');"
         driver.execute_script(js_code)
         print("タブ2に切り替えました")
-        time.sleep(2)
 
         # 開示ボタンを押す
         try:
             kaiji_button = wait.until(
                 EC.element_to_be_clickable((By.XPATH, '/html/body/div/form/div/div[3]/div/table[4]/tbody/tr/th/input'))
             )
+            self.limiter.wait(SEARCH_URL)
             kaiji_button.click()
             print("開示ボタンをクリックしました")
-            time.sleep(2)
         except TimeoutException:
             print("開示ボタンが見つかりませんでした")
-            return
+            return []
 
         # 更に表示ボタンを押す
-        try:
-            saranihyouji_button = wait.until(
-                EC.element_to_be_clickable((By.XPATH, '/html/body/div/form/div/div[3]/div/table[5]/tbody/tr[3]/td/input'))
-            )
-            saranihyouji_button.click()
-            print("更に表示ボタンをクリックしました")
-            time.sleep(3)
-        except TimeoutException:
-            print("更に表示ボタンが見つかりませんでした（既に全件表示されている可能性）")
+        # 差分ダウンロードで、表示中の一覧に since より前の開示が既にあれば押さなくてよい
+        visible = driver.find_elements(By.XPATH, '//img[@alt="XBRL"]')
+        if delta is not None and any(delta.is_older(public_day) for public_day in self._row_dates(visible)):
+            print("差分ダウンロード: 表示中の一覧で足りるため、更に表示ボタンは押しません")
+        else:
+            self._show_more(driver, wait)
 
         # XBRLファイル毎にでループ処理を行う
         elements = driver.find_elements(By.XPATH, '//img[@alt="XBRL"]')
 
         if len(elements) == 0:
             print("XBRLファイルが見つかりませんでした")
-            return
+            return []
+
+        if delta is not None:
+            elements = [element for element, public_day in zip(elements, self._row_dates(elements))
+                        if delta.wants(self._zip_name(element), public_day)]
+            print(f'差分ダウンロード: {delta.describe()} → {len(elements)}件（{delta.skipped}件はスキップ）')
+            if not elements:
+                return []
 
         print(f'ダウンロード総数：{len(elements)}件')
 
-        # ダウンロード処理
-        successful_downloads = 0
+        # ダウンロード処理（同時にダウンロード中の数が上限未満になったら次をクリックし、完了はまとめて待つ）
+        clicked = 0
         failed_downloads = 0
 
         for i, element in enumerate(tqdm(elements, desc="Processing"), 1):
             try:
                 # 要素が表示されているか確認
                 if element.is_displayed():
+                    self._wait_for_slot(clicked)
+                    self.limiter.wait(SEARCH_URL)
                     element.click()
-                    time.sleep(2)
-                    successful_downloads += 1
+                    clicked += 1
                 else:
                     print(f"\n{i}番目の要素は表示されていません（スキップ）")
                     failed_downloads += 1
@@ -107,18 +274,232 @@ def zip_download(code):
                 failed_downloads += 1
                 continue
 
-        print(f"\n完了: 成功 {successful_downloads}件, 失敗 {failed_downloads}件")
+        files = wait_for_downloads(self.download_dir, clicked, idle_timeout=self.download_timeout)
+        for _ in files:
+            self.limiter.success(SEARCH_URL)
+        if len(files) < clicked:
+            # ダウンロードが止まった = サイト側で制限がかかったとみなす
+            self.limiter.throttled(SEARCH_URL)
+        self.meter.add(files=len(files), nbytes=rate_limiter.total_size(files))
+        failed_downloads += max(clicked - len(files), 0)
+        print(f"\n完了: 成功 {len(files)}件, 失敗 {failed_downloads}件")
+        return files
+
+    def _open_search_page(self, driver, wait):
+        """検索画面を開いて検索ボックスを返す（タイムアウトなどは、ばらつかせた間隔をあけてやり直す）"""
+        for attempt in range(self.retries):
+            try:
+                self.limiter.wait(SEARCH_URL)
+                driver.get(SEARCH_URL)
+                return wait.until(EC.presence_of_element_located((By.NAME, "eqMgrCd")))
+            except WebDriverException as e:
+                self.limiter.throttled(SEARCH_URL)
+                if attempt + 1 >= self.retries:
+                    raise
+                delay = rate_limiter.jittered_backoff(attempt)
+                print(f"警告: 検索画面を開けませんでした（{attempt + 1}/{self.retries}、{delay:.1f}秒後にやり直し）: {e}")
+                time.sleep(delay)
+
+    def _wait_for_slot(self, clicked: int):
+        """
+        ダウンロード中（クリック済みで Zip になっていない）の数が limiter の同時数未満になるまで待つ。
+        download_timeout 秒待っても減らなければ、制限がかかったとみなして先へ進む。
+        """
+        start = time.monotonic()
+        while True:
+            done = sum(1 for name in os.listdir(self.download_dir) if name.lower().endswith('.zip'))
+            if clicked - done < self.limiter.concurrency(SEARCH_URL):
+                return
+            if time.monotonic() - start > self.download_timeout:
+                self.limiter.throttled(SEARCH_URL)
+                return
+            time.sleep(0.1)
+
+    def _show_more(self, driver, wait):
+        """更に表示ボタンを押し、ボタンが消えるか XBRL の行が増えるまで待つ"""
+        try:
+            saranihyouji_button = wait.until(
+                EC.element_to_be_clickable((By.XPATH, '/html/body/div/form/div/div[3]/div/table[5]/tbody/tr[3]/td/input'))
+            )
+            before = len(driver.find_elements(By.XPATH, '//img[@alt="XBRL"]'))
+            self.limiter.wait(SEARCH_URL)
+            saranihyouji_button.click()
+            print("更に表示ボタンをクリックしました")
+            try:
+                wait.until(lambda d: EC.staleness_of(saranihyouji_button)(d)
+                           or len(d.find_elements(By.XPATH, '//img[@alt="XBRL"]')) > before)
+            except TimeoutException:
+                print("警告: 更に表示ボタンを押した後に一覧が変わりませんでした")
+            _wait_for_page_load(driver, self.wait_timeout)
+        except TimeoutException:
+            print("更に表示ボタンが見つかりませんでした（既に全件表示されている可能性）")
+
+    @staticmethod
+    def _row_dates(elements) -> List[Optional[str]]:
+        """XBRL の画像と同じ行（tr）の開示日"""
+        dates = []
+        for element in elements:
+            try:
+                row = element.find_element(By.XPATH, './ancestor::tr[1]')
+                dates.append(filing_delta.parse_listing_date(row.text))
+            except NoSuchElementException:
+                dates.append(None)
+        return dates
+
+    @staticmethod
+    def _zip_name(element) -> str:
+        """XBRL の画像のリンク先の Zip のファイル名（分からなければ空文字）"""
+        try:
+            link = element.find_element(By.XPATH, './ancestor::a[1]')
+        except NoSuchElementException:
+            return ''
+        target = link.get_attribute('href') or ''
+        if not target.lower().endswith('.zip'):
+            target = link.get_attribute('onclick') or ''
+        match = _ZIP_NAME_PATTERN.search(target)
+        return match.group(1) if match else ''
+
+    def quit(self):
+        """Chrome を終了する（次に download() したときに起動し直す）"""
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                print(f"Chrome の終了でエラー: {e}")
+            self.driver = None
+
+    def close(self):
+        self.quit()
+        shutil.rmtree(self.download_dir, ignore_errors=True)
+
+
+class BrowserSessionPool:
+    """
+    BrowserSession を最大 size 個まで作って使い回すプール。
+    size 個とも使用中なら、どれかが返されるまで待つ。
+
+    Args:
+        size: 同時に起動しておく Chrome の数（同時にダウンロードする企業数に合わせる）
+        headless: 画面を表示しないで起動するかどうか
+        download_timeout: ダウンロードが進まないときに打ち切るまでの秒数
+        limiter: サイトへの速さと同時数の調整（None なら既定の HostLimiter）
+    """
+
+    def __init__(self, size: int = 1, headless: bool = True, download_timeout: float = 60.0,
+                 limiter: Optional[rate_limiter.HostLimiter] = None):
+        self.size = max(1, size)
+        self.headless = headless
+        self.download_timeout = download_timeout
+        self.limiter = limiter or rate_limiter.HostLimiter()
+        self.meter = rate_limiter.ThroughputMeter()
+        self._idle: "queue.LifoQueue[BrowserSession]" = queue.LifoQueue()
+        self._sessions: List[BrowserSession] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def session(self):
+        """セッションを1つ借りる（with を抜けると返す。例外が起きた Chrome は終了して次回起動し直す）"""
+        session = self._acquire()
+        try:
+            yield session
+        except Exception:
+            session.quit()
+            raise
+        finally:
+            self._idle.put(session)
+
+    def _acquire(self) -> BrowserSession:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._sessions) < self.size:
+                session = BrowserSession(headless=self.headless, download_timeout=self.download_timeout,
+                                         limiter=self.limiter, meter=self.meter)
+                self._sessions.append(session)
+                return session
+        return self._idle.get()
+
+    def close(self):
+        """全ての Chrome を終了し、ダウンロードフォルダを削除する"""
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+        while not self._idle.empty():
+            self._idle.get_nowait()
+
+
+# ===========================================================================
+# 共有インスタンス
+# ===========================================================================
+
+_pool: Optional[BrowserSessionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_session_pool(size: int = 1, headless: bool = True, download_timeout: float = 60.0,
+                     limiter: Optional[rate_limiter.HostLimiter] = None) -> BrowserSessionPool:
+    """プロセスで1つの BrowserSessionPool を返す（最初に呼んだときの設定で作る）"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserSessionPool(size=size, headless=headless, download_timeout=download_timeout,
+                                       limiter=limiter)
+        return _pool
+
+
+def close_session_pool():
+    """共有の BrowserSessionPool を閉じる（全処理の最後に呼ぶ）"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            print('Chromeを閉じます')
+            print(f"[INFO] ダウンロード: {_pool.meter.format()} / {_pool.limiter.describe()}")
+            _pool.close()
+            _pool = None
+
+
+def zip_download(code, download_dir=None, pool: Optional[BrowserSessionPool] = None,
+                 delta: Optional[filing_delta.DeltaFilter] = None) -> int:
+    """
+    Args:
+        code: 企業コード
+        download_dir: ダウンロードした Zip の移動先フォルダ。None なら ~/Downloads
+        pool: 使うセッションプール。None なら共有のプール（get_session_pool()）
+        delta: 差分ダウンロードの条件（None なら全てダウンロード）
+
+    Returns:
+        ダウンロードできた Zip の数
+    """
+    print(f"★{code}のzipダウンロードを実行")
+    start = time.perf_counter()
+
+    download_dir = str(download_dir or Path.home() / 'Downloads')
+    os.makedirs(download_dir, exist_ok=True)
+    pool = pool or get_session_pool()
 
+    try:
+        with pool.session() as session:
+            files = session.download(code, delta=delta)
+            # セッションのフォルダから指定のフォルダへ移動
+            moved = []
+            for path in files:
+                destination = os.path.join(download_dir, os.path.basename(path))
+                shutil.move(path, destination)
+                moved.append(destination)
     except Exception as e:
         print(f"予期しないエラーが発生しました: {str(e)}")
+        return 0
 
-    finally:
-        # WebDriverを終了
-        if driver:
-            print('Chromeを閉じます')
-            time.sleep(2)
-            driver.quit()
+    rate = rate_limiter.format_rate(len(moved), rate_limiter.total_size(moved), time.perf_counter() - start)
+    print(f"{code}: Zip {len(moved)}件をダウンロードしました（{rate}）")
+    return len(moved)
 
 
 if __name__ == '__main__':
-    zip_download(7003)
\ No newline at end of file
+    try:
+        zip_download(7003, pool=get_session_pool(headless=False))
+    finally:
+        close_session_pool()
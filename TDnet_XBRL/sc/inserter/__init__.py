@@ -0,0 +1,5 @@
+# inserter/__init__.py
+
+# SQLite の書き込みロックが解けるまで待つ秒数
+# （複数企業を同時に処理すると、同じ DB への書き込みが重なるため）
+DB_TIMEOUT = 30
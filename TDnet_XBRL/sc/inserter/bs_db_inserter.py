@@ -6,10 +6,11 @@ FiscalYear のみ保持（Periodは削除）
 
 import sqlite3
 import os
+from sc.inserter import DB_TIMEOUT, companies, db_schema
 from sc.parser import xbrl_bs_common_parser, xbrl_bs_ifrs_parser, xbrl_bs_japan_gaap_parser
 from sc.parser.bs_filename_parser import BsFilenameParser
+from sc.parser.xbrl_document import XbrlDocument
 from datetime import datetime
-from lxml import etree
 import re
 
 
@@ -23,24 +24,10 @@ class BsDBInserter:
         parser = BsFilenameParser(bs_file_path)
         self.company_code = parser.get_code()
 
-        # プロジェクトのルートディレクトリからの相対パスでDBを指定
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        db_dir = os.path.join(current_dir, '../..', 'db')
-
-        # dbフォルダが存在しない場合は作成
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir)
-            print(f"データベースフォルダを作成しました: {db_dir}")
-
-        self.DB = os.path.join(db_dir, 'BS_DB.db')
+        # プロジェクトのルートディレクトリの db フォルダ（なければ作成）
+        self.DB = db_schema.get_db_path(db_schema.BS_DB_NAME)
         print(f"データベースパス: {self.DB}")
 
-    # =============================
-    # 補助関数：名前空間エスケープ
-    # =============================
-    def _escape_ns(self, ns_url):
-        return ns_url.replace('http://', 'http/').replace('/', '_')
-
     # =============================
     # 期間情報抽出（簡略化版）
     # =============================
@@ -50,34 +37,28 @@ class BsDBInserter:
         Period は削除し、FiscalYear のみ返す
         """
         try:
-            tree = etree.parse(self.bs_file_path)
-            root = tree.getroot()
-            namespaces = root.nsmap
+            document = XbrlDocument.load(self.bs_file_path)
 
             period_end_date = None
             fiscal_year = None
 
             # 1. コンテキストから instant / endDate
-            for ctx in root.findall('.//{http://www.xbrl.org/2003/instance}context'):
-                ctx_id = ctx.get('id', '')
+            for ctx_id, instant, end_date in document.contexts:
                 if re.search(r'CurrentQuarterInstant|CurrentYTDEnd|CurrentQuarterEnd|Instant', ctx_id, re.I):
-                    instant = ctx.find('.//{http://www.xbrl.org/2003/instance}instant')
-                    if instant is not None and instant.text and re.match(r'\d{4}-\d{2}-\d{2}', instant.text.strip()):
-                        period_end_date = datetime.strptime(instant.text.strip(), '%Y-%m-%d').date()
+                    if instant and re.match(r'\d{4}-\d{2}-\d{2}', instant):
+                        period_end_date = datetime.strptime(instant, '%Y-%m-%d').date()
                         break
-                    end_tag = ctx.find('.//{http://www.xbrl.org/2003/instance}endDate')
-                    if end_tag is not None and end_tag.text and re.match(r'\d{4}-\d{2}-\d{2}', end_tag.text.strip()):
-                        period_end_date = datetime.strptime(end_tag.strip(), '%Y-%m-%d').date()
+                    if end_date and re.match(r'\d{4}-\d{2}-\d{2}', end_date):
+                        period_end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
                         break
 
             # 2. DocumentPeriodEndDate
             if period_end_date is None:
-                for ns_key, ns_url in namespaces.items():
-                    if 'jpcrp' in ns_url.lower():
-                        tag_name = f'{{{self._escape_ns(ns_url)}}}DocumentPeriodEndDate'
-                        elem = root.find(f'.//{tag_name}')
-                        if elem is not None and elem.text and re.match(r'\d{4}-\d{2}-\d{2}', elem.text.strip()):
-                            period_end_date = datetime.strptime(elem.text.strip(), '%Y-%m-%d').date()
+                for (name, _), fact in document.non_numerics.items():
+                    if name.startswith('jpcrp') and name.endswith(':DocumentPeriodEndDate'):
+                        text = fact.text.strip()
+                        if re.match(r'\d{4}-\d{2}-\d{2}', text):
+                            period_end_date = datetime.strptime(text[:10], '%Y-%m-%d').date()
                             break
 
             # 3. ファイル名から
@@ -129,7 +110,18 @@ class BsDBInserter:
             traceback.print_exc()
             return None, None
 
-    def insert_to_bs_db(self):
+    # =============================
+    # レコード抽出（DB には触らない）
+    # =============================
+    def extract_record(self):
+        """
+        BS の1行分のデータを抽出して返す。DB 接続は行わないので、
+        別プロセスで抽出して親プロセスで insert_record() することもできる。
+
+        Returns:
+            {'columns': カラム名のタプル, 'values': 値のタプル,
+             'accounting_standard': 会計基準} / 会計基準が不明なら None
+        """
         accounting_standard = xbrl_bs_common_parser.get_AccountingStandard(self.bs_file_path)
         company_name = xbrl_bs_common_parser.get_company_name(self.bs_file_path)
         bsfilenameparser = BsFilenameParser(self.bs_file_path)
@@ -153,31 +145,11 @@ class BsDBInserter:
         if fiscal_year is None:
             print(f'警告: 会計年度を取得できませんでした。fiscal_year=None で登録します - {filename}')
 
-        conn = sqlite3.connect(self.DB)
-        cursor = conn.cursor()
-
-        # テーブル作成（Period カラムを削除、created_at を追加）
-        cursor.execute('''CREATE TABLE IF NOT EXISTS BS (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            FileName TEXT,
-            CompanyName TEXT,
-            Code TEXT,
-            FinancialReportType TEXT,
-            AccountingStandard TEXT,
-            PublicDay TEXT,
-            StartDay TEXT,
-            EndDay TEXT,
-            FiscalYear INTEGER,
-            CashAndDeposits REAL,
-            CashAndCashEquivalent REAL,
-            CurrentAssets REAL,
-            PropertyPlantAndEquipment REAL,
-            Assets REAL,
-            RetainedEarnings REAL,
-            NetAssets REAL,
-            Equity REAL,
-            created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
-        )''')
+        common_columns = ('FileName', 'CompanyName', 'Code', 'FinancialReportType',
+                          'AccountingStandard', 'PublicDay', 'StartDay', 'EndDay', 'FiscalYear')
+        common_values = (filename, company_name, code, typeofcurrentperioddei,
+                         accountingstandard, public_day, currentfiscalyearstartdatedei,
+                         currentperiodenddatedei, fiscal_year)
 
         if accounting_standard == "IFRS":
                 current_assets_ifrs = xbrl_bs_ifrs_parser.get_CurrentAssets(self.bs_file_path)
@@ -187,19 +159,13 @@ class BsDBInserter:
                 retainedearningsifrs = xbrl_bs_ifrs_parser.get_RetainedEarningsIFRS(self.bs_file_path)
                 equityifrs = xbrl_bs_ifrs_parser.get_EquityIFRS(self.bs_file_path)
 
-                cursor.execute('''INSERT INTO BS 
-                (FileName, CompanyName, Code, FinancialReportType, 
-                AccountingStandard, PublicDay, StartDay, EndDay, FiscalYear,
-                CashAndCashEquivalent, CurrentAssets, PropertyPlantAndEquipment, 
-                Assets, RetainedEarnings, Equity)
-                VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)''',
-                               (filename, company_name, code, typeofcurrentperioddei,
-                                accountingstandard, public_day, currentfiscalyearstartdatedei,
-                                currentperiodenddatedei, fiscal_year,
-                                cashandcashequivalent_ifrs, current_assets_ifrs,
-                                propertyplantandequipment, assets_ifrs, retainedearningsifrs, equityifrs))
-
-                print(f'IFRS BSデータを登録: {code} | {typeofcurrentperioddei} | {fiscal_year}年度')
+                return {
+                    'columns': common_columns + ('CashAndCashEquivalent', 'CurrentAssets', 'PropertyPlantAndEquipment',
+                                                 'Assets', 'RetainedEarnings', 'Equity'),
+                    'values': common_values + (cashandcashequivalent_ifrs, current_assets_ifrs,
+                                               propertyplantandequipment, assets_ifrs, retainedearningsifrs, equityifrs),
+                    'accounting_standard': accounting_standard,
+                }
 
         elif accounting_standard == "Japan GAAP":
                 cashanddeposits = xbrl_bs_japan_gaap_parser.get_CashAndDeposits(self.bs_file_path)
@@ -209,22 +175,60 @@ class BsDBInserter:
                 retainedearnings = xbrl_bs_japan_gaap_parser.get_RetainedEarnings(self.bs_file_path)
                 netassets = xbrl_bs_japan_gaap_parser.get_NetAssets(self.bs_file_path)
 
-                cursor.execute('''INSERT INTO BS 
-                (FileName, CompanyName, Code, FinancialReportType, 
-                AccountingStandard, PublicDay, StartDay, EndDay, FiscalYear,
-                CashAndDeposits, CurrentAssets, PropertyPlantAndEquipment, 
-                Assets, RetainedEarnings, NetAssets)
-                VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)''',
-                               (filename, company_name, code, typeofcurrentperioddei,
-                                accountingstandard, public_day, currentfiscalyearstartdatedei,
-                                currentperiodenddatedei, fiscal_year,
-                                cashanddeposits, current_assets_japan_gaap,
-                                propertyplantandequipment, assets_japan_gaap,
-                                retainedearnings, netassets))
-
-                print(f'日本GAAP BSデータを登録: {code} | {typeofcurrentperioddei} | {fiscal_year}年度')
-
-        print(f'{filename}を登録しました。')
+                return {
+                    'columns': common_columns + ('CashAndDeposits', 'CurrentAssets', 'PropertyPlantAndEquipment',
+                                                 'Assets', 'RetainedEarnings', 'NetAssets'),
+                    'values': common_values + (cashanddeposits, current_assets_japan_gaap,
+                                               propertyplantandequipment, assets_japan_gaap,
+                                               retainedearnings, netassets),
+                    'accounting_standard': accounting_standard,
+                }
+
+        print(f'警告: 会計基準を判定できないため登録しません - {filename}')
+        return None
+
+    # =============================
+    # テーブル作成 / 挿入
+    # =============================
+    @staticmethod
+    def ensure_table_exists(cursor):
+        cursor.execute(db_schema.BS_TABLE_DDL)
+
+    @staticmethod
+    def record_to_row(record):
+        """extract_record() の結果を (テーブル名, カラム名, 値) にする"""
+        return 'BS', record['columns'], record['values']
+
+    @staticmethod
+    def insert_record(cursor, record, upsert=False):
+        """
+        extract_record() の結果を1行挿入する（コミットは呼び出し側）。
+        upsert=True なら同じ FileName の行を上書きする。
+        """
+        table, columns, row = BsDBInserter.record_to_row(record)
+        cursor.execute(db_schema.build_insert_sql(table, columns, upsert), row)
+
+        values = dict(zip(columns, row))
+        label = 'IFRS' if record['accounting_standard'] == 'IFRS' else '日本GAAP'
+        print(f'{label} BSデータを登録: {values["Code"]} | {values["FinancialReportType"]} | {values["FiscalYear"]}年度')
+        print(f'{values["FileName"]}を登録しました。')
+
+    def insert_to_bs_db(self):
+        record = self.extract_record()
+
+        conn = sqlite3.connect(self.DB, timeout=DB_TIMEOUT)
+        cursor = conn.cursor()
+
+        self.ensure_table_exists(cursor)
+        upsert = db_schema.ensure_unique_index(conn, 'BS')
+        db_schema.ensure_query_indexes(conn, 'BS')
+        if record is not None:
+            self.insert_record(cursor, record, upsert=upsert)
+            pl_conn = sqlite3.connect(db_schema.get_db_path(db_schema.PL_DB_NAME), timeout=DB_TIMEOUT)
+            try:
+                companies.refresh(conn, pl_conn, [dict(zip(record['columns'], record['values']))['Code']])
+            finally:
+                pl_conn.close()
 
         conn.commit()
         conn.close()
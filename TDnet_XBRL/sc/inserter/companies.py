@@ -0,0 +1,113 @@
+# inserter/companies.py
+"""
+企業の一覧（COMPANIES テーブル、BS_DB.db）を管理する。
+
+Flask の /api/companies は毎回 BS 全体の SELECT DISTINCT と PL 全体の SELECT DISTINCT を行っていたが、
+取り込み時に企業ごとの情報をまとめておけば、一覧は COMPANIES を読むだけになる。
+
+1行 = 1企業:
+    Code, CompanyName（直近の BS の社名）, HasBS, HasPL, AccountingStandard（直近の BS の会計基準）,
+    LatestPublicDay（BS・PL で最も新しい公開日）, BSRows, PLRows
+
+- 書き込み時は、登録したファイルの企業コードだけ集計し直す（refresh）
+  （COMPANIES が空のとき = 既存の DB で初めて使うときは全企業を集計する）
+- rebuild() で全企業を作り直す
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+COMPANIES_DDL = '''CREATE TABLE IF NOT EXISTS COMPANIES (
+    Code TEXT PRIMARY KEY,
+    CompanyName TEXT,
+    HasBS INTEGER NOT NULL DEFAULT 0,
+    HasPL INTEGER NOT NULL DEFAULT 0,
+    AccountingStandard TEXT,
+    LatestPublicDay TEXT,
+    BSRows INTEGER NOT NULL DEFAULT 0,
+    PLRows INTEGER NOT NULL DEFAULT 0,
+    UpdatedAt TEXT
+)'''
+
+# BS の集計（社名・会計基準は公開日が最も新しい行のもの）
+# 社名はパーサーが読めなかった行（'不明'）を飛ばす。読めた行がなければ NULL
+_BS_STATS_SQL = '''
+    SELECT Code, COUNT(*), MAX(PublicDay),
+           (SELECT b.CompanyName FROM BS b
+            WHERE b.Code = BS.Code AND b.CompanyName IS NOT NULL AND b.CompanyName != '不明'
+            ORDER BY b.PublicDay DESC, b.rowid DESC LIMIT 1),
+           (SELECT b.AccountingStandard FROM BS b WHERE b.Code = BS.Code ORDER BY b.PublicDay DESC, b.rowid DESC LIMIT 1)
+    FROM BS
+    WHERE {where}
+    GROUP BY Code
+'''
+
+_PL_STATS_SQL = 'SELECT Code, COUNT(*), MAX(PublicDay) FROM PL WHERE {where} GROUP BY Code'
+
+
+def _query(conn: sqlite3.Connection, sql: str, codes: Optional[list]) -> list:
+    """codes が None なら全企業。テーブルがまだない DB では空"""
+    try:
+        if codes is None:
+            return conn.execute(sql.format(where='Code IS NOT NULL')).fetchall()
+        rows = []
+        for code in codes:
+            rows.extend(conn.execute(sql.format(where='Code = ?'), (code,)).fetchall())
+        return rows
+    except sqlite3.OperationalError:
+        return []
+
+
+def _collect(bs_conn: sqlite3.Connection, pl_conn: sqlite3.Connection, codes: Optional[list]) -> Dict[str, dict]:
+    companies = {}
+    for code, rows, public_day, name, standard in _query(bs_conn, _BS_STATS_SQL, codes):
+        companies[code] = {
+            'name': name, 'standard': standard, 'public_day': public_day,
+            'bs_rows': rows, 'pl_rows': 0,
+        }
+    for code, rows, public_day in _query(pl_conn, _PL_STATS_SQL, codes):
+        company = companies.setdefault(code, {
+            'name': None, 'standard': None, 'public_day': None, 'bs_rows': 0, 'pl_rows': 0,
+        })
+        company['pl_rows'] = rows
+        company['public_day'] = max(filter(None, (company['public_day'], public_day)), default=None)
+    return companies
+
+
+def refresh(bs_conn: sqlite3.Connection, pl_conn: sqlite3.Connection, codes: Iterable[str]) -> int:
+    """
+    指定した企業コードの COMPANIES の行を集計し直し、更新した企業数を返す。
+    COMPANIES は bs_conn 側に書き込む（コミットはしない）。
+    """
+    codes = sorted({code for code in codes if code})
+    if not codes:
+        return 0
+
+    bs_conn.execute(COMPANIES_DDL)
+    if bs_conn.execute('SELECT 1 FROM COMPANIES LIMIT 1').fetchone() is None:
+        return rebuild(bs_conn, pl_conn)
+    return _write(bs_conn, pl_conn, codes)
+
+
+def rebuild(bs_conn: sqlite3.Connection, pl_conn: sqlite3.Connection) -> int:
+    """COMPANIES を全企業分作り直す（コミットはしない）"""
+    bs_conn.execute(COMPANIES_DDL)
+    bs_conn.execute('DELETE FROM COMPANIES')
+    codes = {row[0] for row in _query(bs_conn, 'SELECT DISTINCT Code FROM BS WHERE {where}', None)}
+    codes |= {row[0] for row in _query(pl_conn, 'SELECT DISTINCT Code FROM PL WHERE {where}', None)}
+    return _write(bs_conn, pl_conn, sorted(codes))
+
+
+def _write(bs_conn: sqlite3.Connection, pl_conn: sqlite3.Connection, codes: list) -> int:
+    companies = _collect(bs_conn, pl_conn, codes)
+    now = datetime.now().isoformat(timespec='seconds')
+
+    bs_conn.executemany('DELETE FROM COMPANIES WHERE Code = ?', [(code,) for code in codes])
+    bs_conn.executemany(
+        'INSERT INTO COMPANIES (Code, CompanyName, HasBS, HasPL, AccountingStandard, LatestPublicDay, '
+        'BSRows, PLRows, UpdatedAt) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [(code, c['name'], int(c['bs_rows'] > 0), int(c['pl_rows'] > 0), c['standard'], c['public_day'],
+          c['bs_rows'], c['pl_rows'], now)
+         for code, c in companies.items()])
+    return len(companies)
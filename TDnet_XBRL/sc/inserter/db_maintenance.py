@@ -0,0 +1,179 @@
+# inserter/db_maintenance.py
+"""
+BS_DB.db / PL_DB.db の重複行を整理して DB を小さくするメンテナンスツール。
+
+再実行のたびに同じファイルが INSERT されていたため、同じ FileName の行が何行もある
+（BS は 5,030行に対して FileName は 1,798種類）。このツールは
+
+    1. DB をバックアップ（db/backup/ に SQLite のオンラインバックアップ）
+    2. FileName ごとに created_at が最新の1行だけ残して削除（1トランザクション）
+    3. FileName の一意インデックスと検索用インデックス（db_schema.QUERY_INDEXES）を作成
+    4. VACUUM / ANALYZE
+    5. 企業一覧（COMPANIES）を作り直す
+
+を行い、前後の行数とファイルサイズを表示する。
+テーブルの定義（カラム）はそのまま残すので、既存の列（BSID / Period 等）は失われない。
+Flask アプリが DB を開いたままでも実行できる（読み込み側は整理前か整理後のどちらかを見る）。
+
+使い方（TDnet_XBRL フォルダで）:
+    python -m sc.inserter.db_maintenance            # BS / PL 両方
+    python -m sc.inserter.db_maintenance --db bs    # BS だけ
+    python -m sc.inserter.db_maintenance --dry-run  # 重複件数を表示するだけ
+"""
+
+import argparse
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict
+
+from sc.inserter import DB_TIMEOUT, db_schema, pl_quarterly
+
+# 対象の DB（キー → (DB ファイル名, テーブル名)）
+TARGETS = {
+    'bs': (db_schema.BS_DB_NAME, 'BS'),
+    'pl': (db_schema.PL_DB_NAME, 'PL'),
+}
+
+# FileName ごとに残す1行を選ぶ順序。
+# created_at が日時でない行（DEFAULT 式が文字列として入ってしまった行）は最も古いものとして扱い、
+# 同じ created_at なら後から入った行（rowid が大きい行）を残す。
+_KEEP_ORDER = "(created_at GLOB '[0-9]*') DESC, created_at DESC, rowid DESC"
+
+# 重複を整理したあとに作り直す集計テーブル（テーブル名 → 作り直す関数）
+_REBUILD = {
+    'PL': pl_quarterly.rebuild,
+}
+
+
+def get_file_size(db_path: str) -> int:
+    """DB 本体と -wal ファイルの合計サイズ"""
+    size = 0
+    for path in (db_path, db_path + '-wal'):
+        if os.path.exists(path):
+            size += os.path.getsize(path)
+    return size
+
+
+def count_rows(conn: sqlite3.Connection, table: str) -> Dict[str, int]:
+    rows, files = conn.execute(f'SELECT COUNT(*), COUNT(DISTINCT {db_schema.UNIQUE_KEY}) FROM {table}').fetchone()
+    return {'rows': rows, 'files': files}
+
+
+def backup_database(conn: sqlite3.Connection, db_path: str) -> str:
+    """SQLite のオンラインバックアップで db/backup/<名前>.<日時>.db にコピーする"""
+    backup_dir = os.path.join(os.path.dirname(db_path), 'backup')
+    os.makedirs(backup_dir, exist_ok=True)
+
+    name, ext = os.path.splitext(os.path.basename(db_path))
+    backup_path = os.path.join(backup_dir, f"{name}.{datetime.now():%Y%m%d_%H%M%S}{ext}")
+
+    backup_conn = sqlite3.connect(backup_path)
+    try:
+        conn.backup(backup_conn)
+    finally:
+        backup_conn.close()
+    return backup_path
+
+
+def deduplicate(conn: sqlite3.Connection, table: str) -> int:
+    """
+    FileName ごとに最新の1行だけ残し、削除した行数を返す。
+    削除・一意インデックスの作成・集計テーブルの作り直しは1トランザクションで行う。
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        cursor = conn.execute(f'''
+            DELETE FROM {table}
+            WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid,
+                           ROW_NUMBER() OVER (PARTITION BY {db_schema.UNIQUE_KEY} ORDER BY {_KEEP_ORDER}) AS rn
+                    FROM {table}
+                )
+                WHERE rn > 1
+            )
+        ''')
+        removed = cursor.rowcount
+
+        conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS ux_{table}_{db_schema.UNIQUE_KEY} '
+                     f'ON {table} ({db_schema.UNIQUE_KEY})')
+        if table in _REBUILD:
+            _REBUILD[table](conn)
+        conn.execute('COMMIT')
+        return removed
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def compact_database(key: str, dry_run: bool = False, backup: bool = True) -> Dict[str, int]:
+    """
+    1つの DB の重複を整理して VACUUM / ANALYZE する。
+
+    Returns:
+        整理前後の行数・ファイルサイズ
+    """
+    db_name, table = TARGETS[key]
+    db_path = db_schema.get_db_path(db_name)
+    if not os.path.exists(db_path):
+        print(f"[{table}] DB がありません: {db_path}")
+        return {}
+
+    # isolation_level=None: トランザクションはこの関数で明示的に管理する
+    conn = sqlite3.connect(db_path, timeout=DB_TIMEOUT, isolation_level=None)
+    try:
+        before = count_rows(conn, table)
+        size_before = get_file_size(db_path)
+        print(f"[{table}] 整理前: {before['rows']}行 / FileName {before['files']}種類 / {size_before:,} bytes")
+
+        if dry_run:
+            print(f"[{table}] 重複行: {before['rows'] - before['files']}行（--dry-run のため変更しません）")
+            return {'rows_before': before['rows'], 'size_before': size_before}
+
+        if backup:
+            print(f"[{table}] バックアップ: {backup_database(conn, db_path)}")
+
+        removed = deduplicate(conn, table)
+        print(f"[{table}] 重複行を {removed}行 削除しました")
+
+        try:
+            conn.execute('VACUUM')
+        except sqlite3.OperationalError as e:
+            # 他の接続が書き込み中などで実行できない場合は次回に回す
+            print(f"[{table}] 警告: VACUUM できませんでした: {e}")
+        db_schema.ensure_query_indexes(conn, table)
+        conn.execute('ANALYZE')
+        if conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal':
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+        after = count_rows(conn, table)
+        size_after = get_file_size(db_path)
+        print(f"[{table}] 整理後: {after['rows']}行 / FileName {after['files']}種類 / {size_after:,} bytes")
+
+        return {
+            'rows_before': before['rows'], 'rows_after': after['rows'],
+            'size_before': size_before, 'size_after': size_after,
+        }
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BS/PL DB の重複整理と最適化')
+    parser.add_argument('--db', choices=['bs', 'pl', 'all'], default='all', help='対象の DB')
+    parser.add_argument('--dry-run', action='store_true', help='重複件数を表示するだけで変更しない')
+    parser.add_argument('--no-backup', action='store_true', help='バックアップを作らない')
+    args = parser.parse_args()
+
+    keys = list(TARGETS) if args.db == 'all' else [args.db]
+    for key in keys:
+        compact_database(key, dry_run=args.dry_run, backup=not args.no_backup)
+
+    # 行数が変わるので企業一覧も作り直す
+    if not args.dry_run:
+        db_schema.rebuild_companies()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+# inserter/db_schema.py
+"""
+BS_DB.db / PL_DB.db のテーブル定義と接続設定をまとめたモジュール。
+BsDBInserter / PlDBInserter / DBWriter はここの定義を共有する。
+"""
+
+import os
+import sqlite3
+from typing import Optional
+
+from sc.inserter import DB_TIMEOUT, companies, pl_quarterly
+
+BS_DB_NAME = 'BS_DB.db'
+PL_DB_NAME = 'PL_DB.db'
+
+# テーブル作成（Period カラムを削除、created_at を追加）
+BS_TABLE_DDL = '''CREATE TABLE IF NOT EXISTS BS (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    FileName TEXT,
+    CompanyName TEXT,
+    Code TEXT,
+    FinancialReportType TEXT,
+    AccountingStandard TEXT,
+    PublicDay TEXT,
+    StartDay TEXT,
+    EndDay TEXT,
+    FiscalYear INTEGER,
+    CashAndDeposits REAL,
+    CashAndCashEquivalent REAL,
+    CurrentAssets REAL,
+    PropertyPlantAndEquipment REAL,
+    Assets REAL,
+    RetainedEarnings REAL,
+    NetAssets REAL,
+    Equity REAL,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+)'''
+
+PL_TABLE_DDL = '''CREATE TABLE IF NOT EXISTS PL (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    Code TEXT,
+    FileName TEXT,
+    PublicDay TEXT,
+    Period TEXT,
+    FiscalYear INTEGER,
+    RevenueIFRS REAL,
+    SellingGeneralAndAdministrativeExpensesIFRS REAL,
+    OperatingProfitLossIFRS REAL,
+    ProfitLossIFRS REAL,
+    DilutedEarningsLossPerShareIFRS REAL,
+    NetSales REAL,
+    SellingGeneralAndAdministrativeExpenses REAL,
+    OperatingIncome REAL,
+    OrdinaryIncome REAL,
+    NetIncome REAL,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    EPS REAL
+)'''
+
+# DB ファイル名 → {テーブル名: DDL}
+TABLES = {
+    BS_DB_NAME: {'BS': BS_TABLE_DDL},
+    PL_DB_NAME: {'PL': PL_TABLE_DDL},
+}
+
+# 取り込み時に元テーブルから計算して作る集計テーブル（DB ファイル名 → {テーブル名: DDL}）
+DERIVED_TABLES = {
+    BS_DB_NAME: {'COMPANIES': companies.COMPANIES_DDL},
+    PL_DB_NAME: {'PL_QUARTERLY': pl_quarterly.PL_QUARTERLY_DDL},
+}
+
+# 1ファイル = 1行 にするための一意キー
+# （企業コード・期間・公開日はすべてファイル名に含まれるので FileName だけで一意になる）
+UNIQUE_KEY = 'FileName'
+
+# Flask アプリの検索に合わせたインデックス（テーブル名 → ((インデックス名, カラム), ...)）
+# 条件の列 → 並び順の列 の順に並べ、絞り込みと並べ替えをインデックスで済ませる。
+# 取り出す列が少ない検索（企業名・財務サマリー）だけは取り出す列も含め、表を読まずに済むようにしている（カバリングインデックス）。
+# bs-data / pl-data は多くの列を読むので、取り出す列は含めず、絞り込んだ行だけ表から読む。
+QUERY_INDEXES = {
+    'BS': (
+        # /api/bs-data/<company_name>: WHERE CompanyName = ? ORDER BY FiscalYear, FinancialReportType
+        # （絞り込みと並べ替えだけ。取り出す列は表から読む）
+        ('ix_BS_CompanyName_FiscalYear', ('CompanyName', 'FiscalYear', 'FinancialReportType')),
+        # /api/companies: SELECT DISTINCT CompanyName, Code / 企業名の検索: WHERE Code = ?（カバリング）
+        ('ix_BS_Code_CompanyName', ('Code', 'CompanyName')),
+        # /api/financial-summary/<code>: WHERE Code = ? ORDER BY EndDay（カバリング）
+        ('ix_BS_Code_EndDay', ('Code', 'EndDay', 'Assets', 'NetAssets')),
+    ),
+    'PL': (
+        # /api/pl-data/<code>: WHERE Code = ? ORDER BY FiscalYear, Period
+        # （絞り込みと並べ替えだけ。取り出す列は表から読む）
+        ('ix_PL_Code_FiscalYear', ('Code', 'FiscalYear', 'Period')),
+        # /api/financial-summary/<code>: WHERE Code = ? ORDER BY PublicDay（カバリング）
+        ('ix_PL_Code_PublicDay', ('Code', 'PublicDay', 'NetSales', 'OperatingIncome')),
+    ),
+}
+
+# 書き込み用接続の設定
+# WAL にすると読み込み（Flask）と書き込みが同時にでき、コミットごとの fsync も減る。
+# synchronous=NORMAL は WAL では電源断時に直近のコミットが失われうるだけで DB は壊れない。
+WRITER_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-65536',  # 64MB（負の値は KiB 単位）
+    'PRAGMA temp_store=MEMORY',
+)
+
+
+def get_db_dir() -> str:
+    """プロジェクトルートの db フォルダ（なければ作成）"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    db_dir = os.path.normpath(os.path.join(current_dir, '../..', 'db'))
+    if not os.path.exists(db_dir):
+        os.makedirs(db_dir)
+        print(f"データベースフォルダを作成しました: {db_dir}")
+    return db_dir
+
+
+def get_db_path(db_name: str) -> str:
+    return os.path.join(get_db_dir(), db_name)
+
+
+def connect_writer(db_path: str, db_name: Optional[str] = None) -> sqlite3.Connection:
+    """
+    書き込み用の長期間使う接続を開き、テーブルを作成する。
+    複数スレッドから使う場合は呼び出し側でロックすること。
+
+    Args:
+        db_name: 作成するテーブルの種類（BS_DB_NAME / PL_DB_NAME）。None ならファイル名で判断
+    """
+    conn = sqlite3.connect(db_path, timeout=DB_TIMEOUT, check_same_thread=False)
+    for pragma in WRITER_PRAGMAS:
+        conn.execute(pragma)
+
+    db_name = db_name or os.path.basename(db_path)
+    for ddl in list(TABLES.get(db_name, {}).values()) + list(DERIVED_TABLES.get(db_name, {}).values()):
+        conn.execute(ddl)
+    conn.commit()
+    return conn
+
+
+# (DB ファイルのパス, テーブル名) → 一意インデックスが使えるか（重複チェックは1回だけ）
+_unique_index_state = {}
+
+
+def ensure_unique_index(conn: sqlite3.Connection, table: str) -> bool:
+    """
+    FileName の一意インデックスを作成する。
+    既に重複した行があって作れない場合は警告を出して False を返す
+    （呼び出し側は ON CONFLICT を使わず通常の INSERT にする）。
+    """
+    key = (conn.execute('PRAGMA database_list').fetchone()[2], table)
+    if key in _unique_index_state:
+        return _unique_index_state[key]
+
+    try:
+        conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS ux_{table}_{UNIQUE_KEY} ON {table} ({UNIQUE_KEY})')
+        conn.commit()
+        available = True
+    except sqlite3.IntegrityError:
+        print(f"警告: {table} に {UNIQUE_KEY} の重複があるため一意インデックスを作成できません。"
+              f"通常の INSERT で登録します（python -m sc.inserter.db_maintenance で重複を整理してください）")
+        available = False
+
+    _unique_index_state[key] = available
+    return available
+
+
+# 検索用インデックスを作成済みの (DB ファイルのパス, テーブル名)
+_query_index_state = set()
+
+
+def ensure_query_indexes(conn: sqlite3.Connection, table: str):
+    """QUERY_INDEXES のインデックスを作成する（接続先の DB ごとに1回だけ）"""
+    key = (conn.execute('PRAGMA database_list').fetchone()[2], table)
+    if key in _query_index_state:
+        return
+
+    for index_name, columns in QUERY_INDEXES.get(table, ()):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({', '.join(columns)})")
+    conn.commit()
+    _query_index_state.add(key)
+
+
+def migrate(db_dir: Optional[str] = None):
+    """
+    既存の BS_DB.db / PL_DB.db にテーブル・インデックスを作成し、集計テーブルを作り直して ANALYZE する。
+    （インサーター / DBWriter も書き込み時に作成するので、手動で実行するのは既存 DB の移行時だけ）
+    """
+    for db_name, tables in TABLES.items():
+        db_path = os.path.join(db_dir, db_name) if db_dir else get_db_path(db_name)
+        conn = connect_writer(db_path, db_name=db_name)
+        try:
+            for table in tables:
+                ensure_unique_index(conn, table)
+                ensure_query_indexes(conn, table)
+            if 'PL_QUARTERLY' in DERIVED_TABLES.get(db_name, {}):
+                print(f"[INFO] PL_QUARTERLY: {pl_quarterly.rebuild(conn)}行")
+            conn.execute('ANALYZE')
+            conn.commit()
+            names = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL ORDER BY name")]
+            print(f"[INFO] {db_name}: インデックス {', '.join(names)}")
+        finally:
+            conn.close()
+
+    rebuild_companies(db_dir)
+
+
+def rebuild_companies(db_dir: Optional[str] = None) -> int:
+    """BS_DB.db の COMPANIES（企業一覧）を BS / PL から作り直す"""
+    def path(db_name):
+        return os.path.join(db_dir, db_name) if db_dir else get_db_path(db_name)
+
+    bs_conn = sqlite3.connect(path(BS_DB_NAME), timeout=DB_TIMEOUT)
+    pl_conn = sqlite3.connect(path(PL_DB_NAME), timeout=DB_TIMEOUT)
+    try:
+        with bs_conn:
+            count = companies.rebuild(bs_conn, pl_conn)
+        print(f"[INFO] COMPANIES: {count}社")
+        return count
+    finally:
+        bs_conn.close()
+        pl_conn.close()
+
+
+def build_insert_sql(table: str, columns, upsert: bool) -> str:
+    """
+    INSERT 文を作る。upsert=True なら同じ FileName の行を上書きする
+    （INSERT ... ON CONFLICT(FileName) DO UPDATE）。
+    """
+    placeholders = ', '.join('?' * len(columns))
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    if upsert:
+        updates = [f'{column} = excluded.{column}' for column in columns if column != UNIQUE_KEY]
+        updates.append("created_at = datetime('now', 'localtime')")
+        sql += f" ON CONFLICT({UNIQUE_KEY}) DO UPDATE SET {', '.join(updates)}"
+    return sql
+
+
+if __name__ == '__main__':
+    migrate()
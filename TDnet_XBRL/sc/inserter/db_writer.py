@@ -0,0 +1,270 @@
+# inserter/db_writer.py
+"""
+抽出済みレコードをまとめて SQLite に書き込むライター。
+
+BsDBInserter.insert_to_bs_db() / PlDBInserter.insert_to_pl_db() は1ファイルごとに
+接続 → CREATE TABLE → INSERT 1行 → コミット を行うため、5,000行なら5,000回 fsync していた。
+DBWriter は DB ごとに長期間使う接続を1つだけ持ち、レコードを溜めておいて
+flush() で executemany を使って1トランザクションで書き込む。
+
+    writer = DBWriter()
+    writer.add('bs', record)      # BsDBInserter.extract_record() の結果
+    writer.add('pl', record)      # PlDBInserter.extract_record() の結果
+    writer.flush()                # 企業ごと（または flush_rows 行ごと）に呼ぶ
+    writer.close()
+
+FileName の一意インデックスが作れる DB では INSERT ... ON CONFLICT DO UPDATE で書き込むため、
+同じファイルを何度登録しても1行のまま（既存の重複がある DB では通常の INSERT）。
+is_known() で登録済みのファイル名を確認でき、解析前にスキップできる。
+latest_public_day() で企業ごとの最新の公開日が分かり、差分ダウンロードに使える。
+PL を書き込んだときは、その企業・年度の PL_QUARTERLY（四半期ごとの値）も同じトランザクションで更新する。
+書き込みのたびに、対象の企業の COMPANIES（企業一覧）も集計し直す。
+
+複数スレッドから同じライターを使ってもよい（内部でロックする）。
+複数の企業を同時に処理する場合は、for_company() で企業ごとのライターを作る。
+接続・登録済みのファイル名は共有し、溜める行だけを企業ごとに分けるので、
+ある企業の flush() が他の企業の解析途中の行をコミットしたり、失敗して捨てたりしない。
+
+    shared = DBWriter()
+    writer = shared.for_company()   # 企業ごとに作る
+    writer.flush()                  # この企業の行だけを書き込む
+    writer.close()                  # 残りを書き込む（接続は shared.close() で閉じる）
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sc.inserter import companies, db_schema, pl_quarterly
+from sc.inserter.bs_db_inserter import BsDBInserter
+from sc.inserter.pl_db_inserter import PlDBInserter
+
+# statement_type → (DB ファイル名, テーブル名, レコードを行に変換する関数)
+_TARGETS = {
+    'bs': (db_schema.BS_DB_NAME, 'BS', BsDBInserter.record_to_row),
+    'pl': (db_schema.PL_DB_NAME, 'PL', PlDBInserter.record_to_row),
+}
+
+# テーブル名 → 書き込んだ行から集計テーブルを更新する関数（同じトランザクションで実行）
+_AFTER_WRITE = {
+    'PL': pl_quarterly.refresh_rows,
+}
+
+
+class DBWriter:
+    """
+    DB ごとに1つの接続を持ち、レコードをまとめて書き込むクラス。
+
+    Args:
+        flush_rows: 溜まった行数がこれを超えたら自動で flush() する
+        db_paths: statement_type → DB ファイルのパス（省略時はプロジェクトの db フォルダ）
+    """
+
+    def __init__(self, flush_rows: int = 1000, db_paths: Optional[Dict[str, str]] = None):
+        self.flush_rows = flush_rows
+        self.db_paths = {
+            statement_type: db_schema.get_db_path(db_name)
+            for statement_type, (db_name, _, _) in _TARGETS.items()
+        }
+        self.db_paths.update(db_paths or {})
+
+        self._lock = threading.RLock()
+        self._connections = {}
+
+        # (DB パス, テーブル名) → ON CONFLICT で上書きできるか
+        self._upsert: Dict[Tuple[str, str], bool] = {}
+
+        # statement_type → 登録済み（または登録待ち）のファイル名
+        self._known: Dict[str, Set[str]] = {}
+
+        # DB パス → [(テーブル名, カラム名, 値のリスト), ...]
+        # 追加順を保ったまま、連続する同じカラム構成の行を1回の executemany にまとめる
+        self._pending: "OrderedDict[str, List[Tuple[str, tuple, List[tuple]]]]" = OrderedDict()
+        self._pending_rows = 0
+
+        self.rows_written = 0
+        self.commits = 0
+
+        # for_company() で作ったライターは接続を持たず、作成元（_root）のものを使う
+        self._root = self
+        self._owns_connections = True
+
+    def for_company(self) -> 'DBWriter':
+        """接続・ロック・登録済みのファイル名を共有し、溜める行だけを分けたライターを返す"""
+        root = self._root
+        writer = DBWriter(flush_rows=root.flush_rows, db_paths=root.db_paths)
+        writer._lock = root._lock
+        writer._connections = root._connections
+        writer._upsert = root._upsert
+        writer._known = root._known
+        writer._root = root
+        writer._owns_connections = False
+        return writer
+
+    # ===========================================================================
+    # 追加 / 書き込み
+    # ===========================================================================
+
+    def add(self, statement_type: str, record: Optional[dict]):
+        """抽出済みレコードを1件溜める（None は無視）"""
+        if record is None:
+            return
+
+        _, _, record_to_row = _TARGETS[statement_type]
+        table, columns, values = record_to_row(record)
+        columns = tuple(columns)
+
+        with self._lock:
+            known = self._known.get(statement_type)
+            if known is not None:
+                known.add(values[columns.index(db_schema.UNIQUE_KEY)])
+
+            groups = self._pending.setdefault(self.db_paths[statement_type], [])
+            if groups and groups[-1][0] == table and groups[-1][1] == columns:
+                groups[-1][2].append(tuple(values))
+            else:
+                groups.append((table, columns, [tuple(values)]))
+            self._pending_rows += 1
+            if self._pending_rows >= self.flush_rows:
+                self.flush()
+
+    def flush(self) -> int:
+        """
+        溜めたレコードを DB ごとに1トランザクションで書き込み、書き込んだ行数を返す。
+        失敗した DB はロールバックし、その分のレコードは破棄して例外を投げる。
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+
+            pending = self._pending
+            self._pending = OrderedDict()
+            self._pending_rows = 0
+
+            written = 0
+            codes = set()
+            for db_path, groups in pending.items():
+                conn = self._get_connection(db_path)
+                try:
+                    with conn:  # 1トランザクション（正常終了でコミット、例外でロールバック）
+                        for table, columns, rows in groups:
+                            upsert = self._upsert[(db_path, table)]
+                            conn.executemany(db_schema.build_insert_sql(table, columns, upsert), rows)
+                            written += len(rows)
+                        for table, columns, rows in groups:
+                            after_write = _AFTER_WRITE.get(table)
+                            if after_write:
+                                after_write(conn, columns, rows)
+                            code_index = columns.index('Code')
+                            codes.update(row[code_index] for row in rows)
+                except Exception as e:
+                    print(f"[ERROR] DB書き込みに失敗したためロールバックしました - {db_path}: {e}")
+                    raise
+                self.commits += 1
+
+            self.rows_written += written
+            root = self._root
+            if root is not self:
+                root.rows_written += written
+                root.commits += len(pending)
+            print(f"[INFO] DB書き込み: {written}行（累計 {root.rows_written}行 / コミット {root.commits}回）")
+            self._refresh_companies(codes)
+            return written
+
+    def discard(self) -> int:
+        """
+        溜めた行を書き込まずに捨て、捨てた行数を返す（企業の処理が途中で失敗したとき）。
+        捨てた行のファイル名は登録済みから外す（次回また解析する）。
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = OrderedDict()
+            self._pending_rows = 0
+
+            discarded = 0
+            for db_path, groups in pending.items():
+                statement_types = [statement_type for statement_type, path in self.db_paths.items()
+                                   if path == db_path]
+                for _, columns, rows in groups:
+                    key_index = columns.index(db_schema.UNIQUE_KEY)
+                    for statement_type in statement_types:
+                        known = self._known.get(statement_type)
+                        if known is not None:
+                            known.difference_update(row[key_index] for row in rows)
+                    discarded += len(rows)
+            return discarded
+
+    # ===========================================================================
+    # 登録済みファイルの確認
+    # ===========================================================================
+
+    def is_known(self, statement_type: str, file_name: str) -> bool:
+        """
+        そのファイルが既に DB にある（またはこのライターに追加済み）なら True。
+        初回だけ DB から FileName の一覧を読み込み、以降はメモリ上の集合で判定する。
+        """
+        with self._lock:
+            known = self._known.get(statement_type)
+            if known is None:
+                db_path = self.db_paths[statement_type]
+                _, table, _ = _TARGETS[statement_type]
+                conn = self._get_connection(db_path)
+                known = {row[0] for row in conn.execute(f'SELECT {db_schema.UNIQUE_KEY} FROM {table}')}
+                self._known[statement_type] = known
+            return file_name in known
+
+    def latest_public_day(self, code) -> Optional[str]:
+        """その企業の BS / PL で最も新しい PublicDay（'YYYY-MM-DD'、未登録なら None）"""
+        with self._lock:
+            days = []
+            for statement_type, (_, table, _) in _TARGETS.items():
+                conn = self._get_connection(self.db_paths[statement_type])
+                row = conn.execute(f'SELECT MAX(PublicDay) FROM {table} WHERE Code = ?', (str(code),)).fetchone()
+                if row and row[0]:
+                    days.append(row[0])
+            return max(days, default=None)
+
+    def close(self):
+        """残りを書き込んで接続を閉じる（for_company() で作ったものは書き込むだけ）"""
+        with self._lock:
+            if not self._owns_connections:
+                self.flush()
+                return
+            try:
+                self.flush()
+            finally:
+                for conn in self._connections.values():
+                    conn.close()
+                self._connections.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ===========================================================================
+    # 内部ロジック
+    # ===========================================================================
+
+    def _refresh_companies(self, codes):
+        """COMPANIES（BS 側の DB）を集計し直す。失敗しても書き込み済みのデータには影響しない"""
+        try:
+            bs_conn = self._get_connection(self.db_paths['bs'])
+            pl_conn = self._get_connection(self.db_paths['pl'])
+            with bs_conn:
+                companies.refresh(bs_conn, pl_conn, codes)
+        except Exception as e:
+            print(f"[ERROR] COMPANIES の更新に失敗しました: {e}")
+
+    def _get_connection(self, db_path: str):
+        conn = self._connections.get(db_path)
+        if conn is None:
+            targets = [(db_name, table) for statement_type, (db_name, table, _) in _TARGETS.items()
+                       if self.db_paths[statement_type] == db_path]
+            conn = db_schema.connect_writer(db_path, db_name=targets[0][0])
+            for _, table in targets:
+                self._upsert[(db_path, table)] = db_schema.ensure_unique_index(conn, table)
+                db_schema.ensure_query_indexes(conn, table)
+            self._connections[db_path] = conn
+        return conn
@@ -10,6 +10,7 @@ from sc.parser.pl_filename_parser import PlFilenameParser
 from sc.parser import xbrl_pl_common_parser
 from sc.parser.fiscal_year_calculator import FiscalYearCalculator
 import os
+from sc.inserter import DB_TIMEOUT, companies, db_schema, pl_quarterly
 
 
 class PlDBInserter:
@@ -24,14 +25,8 @@ class PlDBInserter:
         self.company_code = parser.get_code()
         print(f"[INFO] 企業コード取得: {self.company_code}")
 
-        # DBパス設定
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        db_dir = os.path.join(current_dir, '../..', 'db')
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir)
-            print(f"[INFO] DBディレクトリ作成: {db_dir}")
-
-        self.DB = os.path.join(db_dir, 'PL_DB.db')
+        # DBパス設定（db フォルダがなければ作成）
+        self.DB = db_schema.get_db_path(db_schema.PL_DB_NAME)
         print(f"[INFO] データベースパス: {self.DB}")
 
     # ============================================================
@@ -125,125 +120,142 @@ class PlDBInserter:
     # ============================================================
     # 5. IFRSレコードの挿入（← 復元 & ログ追加）
     # ============================================================
-    def insert_ifrs_record(self, cursor, metadata, data):
+    def insert_ifrs_record(self, cursor, metadata, data, upsert=False):
         print("[CALL] insert_ifrs_record()")
         print(f"[INFO] metadata={metadata}")
         print(f"[INFO] data={data}")
 
-        cursor.execute('''
-            INSERT INTO PL 
-            (Code, FileName, PublicDay, Period, FiscalYear,
-             RevenueIFRS, SellingGeneralAndAdministrativeExpensesIFRS,
-             OperatingProfitLossIFRS, ProfitLossIFRS, DilutedEarningsLossPerShareIFRS)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            metadata['code'],
-            metadata['filename'],
-            metadata['publicday'],
-            metadata['period'],
-            metadata['fiscal_year'],
-            data['revenue'],
-            data['sga'],
-            data['op'],
-            data['profit'],
-            data['eps']
-        ))
+        self._execute_insert(cursor, *self.record_to_row(
+            {'file_type': 'IFRS', 'metadata': metadata, 'data': data}), upsert=upsert)
 
         print("[RETURN] insert_ifrs_record -> OK")
 
     # ============================================================
     # 6. GAAPレコードの挿入（← 復元 & ログ追加）
     # ============================================================
-    def insert_gaap_record(self, cursor, metadata, data):
+    def insert_gaap_record(self, cursor, metadata, data, upsert=False):
         print("[CALL] insert_gaap_record()")
         print(f"[INFO] metadata={metadata}")
         print(f"[INFO] data={data}")
 
-        cursor.execute('''
-            INSERT INTO PL 
-            (Code, FileName, PublicDay, Period, FiscalYear,
-             NetSales, SellingGeneralAndAdministrativeExpenses,
-             OperatingIncome, OrdinaryIncome, NetIncome)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            metadata['code'],
-            metadata['filename'],
-            metadata['publicday'],
-            metadata['period'],
-            metadata['fiscal_year'],
-            data['netsales'],
-            data['sga'],
-            data['op'],
-            data['ordinary'],
-            data['netincome']
-        ))
+        self._execute_insert(cursor, *self.record_to_row(
+            {'file_type': 'GAAP', 'metadata': metadata, 'data': data}), upsert=upsert)
 
         print("[RETURN] insert_gaap_record -> OK")
 
+    @staticmethod
+    def record_to_row(record):
+        """
+        extract_record() の結果を (テーブル名, カラム名, 値) にする。
+        IFRS と日本GAAP で入れるカラムが異なる。
+        """
+        metadata = record['metadata']
+        data = record['data']
+        columns = ('Code', 'FileName', 'PublicDay', 'Period', 'FiscalYear')
+        values = (metadata['code'], metadata['filename'], metadata['publicday'],
+                  metadata['period'], metadata['fiscal_year'])
+
+        if record['file_type'] == 'IFRS':
+            columns += ('RevenueIFRS', 'SellingGeneralAndAdministrativeExpensesIFRS',
+                        'OperatingProfitLossIFRS', 'ProfitLossIFRS', 'DilutedEarningsLossPerShareIFRS')
+            values += (data['revenue'], data['sga'], data['op'], data['profit'], data['eps'])
+        else:
+            columns += ('NetSales', 'SellingGeneralAndAdministrativeExpenses',
+                        'OperatingIncome', 'OrdinaryIncome', 'NetIncome')
+            values += (data['netsales'], data['sga'], data['op'], data['ordinary'], data['netincome'])
+
+        return 'PL', columns, values
+
+    @staticmethod
+    def _execute_insert(cursor, table, columns, values, upsert=False):
+        # upsert=True なら同じ FileName の行を上書きする
+        cursor.execute(db_schema.build_insert_sql(table, columns, upsert), values)
+
     # ============================================================
     # 7. テーブル作成
     # ============================================================
     def ensure_table_exists(self, cursor):
         print("[CALL] ensure_table_exists()")
 
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS PL (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                Code TEXT,
-                FileName TEXT,
-                PublicDay TEXT,
-                Period TEXT,
-                FiscalYear INTEGER,
-                RevenueIFRS REAL,
-                SellingGeneralAndAdministrativeExpensesIFRS REAL,
-                OperatingProfitLossIFRS REAL,
-                ProfitLossIFRS REAL,
-                DilutedEarningsLossPerShareIFRS REAL,
-                NetSales REAL,
-                SellingGeneralAndAdministrativeExpenses REAL,
-                OperatingIncome REAL,
-                OrdinaryIncome REAL,
-                NetIncome REAL,
-                created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
-                EPS REAL
-            )
-        ''')
+        cursor.execute(db_schema.PL_TABLE_DDL)
+        cursor.execute(pl_quarterly.PL_QUARTERLY_DDL)
 
         print("[INFO] PLテーブル存在確認・作成完了")
 
     # ============================================================
-    # 8. メイン処理（オーケストレーション）
+    # 8. レコード抽出（DB には触らない）
+    # ============================================================
+    def extract_record(self):
+        """
+        PL の1行分のデータを抽出して返す。DB 接続は行わないので、
+        別プロセスで抽出して親プロセスで insert_record() することもできる。
+
+        Returns:
+            {'file_type': 'IFRS' / 'GAAP', 'metadata': dict, 'data': dict}
+            UNKNOWN 形式なら None
+        """
+        print("[CALL] extract_record()")
+
+        metadata = self.collect_metadata()
+        file_type = self.detect_file_type()
+        print(f"[INFO] ファイル形式: {file_type}")
+
+        if file_type == 'UNKNOWN':
+            print(f"[BRANCH] UNKNOWN形式 → スキップ: {metadata['filename']}")
+            return None
+
+        if file_type == 'IFRS':
+            print("[BRANCH] IFRSデータ抽出処理")
+            data = self.extract_ifrs_data()
+        else:
+            print("[BRANCH] GAAPデータ抽出処理")
+            data = self.extract_gaap_data()
+
+        return {'file_type': file_type, 'metadata': metadata, 'data': data}
+
+    # ============================================================
+    # 9. レコード挿入（コミットは呼び出し側）
+    # ============================================================
+    def insert_record(self, cursor, record, upsert=False):
+        print("[CALL] insert_record()")
+
+        if record['file_type'] == 'IFRS':
+            self.insert_ifrs_record(cursor, record['metadata'], record['data'], upsert=upsert)
+        elif record['file_type'] == 'GAAP':
+            self.insert_gaap_record(cursor, record['metadata'], record['data'], upsert=upsert)
+
+    # ============================================================
+    # 10. メイン処理（オーケストレーション）
     # ============================================================
     def insert_to_pl_db(self):
         print("[CALL] insert_to_pl_db()")
 
         conn = None
         try:
-            metadata = self.collect_metadata()
-            file_type = self.detect_file_type()
-            print(f"[INFO] ファイル形式: {file_type}")
-
-            if file_type == 'UNKNOWN':
-                print(f"[BRANCH] UNKNOWN形式 → スキップ: {metadata['filename']}")
+            record = self.extract_record()
+            if record is None:
                 return
 
-            conn = sqlite3.connect(self.DB)
+            conn = sqlite3.connect(self.DB, timeout=DB_TIMEOUT)
             cursor = conn.cursor()
             print("[INFO] DB接続成功")
 
             self.ensure_table_exists(cursor)
-
-            if file_type == 'IFRS':
-                print("[BRANCH] IFRSデータ抽出処理")
-                data = self.extract_ifrs_data()
-                self.insert_ifrs_record(cursor, metadata, data)
-
-            elif file_type == 'GAAP':
-                print("[BRANCH] GAAPデータ抽出処理")
-                data = self.extract_gaap_data()
-                self.insert_gaap_record(cursor, metadata, data)
+            upsert = db_schema.ensure_unique_index(conn, 'PL')
+            db_schema.ensure_query_indexes(conn, 'PL')
+            self.insert_record(cursor, record, upsert=upsert)
+            metadata = record['metadata']
+            pl_quarterly.refresh(conn, [(metadata['code'], metadata['fiscal_year'])])
 
             conn.commit()
+
+            # 企業一覧（BS 側の DB の COMPANIES）を更新
+            bs_conn = sqlite3.connect(db_schema.get_db_path(db_schema.BS_DB_NAME), timeout=DB_TIMEOUT)
+            try:
+                companies.refresh(bs_conn, conn, [metadata['code']])
+                bs_conn.commit()
+            finally:
+                bs_conn.close()
             print("[INFO] コミット完了")
             print("[RETURN] insert_to_pl_db -> 成功")
 
@@ -261,7 +273,6 @@ class PlDBInserter:
                 conn.close()
                 print("[INFO] DB接続クローズ")
 
-
 # ============================================================
 # テスト実行
 # ============================================================
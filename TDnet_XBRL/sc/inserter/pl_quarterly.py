@@ -0,0 +1,161 @@
+# inserter/pl_quarterly.py
+"""
+PL の累計値（Q1〜Q4 の期首からの累計）を四半期ごとの値に直した PL_QUARTERLY テーブルを管理する。
+
+Flask の /api/pl-data は convert_to_quarterly_from_period() で毎回この変換をしていたが、
+取り込み時に計算しておけば 企業コードで範囲を読むだけになる。
+
+- 計算方法は flask_app/app.py の convert_to_quarterly_from_period() と同じ
+  （Q1 はそのまま、Q2 以降は前の四半期との差分、前の四半期がなければ None）
+- 同じ (Code, FiscalYear, Period) の行が複数ある場合は後から登録された行を使う
+- 書き込み時は、登録したファイルの (Code, FiscalYear) だけ計算し直す
+  （PL_QUARTERLY が空のときは全件、PL_QUARTERLY に行のない企業はその企業の全年度を計算する）
+"""
+
+import sqlite3
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# FiscalYear は PL の値をそのまま入れるため型を指定しない（TEXT の DB と INTEGER の DB がある）
+PL_QUARTERLY_DDL = '''CREATE TABLE IF NOT EXISTS PL_QUARTERLY (
+    Code TEXT NOT NULL,
+    FiscalYear NOT NULL,
+    Quarter INTEGER NOT NULL,
+    Period TEXT,
+    PublicDay TEXT,
+    NetSales REAL,
+    OperatingIncome REAL,
+    OrdinaryIncome REAL,
+    NetIncome REAL,
+    SourceId INTEGER,
+    PRIMARY KEY (Code, FiscalYear, Quarter)
+)'''
+
+QUARTERS = {'Q1': 1, 'Q2': 2, 'Q3': 3, 'Q4': 4}
+
+# PL_QUARTERLY のカラム → PL のカラム（日本GAAP の値がなければ IFRS の値を使う）
+METRICS = (
+    ('NetSales', 'NetSales', 'RevenueIFRS'),
+    ('OperatingIncome', 'OperatingIncome', 'OperatingProfitLossIFRS'),
+    ('OrdinaryIncome', 'OrdinaryIncome', None),
+    ('NetIncome', 'NetIncome', 'ProfitLossIFRS'),
+)
+
+
+def _to_number(value) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except Exception:
+        return None
+
+
+def _select_sql() -> str:
+    columns = []
+    for _, primary, fallback in METRICS:
+        columns.append(primary)
+        columns.append(fallback or 'NULL')
+    return (f"SELECT rowid, Period, PublicDay, {', '.join(columns)} FROM PL "
+            f"WHERE Code = ? AND FiscalYear = ? ORDER BY Period, rowid")
+
+
+def compute_quarters(rows: Sequence[tuple]) -> List[tuple]:
+    """
+    1社1年度分の PL の行から四半期ごとの値を計算する。
+
+    Args:
+        rows: (rowid, Period, PublicDay, 指標1, 指標1の代替, ...) を Period, rowid 順に並べたもの
+
+    Returns:
+        [(Quarter, Period, PublicDay, NetSales, OperatingIncome, OrdinaryIncome, NetIncome, SourceId), ...]
+    """
+    by_quarter = {}
+    for row in rows:
+        quarter = QUARTERS.get(row[1])
+        if quarter is None:
+            continue
+        values = []
+        for i, (_, _, fallback) in enumerate(METRICS):
+            value = row[3 + i * 2]
+            if fallback:
+                value = value or row[4 + i * 2]
+            values.append(_to_number(value))
+        by_quarter[quarter] = (row, values)  # 後の行で上書き
+
+    result = []
+    for quarter in sorted(by_quarter):
+        row, current = by_quarter[quarter]
+        if quarter == 1:
+            values = current
+        elif quarter - 1 in by_quarter:
+            previous = by_quarter[quarter - 1][1]
+            values = [None if cur is None or prev is None else cur - prev
+                      for cur, prev in zip(current, previous)]
+        else:
+            values = [None] * len(METRICS)
+        result.append((quarter, row[1], row[2], *values, row[0]))
+    return result
+
+
+def refresh(conn: sqlite3.Connection, keys: Iterable[Tuple[str, object]]) -> int:
+    """
+    指定した (Code, FiscalYear) の PL_QUARTERLY を計算し直し、書き込んだ行数を返す。
+    コミットはしない（呼び出し側のトランザクションに含める）。
+
+    PL_QUARTERLY が空のとき（既存の DB で初めて使うとき）は全件を作り直し、
+    PL_QUARTERLY に行のない企業（この表を作る前に取り込んだ企業）は PL にある全年度を計算する。
+    そうしないと、新しく取り込んだ年度だけが PL_QUARTERLY に入り、アプリで過去の四半期が見えなくなる。
+    """
+    keys = {(code, fiscal_year) for code, fiscal_year in keys if code and fiscal_year}
+    if not keys:
+        return 0
+
+    conn.execute(PL_QUARTERLY_DDL)
+    if conn.execute('SELECT 1 FROM PL_QUARTERLY LIMIT 1').fetchone() is None:
+        return rebuild(conn)
+
+    for code in {code for code, _ in keys}:
+        if conn.execute('SELECT 1 FROM PL_QUARTERLY WHERE Code = ? LIMIT 1', (code,)).fetchone() is None:
+            keys.update(conn.execute('SELECT DISTINCT Code, FiscalYear FROM PL WHERE Code = ?', (code,)).fetchall())
+    return _write(conn, keys)
+
+
+def _write(conn: sqlite3.Connection, keys: Iterable[Tuple[str, object]]) -> int:
+    select_sql = _select_sql()
+    metric_columns = ', '.join(column for column, _, _ in METRICS)
+    insert_sql = (f"INSERT INTO PL_QUARTERLY (Code, FiscalYear, Quarter, Period, PublicDay, {metric_columns}, SourceId) "
+                  f"VALUES ({', '.join('?' * (6 + len(METRICS)))})")
+
+    written = 0
+    for code, fiscal_year in set(keys):
+        if not code or not fiscal_year:
+            continue
+
+        # 書き込んだ値（2014）と PL に入っている値（'2014'）の型が違うことがあるので、PL 側の値を使う
+        stored = conn.execute('SELECT FiscalYear FROM PL WHERE Code = ? AND FiscalYear = ? LIMIT 1',
+                              (code, fiscal_year)).fetchone()
+        if stored is not None:
+            fiscal_year = stored[0]
+        conn.execute('DELETE FROM PL_QUARTERLY WHERE Code = ? AND FiscalYear = ?', (code, fiscal_year))
+        if stored is None:
+            continue
+
+        quarters = compute_quarters(conn.execute(select_sql, (code, fiscal_year)).fetchall())
+        conn.executemany(insert_sql, [(code, fiscal_year, *quarter) for quarter in quarters])
+        written += len(quarters)
+    return written
+
+
+def refresh_rows(conn: sqlite3.Connection, columns: Sequence[str], rows: Iterable[Sequence]) -> int:
+    """PL に書き込んだ行（columns 順の値）に含まれる (Code, FiscalYear) を計算し直す"""
+    code_index = columns.index('Code')
+    year_index = columns.index('FiscalYear')
+    return refresh(conn, ((row[code_index], row[year_index]) for row in rows))
+
+
+def rebuild(conn: sqlite3.Connection) -> int:
+    """PL_QUARTERLY を全件作り直す（コミットはしない）"""
+    conn.execute(PL_QUARTERLY_DDL)
+    conn.execute('DELETE FROM PL_QUARTERLY')
+    keys = conn.execute('SELECT DISTINCT Code, FiscalYear FROM PL').fetchall()
+    return _write(conn, keys)
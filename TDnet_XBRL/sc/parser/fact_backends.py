@@ -0,0 +1,420 @@
+# parser/fact_backends.py
+"""
+iXBRL ファイルから ix:* ファクトを取り出す「バックエンド」を集めたモジュール。
+
+- LxmlFactBackend : lxml.etree.iterparse で文書を1回だけストリーム処理する（既定）
+- Bs4FactBackend  : 従来どおり BeautifulSoup(html.parser) で木を作る（比較・フォールバック用）
+- RegexFactBackend: mmap したファイルをバイト列の正規表現で走査する（木を作らない高速版）
+
+どのバックエンドも同じ Fact / context のリストを返すため、
+XbrlDocument からは差し替えて使える。結果の比較は __main__ を参照。
+"""
+
+import html
+import mmap
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+# 抽出ロジック（Fact の内容）を変えたら上げる。パースキャッシュのキーに使う
+PARSER_VERSION = "2"
+
+# (id, instant, endDate)
+Context = Tuple[str, Optional[str], Optional[str]]
+
+IX_NAMESPACES = (
+    'http://www.xbrl.org/2008/inlineXBRL',   # iXBRL 1.0
+    'http://www.xbrl.org/2013/inlineXBRL',   # iXBRL 1.1
+)
+XBRLI_NAMESPACE = 'http://www.xbrl.org/2003/instance'
+
+
+class Fact:
+    """
+    ix:nonFraction / ix:nonNumeric 1件分のファクト。
+    BeautifulSoup の Tag と同じく get('decimals') / .text で値を読めるため、
+    extract_value_from_tag() などの既存ユーティリティにそのまま渡せる。
+    """
+
+    __slots__ = ('kind', 'name', 'contextref', 'decimals', 'scale', 'sign', 'format', 'text')
+
+    # get() で参照できる属性
+    ATTRIBUTES = ('name', 'contextref', 'decimals', 'scale', 'sign', 'format')
+
+    def __init__(self, kind, name, contextref=None, decimals=None, scale=None,
+                 sign=None, format=None, text=''):
+        self.kind = kind    # 'nonFraction' or 'nonNumeric'
+        self.name = name
+        self.contextref = contextref
+        self.decimals = decimals
+        self.scale = scale
+        self.sign = sign
+        self.format = format
+        self.text = text
+
+    def get(self, key, default=None):
+        """Tag.get() 互換（属性名の大文字小文字は区別しない）"""
+        key = key.lower()
+        if key not in self.ATTRIBUTES:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def as_tuple(self):
+        return (self.kind, self.name, self.contextref, self.decimals,
+                self.scale, self.sign, self.format, self.text)
+
+    def __repr__(self):
+        return f"Fact({self.kind}, {self.name!r}, contextref={self.contextref!r}, text={self.text!r})"
+
+
+class FactBackend(ABC):
+    """
+    ファクト抽出バックエンドの抽象基底クラス。
+    """
+
+    name = ''
+
+    # 文書内の全ファクトを取り出せるか。
+    # False のバックエンドでは、見つからないファクトを XbrlDocument が完全なパーサーで探し直す
+    complete = True
+
+    @abstractmethod
+    def extract(self, document) -> Tuple[List[Fact], List[Context]]:
+        """
+        document（XbrlDocument）の内容からファクトと context を抽出する。
+        ファクトは文書内の出現順で返す。
+
+        Args:
+            document: XbrlDocument（read_bytes() / open_binary() / text を持つ）
+        """
+        pass
+
+
+# ===========================================================================
+# BeautifulSoup（従来方式）
+# ===========================================================================
+
+class Bs4FactBackend(FactBackend):
+    """
+    BeautifulSoup(html.parser) で文書全体の木を作る従来方式。
+    作成した soup は表形式フォールバック用に document へ渡して再利用する。
+    """
+
+    name = 'bs4'
+
+    def extract(self, document):
+        soup = BeautifulSoup(document.text, 'html.parser')
+        document.soup = soup
+
+        facts = []
+        for tag in soup.find_all(['ix:nonfraction', 'ix:nonnumeric']):
+            name = tag.get('name')
+            if not name:
+                continue
+            facts.append(Fact(
+                kind='nonFraction' if tag.name == 'ix:nonfraction' else 'nonNumeric',
+                name=name,
+                contextref=tag.get('contextref'),
+                decimals=tag.get('decimals'),
+                scale=tag.get('scale'),
+                sign=tag.get('sign'),
+                format=tag.get('format'),
+                text=tag.text,
+            ))
+
+        contexts = []
+        for ctx in soup.find_all(re.compile(r'(^|:)context$')):
+            instant = ctx.find(re.compile(r'(^|:)instant$'))
+            end_date = ctx.find(re.compile(r'(^|:)enddate$'))
+            contexts.append((
+                ctx.get('id', ''),
+                instant.text.strip() if instant is not None and instant.text else None,
+                end_date.text.strip() if end_date is not None and end_date.text else None,
+            ))
+
+        return facts, contexts
+
+
+# ===========================================================================
+# lxml（ストリーム処理）
+# ===========================================================================
+
+class LxmlFactBackend(FactBackend):
+    """
+    lxml.etree.iterparse で文書を先頭から1回だけ読み、ix:* ファクトと
+    xbrli:context だけを取り出す。処理済みの要素はその場で clear() するため、
+    ファイルが大きくてもメモリ使用量は抑えられる。
+
+    iXBRL は XHTML（整形式 XML）なので XML として読む。
+    整形式でないファイルは XbrlDocument 側で bs4 にフォールバックする。
+    """
+
+    name = 'lxml'
+
+    def extract(self, document):
+        from lxml import etree
+
+        facts = []
+        contexts = []
+
+        # ファクト / context の内側にいる深さ（内側の要素は読み終わるまで消さない）
+        keep_depth = 0
+
+        with document.open_binary() as f:
+            for event, element in etree.iterparse(f, events=('start', 'end'), huge_tree=True):
+                tag = element.tag
+                if not isinstance(tag, str):
+                    # コメント・処理命令
+                    continue
+
+                namespace, local_name = _split_tag(tag)
+                is_fact = namespace in IX_NAMESPACES and local_name in ('nonFraction', 'nonNumeric')
+                is_context = namespace == XBRLI_NAMESPACE and local_name == 'context'
+
+                if event == 'start':
+                    if is_fact or is_context:
+                        keep_depth += 1
+                    continue
+
+                if is_fact:
+                    keep_depth -= 1
+                    name = element.get('name')
+                    if name:
+                        facts.append(Fact(
+                            kind=local_name,
+                            name=name,
+                            contextref=element.get('contextRef'),
+                            decimals=element.get('decimals'),
+                            scale=element.get('scale'),
+                            sign=element.get('sign'),
+                            format=element.get('format'),
+                            text=''.join(element.itertext()),
+                        ))
+
+                elif is_context:
+                    keep_depth -= 1
+                    contexts.append((
+                        element.get('id', ''),
+                        _strip(element.findtext(f'.//{{{XBRLI_NAMESPACE}}}instant')),
+                        _strip(element.findtext(f'.//{{{XBRLI_NAMESPACE}}}endDate')),
+                    ))
+
+                if keep_depth == 0:
+                    # 読み終わった要素と、その前の兄弟要素を解放する
+                    element.clear()
+                    parent = element.getparent()
+                    if parent is not None:
+                        while element.getprevious() is not None:
+                            del parent[0]
+
+        return facts, contexts
+
+
+def _split_tag(tag: str) -> Tuple[str, str]:
+    """'{namespace}local' → ('namespace', 'local')"""
+    if tag[0] == '{':
+        namespace, _, local_name = tag[1:].partition('}')
+        return namespace, local_name
+    return '', tag
+
+
+def _strip(text: Optional[str]) -> Optional[str]:
+    if not text:
+        return None
+    return text.strip()
+
+
+# ===========================================================================
+# 正規表現スキャナ（高速版）
+# ===========================================================================
+
+# ix:nonFraction / ix:nonNumeric の開始タグ〜終了タグ（自己終了タグも含む）
+_FACT_PATTERNS = {
+    kind: re.compile(
+        rb'<(?P<prefix>[A-Za-z_][\w.-]*):' + kind.encode() +
+        rb'\b(?P<attrs>[^>]*?)(?:/>|>(?P<body>.*?)</(?P=prefix):' + kind.encode() + rb'\s*>)',
+        re.DOTALL,
+    )
+    for kind in ('nonFraction', 'nonNumeric')
+}
+_CONTEXT_PATTERN = re.compile(
+    rb'<(?P<prefix>[A-Za-z_][\w.-]*):context\b(?P<attrs>[^>]*)>(?P<body>.*?)</(?P=prefix):context\s*>',
+    re.DOTALL,
+)
+_ATTRIBUTE_PATTERN = re.compile(rb'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+_INSTANT_PATTERN = re.compile(rb'<[\w.-]+:instant\b[^>]*>([^<]*)<')
+_END_DATE_PATTERN = re.compile(rb'<[\w.-]+:endDate\b[^>]*>([^<]*)<')
+_TAG_PATTERN = re.compile(rb'<[^>]*>')
+# ファクトの本文中に現れる、入れ子のファクトの開始タグ
+_NESTED_FACT_PATTERN = re.compile(rb'<[A-Za-z_][\w.-]*:non(?:Numeric|Fraction)\b')
+
+
+class RegexFactBackend(FactBackend):
+    """
+    ファイルを mmap し、ix:nonFraction / ix:nonNumeric / xbrli:context を
+    プリコンパイル済みのバイト列正規表現で直接取り出す。
+    DOM を作らず、ファイル全体の文字列デコードも行わない。
+
+    入れ子の ix:nonNumeric（テキストブロック内のテキストブロック等）は、正規表現が内側の終了タグで
+    止まって本文の途中までしか取れない。本文中に入れ子のファクトの開始タグがあるファクトは
+    （内側のファクトごと）見つからなかったことにし、complete = False なので
+    XbrlDocument が完全なパーサーで探し直す。
+    """
+
+    name = 'regex'
+    complete = False
+
+    def extract(self, document):
+        with document.open_binary() as f:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # 空ファイル / ファイル以外（メモリ上のデータ等）
+                buffer = f.read()
+
+            try:
+                return self._scan(buffer)
+            finally:
+                if isinstance(buffer, mmap.mmap):
+                    buffer.close()
+
+    def _scan(self, buffer):
+        facts = []
+        for kind, pattern in _FACT_PATTERNS.items():
+            for match in pattern.finditer(buffer):
+                body = match.group('body')
+                if body and _NESTED_FACT_PATTERN.search(body):
+                    # 途中で切れた値を返さない
+                    continue
+                attrs = _parse_attributes(match.group('attrs'))
+                name = attrs.get('name')
+                if not name:
+                    continue
+                facts.append((match.start(), Fact(
+                    kind=kind,
+                    name=name,
+                    contextref=attrs.get('contextref'),
+                    decimals=attrs.get('decimals'),
+                    scale=attrs.get('scale'),
+                    sign=attrs.get('sign'),
+                    format=attrs.get('format'),
+                    text=_inner_text(body),
+                )))
+        # 文書内の出現順に並べ直す
+        facts.sort(key=lambda item: item[0])
+
+        contexts = []
+        for match in _CONTEXT_PATTERN.finditer(buffer):
+            attrs = _parse_attributes(match.group('attrs'))
+            body = match.group('body')
+            instant = _INSTANT_PATTERN.search(body)
+            end_date = _END_DATE_PATTERN.search(body)
+            contexts.append((
+                attrs.get('id', ''),
+                _strip(_decode(instant.group(1))) if instant else None,
+                _strip(_decode(end_date.group(1))) if end_date else None,
+            ))
+
+        return [fact for _, fact in facts], contexts
+
+
+def _decode(raw: bytes) -> str:
+    return html.unescape(raw.decode('utf-8', errors='replace'))
+
+
+def _parse_attributes(raw: bytes) -> Dict[str, str]:
+    """開始タグの属性を {小文字の属性名: 値} にする"""
+    attrs = {}
+    for key, double_quoted, single_quoted in _ATTRIBUTE_PATTERN.findall(raw):
+        value = double_quoted if double_quoted or not single_quoted else single_quoted
+        attrs.setdefault(key.decode('ascii', errors='replace').lower(), _decode(value))
+    return attrs
+
+
+def _inner_text(body: Optional[bytes]) -> str:
+    """開始タグと終了タグの間からタグを除いた文字列"""
+    if not body:
+        return ''
+    return _decode(_TAG_PATTERN.sub(b'', body))
+
+
+# ===========================================================================
+# バックエンドの選択
+# ===========================================================================
+
+_BACKENDS: Dict[str, FactBackend] = {
+    Bs4FactBackend.name: Bs4FactBackend(),
+    LxmlFactBackend.name: LxmlFactBackend(),
+    RegexFactBackend.name: RegexFactBackend(),
+}
+
+# lxml で読めない（整形式でない）ファイルの再解析用
+FALLBACK_BACKEND = Bs4FactBackend.name
+
+# complete = False のバックエンドで見つからなかったファクトを探し直す完全なパーサー
+FULL_BACKEND = LxmlFactBackend.name
+
+
+def get_backend(name: str) -> FactBackend:
+    """名前（'lxml' / 'bs4' / 'regex'）からバックエンドを取得する"""
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown parser backend: {name} (choices: {sorted(_BACKENDS)})")
+    return _BACKENDS[name]
+
+
+def available_backends() -> List[str]:
+    return sorted(_BACKENDS)
+
+
+# ===========================================================================
+# バックエンド間の比較
+# ===========================================================================
+
+def compare_backends(xbrl_path: str, left: str = 'lxml', right: str = 'bs4') -> List[str]:
+    """
+    2つのバックエンドで同じファイルを解析し、ファクトの差分を返す。
+    差分がなければ空リスト。
+    """
+    from sc.parser.xbrl_document import XbrlDocument
+
+    left_doc = XbrlDocument(xbrl_path, backend=left)
+    right_doc = XbrlDocument(xbrl_path, backend=right)
+
+    differences = []
+    for label, l_index, r_index in (
+            ('nonFraction', left_doc.non_fractions, right_doc.non_fractions),
+            ('nonNumeric', left_doc.non_numerics, right_doc.non_numerics),
+    ):
+        for key in sorted(set(l_index) | set(r_index), key=str):
+            l_fact = l_index.get(key)
+            r_fact = r_index.get(key)
+            l_value = l_fact.as_tuple() if l_fact else None
+            r_value = r_fact.as_tuple() if r_fact else None
+            if l_value != r_value:
+                differences.append(f"[{label}] {key}: {left}={l_value} / {right}={r_value}")
+
+    if left_doc.contexts != right_doc.contexts:
+        differences.append(f"[context] {left}={left_doc.contexts} / {right}={right_doc.contexts}")
+
+    return differences
+
+
+if __name__ == '__main__':
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description='2つのバックエンドのファクト抽出結果を比較する')
+    arg_parser.add_argument('paths', nargs='*', default=[
+        r"E:\Zip_files\4612\0102010-acbs03-tse-acediffr-46120-2024-12-31-01-2025-02-14-ixbrl.htm"
+    ])
+    arg_parser.add_argument('--left', default='lxml', choices=available_backends())
+    arg_parser.add_argument('--right', default='bs4', choices=available_backends())
+    args = arg_parser.parse_args()
+
+    for xbrl_path in args.paths:
+        diffs = compare_backends(xbrl_path, left=args.left, right=args.right)
+        print(f"{xbrl_path}: 差分 {len(diffs)}件")
+        for line in diffs:
+            print(f"  {line}")
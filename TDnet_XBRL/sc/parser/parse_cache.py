@@ -0,0 +1,173 @@
+# parser/parse_cache.py
+"""
+iXBRL ファイルの解析結果（ファクト・context）をディスクに保存する永続キャッシュ。
+
+キーは「ファイル内容の SHA-256」と「パーサーバージョン」。
+同じ内容のファイルは場所・ファイル名が変わっても再解析せずに済み、
+抽出ロジックを変えて PARSER_VERSION を上げると、古いバージョンの
+エントリだけがヒットしなくなる（prune_stale() で削除）。
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sc.parser.fact_backends import Context, Fact, PARSER_VERSION, available_backends
+
+
+def default_cache_path() -> Path:
+    """既定のキャッシュファイル（db/PARSE_CACHE.db）"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return Path(current_dir).parent.parent / 'db' / 'PARSE_CACHE.db'
+
+
+def cache_version(backend: str) -> str:
+    """キャッシュのバージョン文字列（バックエンドごとに別エントリ）"""
+    return f"{PARSER_VERSION}-{backend}"
+
+
+def sha256_of(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ParseCache:
+    """
+    SQLite に解析結果を保存するキャッシュ。
+    1つの接続をロックで守り、スレッド間で共有できるようにしている。
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                sha256 TEXT NOT NULL,
+                parser_version TEXT NOT NULL,
+                file_name TEXT,
+                payload BLOB NOT NULL,
+                created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+                PRIMARY KEY (sha256, parser_version)
+            )
+        ''')
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    # ===========================================================================
+    # 取得 / 保存
+    # ===========================================================================
+
+    def get(self, sha256: str, version: str) -> Optional[Tuple[List[Fact], List[Context]]]:
+        """キャッシュ済みのファクトと context を返す。なければ None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT payload FROM parse_cache WHERE sha256 = ? AND parser_version = ?',
+                (sha256, version)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        payload = json.loads(zlib.decompress(row[0]).decode('utf-8'))
+        facts = [Fact(*values) for values in payload['facts']]
+        contexts = [tuple(values) for values in payload['contexts']]
+        return facts, contexts
+
+    def put(self, sha256: str, version: str, file_name: str,
+            facts: List[Fact], contexts: List[Context]):
+        """解析結果を保存する（同じキーがあれば上書き）"""
+        payload = {
+            'facts': [fact.as_tuple() for fact in facts],
+            'contexts': [list(context) for context in contexts],
+        }
+        blob = zlib.compress(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO parse_cache (sha256, parser_version, file_name, payload) '
+                'VALUES (?, ?, ?, ?)',
+                (sha256, version, file_name, blob)
+            )
+            self._conn.commit()
+
+    # ===========================================================================
+    # メンテナンス
+    # ===========================================================================
+
+    def prune_stale(self) -> int:
+        """現在の PARSER_VERSION 以外のエントリを削除し、削除件数を返す"""
+        current = [cache_version(backend) for backend in available_backends()]
+        placeholders = ','.join('?' * len(current))
+
+        with self._lock:
+            cursor = self._conn.execute(
+                f'DELETE FROM parse_cache WHERE parser_version NOT IN ({placeholders})',
+                current
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM parse_cache').fetchone()[0]
+        return {'entries': entries, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ===========================================================================
+# 共有インスタンス
+# ===========================================================================
+
+_instances: Dict[str, ParseCache] = {}
+_instances_lock = threading.Lock()
+
+
+def get_parse_cache(db_path: Optional[Path] = None) -> ParseCache:
+    """
+    パスごとに1つの ParseCache を返す。
+    初めて開いたときに古いバージョンのエントリを削除する。
+    """
+    db_path = Path(db_path or default_cache_path())
+    key = str(db_path.resolve())
+
+    with _instances_lock:
+        cache = _instances.get(key)
+        if cache is None:
+            cache = ParseCache(db_path)
+            removed = cache.prune_stale()
+            if removed:
+                print(f"[INFO] パースキャッシュ: 古いバージョンのエントリを {removed}件 削除しました")
+            _instances[key] = cache
+        return cache
+
+
+def forget_instances():
+    """
+    共有インスタンスを閉じずに忘れる（fork した子プロセスで、親の接続とロックを使わないようにする）。
+    接続は親プロセスのものなので閉じない。
+    """
+    global _instances, _instances_lock
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+
+if __name__ == '__main__':
+    cache = get_parse_cache()
+    print(f"キャッシュ: {cache.db_path}")
+    print(f"状態: {cache.stats()}")
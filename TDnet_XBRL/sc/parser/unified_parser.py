@@ -1,7 +1,10 @@
 # parser/unified_parser.py
 
 from pathlib import Path
+from typing import List, Optional, Tuple
 from sc.parser.base_parser import XBRLParser
+from sc.parser.parse_cache import ParseCache
+from sc.parser.xbrl_document import XbrlDocument
 
 
 class UnifiedXBRLParser(XBRLParser):
@@ -11,6 +14,17 @@ class UnifiedXBRLParser(XBRLParser):
     正しい recorder / inserter を呼び出す責務を持つ。
     """
 
+    def __init__(self, backend: Optional[str] = None, parse_cache: Optional[ParseCache] = None):
+        """
+        Args:
+            backend: ファクト抽出バックエンド（'lxml' / 'bs4' / 'regex'）。None なら既定値のまま
+            parse_cache: 永続パースキャッシュ。None ならキャッシュ設定を変更しない
+        """
+        if backend:
+            XbrlDocument.set_default_backend(backend)
+        if parse_cache is not None:
+            XbrlDocument.set_parse_cache(parse_cache)
+
     def parse(self, file_path: str):
         """
         XBRL ファイルをパース（メモリ上にデータ抽出）
@@ -24,21 +38,76 @@ class UnifiedXBRLParser(XBRLParser):
         else:
             raise ValueError(f"Unknown statement type: {file_path}")
 
-    def save_to_db(self, file_path: str):
+    def save_to_db(self, file_path: str, writer=None):
         """
-        パース済みデータを DB に保存
+        パース済みデータを DB に保存。
+        writer（DBWriter）を渡した場合はレコードを溜めるだけで、書き込みは writer.flush() で行う。
         """
         statement_type = self._detect_statement_type(file_path)
 
-        if statement_type == "bs":
+        if writer is not None:
+            self._add_to_writer(file_path, statement_type, writer)
+        elif statement_type == "bs":
             self._save_bs_to_db(file_path)
         elif statement_type == "pl":
             self._save_pl_to_db(file_path)
 
+    def extract_record(self, file_path: str) -> Tuple[str, Optional[dict]]:
+        """
+        DB に保存する1行分のデータを抽出する（DB には触らない）。
+        プロセスプールのワーカーから呼ばれ、結果は親プロセスで save_records() に渡す。
+
+        Returns:
+            (statement_type, record)。保存対象がなければ record は None
+        """
+        statement_type = self._detect_statement_type(file_path)
+
+        if statement_type == "bs":
+            from sc.inserter.bs_db_inserter import BsDBInserter
+            return statement_type, BsDBInserter(file_path).extract_record()
+        elif statement_type == "pl":
+            from sc.inserter.pl_db_inserter import PlDBInserter
+            return statement_type, PlDBInserter(file_path).extract_record()
+
+        raise ValueError(f"Unknown statement type: {file_path}")
+
+    def save_records(self, results: List[Tuple[str, str, Optional[dict]]], writer=None):
+        """
+        extract_record() の結果 (file_path, statement_type, record) を順番どおりに保存する。
+        writer（DBWriter）を渡せばそれに溜めて flush し、なければ一時的な DBWriter を使う。
+        """
+        from sc.inserter.db_writer import DBWriter
+
+        own_writer = writer is None
+        if own_writer:
+            writer = DBWriter()
+        try:
+            for file_path, statement_type, record in results:
+                writer.add(statement_type, record)
+            writer.flush()
+        finally:
+            if own_writer:
+                writer.close()
+
     # ===========================================================================
     # 内部ロジック
     # ===========================================================================
 
+    def _add_to_writer(self, file_path: str, statement_type: str, writer):
+        if statement_type == "pl":
+            # insert_to_pl_db() と同じく、PL の抽出エラーはそのファイルだけスキップする
+            try:
+                _, record = self.extract_record(file_path)
+            except Exception as e:
+                print(f"[ERROR] PLデータ抽出中に例外: {e}")
+                import traceback
+                traceback.print_exc()
+                return
+        else:
+            _, record = self.extract_record(file_path)
+
+        writer.add(statement_type, record)
+
     @staticmethod
     def _detect_statement_type(file_path: str) -> str:
         """
@@ -1,13 +1,11 @@
-from bs4 import BeautifulSoup
+from sc.parser.xbrl_document import XbrlDocument
 
 
 # 会社名を取得する関数
 def get_company_name(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
-        element = soup.find("ix:nonnumeric", attrs={"name": "jpdei_cor:FilerNameInJapaneseDEI"})
+        document = XbrlDocument.load(xbrl_path)
+        element = document.get_non_numeric("jpdei_cor:FilerNameInJapaneseDEI")
 
         if element is None:
             print(f"警告: {xbrl_path} で会社名が見つかりませんでした。")
@@ -22,10 +20,8 @@ def get_company_name(xbrl_path):
 # 決算開始日を取得する関数
 def get_CurrentFiscalYearStartDateDEI(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
-        element = soup.find("ix:nonnumeric", attrs={"name": "jpdei_cor:CurrentFiscalYearStartDateDEI"})
+        document = XbrlDocument.load(xbrl_path)
+        element = document.get_non_numeric("jpdei_cor:CurrentFiscalYearStartDateDEI")
 
         if element is None:
             print(f"警告: {xbrl_path} で決算開始日が見つかりませんでした。")
@@ -40,10 +36,8 @@ def get_CurrentFiscalYearStartDateDEI(xbrl_path):
 # 決算終了日を取得する関数
 def get_CurrentPeriodEndDateDEI(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
-        element = soup.find("ix:nonnumeric", attrs={"name": "jpdei_cor:CurrentPeriodEndDateDEI"})
+        document = XbrlDocument.load(xbrl_path)
+        element = document.get_non_numeric("jpdei_cor:CurrentPeriodEndDateDEI")
 
         if element is None:
             print(f"警告: {xbrl_path} で決算終了日が見つかりませんでした。")
@@ -58,10 +52,8 @@ def get_CurrentPeriodEndDateDEI(xbrl_path):
 # 決算タイプを取得する関数
 def get_TypeOfCurrentPeriodDEI(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
-        element = soup.find("ix:nonnumeric", attrs={"name": "jpdei_cor:TypeOfCurrentPeriodDEI"})
+        document = XbrlDocument.load(xbrl_path)
+        element = document.get_non_numeric("jpdei_cor:TypeOfCurrentPeriodDEI")
 
         if element is None:
             print(f"警告: {xbrl_path} で決算タイプが見つかりませんでした。")
@@ -76,20 +68,18 @@ def get_TypeOfCurrentPeriodDEI(xbrl_path):
 # 会計の形式を取得する関数
 def get_AccountingStandard(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
         # 複数のパターンを試す
-        element = soup.find("ix:nonnumeric", attrs={"name": "jpdei_cor:AccountingStandardsDEI"})
+        element = document.get_non_numeric("jpdei_cor:AccountingStandardsDEI")
 
         if element is None:
             # 別の属性名を試す
-            element = soup.find("ix:nonnumeric", attrs={"name": "jpdei_cor:AccountingStandardDEI"})
+            element = document.get_non_numeric("jpdei_cor:AccountingStandardDEI")
 
         if element is None:
             # さらに別のパターン（古いバージョン）
-            element = soup.find("jpdei_cor:AccountingStandardsDEI")
+            element = document.soup.find("jpdei_cor:AccountingStandardsDEI")
 
         if element is None:
             print(f"警告: {xbrl_path} で会計基準が見つかりませんでした。デフォルト値(Japan GAAP)を使用します。")
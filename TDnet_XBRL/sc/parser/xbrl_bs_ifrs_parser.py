@@ -1,4 +1,3 @@
-from bs4 import BeautifulSoup
 import os
 import sys
 
@@ -6,17 +5,16 @@ import sys
 current_dir = os.path.dirname(os.path.abspath(__file__))
 utils_dir = os.path.join(current_dir, '..', 'utils')
 sys.path.insert(0, utils_dir)
-from sc.utils.xbrl_utils import find_tag_with_flexible_context, extract_value_from_tag
+from sc.utils.xbrl_utils import extract_value_from_tag
+from sc.parser.xbrl_document import XbrlDocument
 
 
 # 現金同等額(億円)を取得する関数
 def get_CashAndCashEquivalent(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jpigp_cor:CashAndCashEquivalentsIFRS", context_type='instant')
+        tag = document.find_fact("jpigp_cor:CashAndCashEquivalentsIFRS", context_type='instant')
         return extract_value_from_tag(tag, xbrl_path, "CashAndCashEquivalent")
 
     except Exception as e:
@@ -27,11 +25,9 @@ def get_CashAndCashEquivalent(xbrl_path):
 # 流動資産合計を取得する関数
 def get_CurrentAssets(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jpigp_cor:CurrentAssetsIFRS", context_type='instant')
+        tag = document.find_fact("jpigp_cor:CurrentAssetsIFRS", context_type='instant')
         return extract_value_from_tag(tag, xbrl_path, "CurrentAssets")
 
     except Exception as e:
@@ -42,11 +38,9 @@ def get_CurrentAssets(xbrl_path):
 # 有形固定資産を取得する関数
 def get_PropertyPlantAndEquipment(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jpigp_cor:PropertyPlantAndEquipmentIFRS", context_type='instant')
+        tag = document.find_fact("jpigp_cor:PropertyPlantAndEquipmentIFRS", context_type='instant')
         return extract_value_from_tag(tag, xbrl_path, "PropertyPlantAndEquipment")
 
     except Exception as e:
@@ -57,11 +51,9 @@ def get_PropertyPlantAndEquipment(xbrl_path):
 # 非流動資産合計を取得する関数
 def get_NonCurrentAssets(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jpigp_cor:NonCurrentAssetsIFRS", context_type='instant')
+        tag = document.find_fact("jpigp_cor:NonCurrentAssetsIFRS", context_type='instant')
         return extract_value_from_tag(tag, xbrl_path, "NonCurrentAssets")
 
     except Exception as e:
@@ -72,11 +64,9 @@ def get_NonCurrentAssets(xbrl_path):
 # 資産合計を取得する関数
 def get_Assets(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jpigp_cor:AssetsIFRS", context_type='instant')
+        tag = document.find_fact("jpigp_cor:AssetsIFRS", context_type='instant')
         return extract_value_from_tag(tag, xbrl_path, "Assets")
 
     except Exception as e:
@@ -87,11 +77,9 @@ def get_Assets(xbrl_path):
 # 利益剰余金を取得する関数
 def get_RetainedEarningsIFRS(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jpigp_cor:RetainedEarningsIFRS", context_type='instant')
+        tag = document.find_fact("jpigp_cor:RetainedEarningsIFRS", context_type='instant')
         return extract_value_from_tag(tag, xbrl_path, "RetainedEarningsIFRS")
 
     except Exception as e:
@@ -102,11 +90,9 @@ def get_RetainedEarningsIFRS(xbrl_path):
 # 資本合計を取得する関数
 def get_EquityIFRS(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jpigp_cor:EquityIFRS", context_type='instant')
+        tag = document.find_fact("jpigp_cor:EquityIFRS", context_type='instant')
         return extract_value_from_tag(tag, xbrl_path, "EquityIFRS")
 
     except Exception as e:
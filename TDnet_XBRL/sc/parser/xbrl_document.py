@@ -0,0 +1,284 @@
+# parser/xbrl_document.py
+"""
+iXBRL ファイルを 1 回だけ解析し、ファクト索引として保持するモジュール。
+
+これまでは getter（get_Assets など）が呼ばれるたびにファイルを開き直し、
+BeautifulSoup の木を作り直していた（BS 1 ファイルで約15回）。
+XbrlDocument.load() は同じファイルに対して解析済みの索引を返すため、
+各 getter / inserter は 1 回の解析結果を共有できる。
+
+ファクトの抽出方法は fact_backends.py のバックエンドで切り替えられる（既定は lxml）。
+高速な regex バックエンドで見つからないファクトは、完全なパーサー（lxml）で探し直す。
+パースキャッシュ（parse_cache.py）を設定すると、内容が同じファイルは再解析しない。
+ZIP 内のファイルは仮想パス（zip_reader.py）を渡せば、解凍せずに直接読む。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from sc.fileio import zip_reader
+from sc.parser.fact_backends import Context, Fact, FALLBACK_BACKEND, FULL_BACKEND, get_backend
+from sc.parser.parse_cache import cache_version, sha256_of
+from sc.utils.xbrl_utils import get_contextref_candidates
+
+
+class XbrlDocument:
+    """
+    1つの iXBRL ファイルの解析結果（ファクト索引）を保持するクラス。
+
+    - non_fractions: (name, contextref) → Fact （ix:nonFraction）
+    - non_numerics : (name, contextref) → Fact （ix:nonNumeric、DEI を含む）
+    - contexts     : xbrli:context の (id, instant, endDate) のリスト
+
+    同じキーが複数ある場合は文書内で最初に出現したものを保持する
+    （soup.find() と同じ結果になる）。
+    """
+
+    # 同時に保持する解析済みドキュメント数
+    CACHE_SIZE = 4
+
+    # 既定のバックエンド（set_default_backend() で変更）
+    default_backend = 'lxml'
+
+    # 永続パースキャッシュ（set_parse_cache() で設定。None なら使わない）
+    parse_cache = None
+
+    _cache: "OrderedDict[Tuple[str, str], Tuple[tuple, XbrlDocument]]" = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, xbrl_path: str, backend: Optional[str] = None):
+        self.xbrl_path = xbrl_path
+        self.backend = backend or self.default_backend
+
+        self.non_fractions: Dict[Tuple[str, str], Fact] = {}
+        self.non_numerics: Dict[Tuple[str, str], Fact] = {}
+        self.contexts: List[Context] = []
+
+        # contextref を問わず name だけで引く場合の索引（最終手段用）
+        self._first_non_fraction: Dict[str, Fact] = {}
+        self._first_non_numeric: Dict[str, Fact] = {}
+
+        self._text: Optional[str] = None
+        self._soup: Optional[BeautifulSoup] = None
+
+        # 部分的なバックエンド（regex）で見つからなかった場合に使う完全な解析結果
+        self._full_document: Optional[XbrlDocument] = None
+
+        self._build_index()
+
+    # ===========================================================================
+    # 読み込み（キャッシュ付き）
+    # ===========================================================================
+
+    @classmethod
+    def load(cls, xbrl_path: str, backend: Optional[str] = None) -> "XbrlDocument":
+        """
+        解析済みドキュメントを返す。
+        同じファイル（更新日時・サイズが同じ）なら再解析しない。
+        """
+        backend = backend or cls.default_backend
+        key = (os.path.abspath(xbrl_path), backend)
+        signature = cls._signature(xbrl_path)
+
+        with cls._cache_lock:
+            cached = cls._cache.get(key)
+            if cached and cached[0] == signature:
+                cls._cache.move_to_end(key)
+                return cached[1]
+
+        document = cls(xbrl_path, backend=backend)
+
+        with cls._cache_lock:
+            cls._cache[key] = (signature, document)
+            cls._cache.move_to_end(key)
+            while len(cls._cache) > cls.CACHE_SIZE:
+                cls._cache.popitem(last=False)
+
+        return document
+
+    @staticmethod
+    def _signature(xbrl_path: str) -> tuple:
+        """再解析が必要かどうかの判定に使う値（更新日時・サイズ）"""
+        if zip_reader.is_member_path(xbrl_path):
+            return zip_reader.member_signature(xbrl_path)
+        stat = os.stat(xbrl_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @classmethod
+    def set_default_backend(cls, backend: str):
+        """既定のバックエンドを変更する（'lxml' / 'bs4' / 'regex'）"""
+        get_backend(backend)  # 名前のチェック
+        cls.default_backend = backend
+
+    @classmethod
+    def set_parse_cache(cls, parse_cache):
+        """永続パースキャッシュ（ParseCache）を設定する。None で無効化"""
+        cls.parse_cache = parse_cache
+
+    @classmethod
+    def clear_cache(cls):
+        """キャッシュを破棄する"""
+        with cls._cache_lock:
+            cls._cache.clear()
+
+    # ===========================================================================
+    # 元データへのアクセス
+    # ===========================================================================
+
+    def open_binary(self):
+        if zip_reader.is_member_path(self.xbrl_path):
+            return zip_reader.open_member(self.xbrl_path)
+        return open(self.xbrl_path, 'rb')
+
+    def read_bytes(self) -> bytes:
+        if zip_reader.is_member_path(self.xbrl_path):
+            return zip_reader.read_member(self.xbrl_path)
+        with self.open_binary() as f:
+            return f.read()
+
+    @property
+    def text(self) -> str:
+        """
+        ファイル全体の文字列（必要になった時点で読む）。
+        壊れたバイトがあっても読めるように、デコードできないバイトは置換文字にする
+        （以前の detect_quarter_from_html() の errors='ignore' と同じく、1バイトで全体が読めなくならないように）。
+        """
+        if self._text is None:
+            self._text = self.read_bytes().decode('utf-8', errors='replace')
+        return self._text
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        """
+        表形式フォールバック用の BeautifulSoup。
+        bs4 バックエンドなら解析時のものを再利用し、それ以外は初回アクセス時に作る。
+        """
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.text, 'html.parser')
+        return self._soup
+
+    @soup.setter
+    def soup(self, value: BeautifulSoup):
+        self._soup = value
+
+    # ===========================================================================
+    # 検索
+    # ===========================================================================
+
+    def find_fact(self, tag_name: str, context_type: str = 'instant') -> Optional[Fact]:
+        """
+        find_tag_with_flexible_context() と同じ優先順位でファクトを探す。
+        contextref 候補を順に試し、見つからなければ name だけで探す。
+        """
+        for contextref in get_contextref_candidates(context_type):
+            fact = self.non_fractions.get((tag_name, contextref))
+            if fact is not None:
+                return fact
+
+        # contextref なしでも探してみる（最終手段）
+        fact = self._first_non_fraction.get(tag_name)
+        if fact is not None:
+            print(f"警告: contextref なしで {tag_name} を発見")
+            return fact
+
+        full_document = self._get_full_document()
+        if full_document is not None:
+            return full_document.find_fact(tag_name, context_type=context_type)
+        return None
+
+    def get_non_numeric(self, tag_name: str) -> Optional[Fact]:
+        """ix:nonNumeric を name で探す（contextref は問わない）"""
+        fact = self._first_non_numeric.get(tag_name)
+        if fact is not None:
+            return fact
+
+        full_document = self._get_full_document()
+        if full_document is not None:
+            return full_document.get_non_numeric(tag_name)
+        return None
+
+    def get_dei(self, dei_name: str) -> Optional[str]:
+        """
+        DEI（jpdei_cor:*）の値を返す。
+        例: get_dei("CurrentPeriodEndDateDEI")
+        """
+        fact = self.get_non_numeric(f"jpdei_cor:{dei_name}")
+        return None if fact is None else fact.text
+
+    # ===========================================================================
+    # 内部ロジック
+    # ===========================================================================
+
+    def _build_index(self):
+        """
+        バックエンドで文書を1回走査し、ix:* ファクトと context を索引化する。
+        パースキャッシュにあれば走査せずにそれを使う。
+        """
+        cache = self.parse_cache
+        if cache is not None:
+            sha256 = sha256_of(self.read_bytes())
+            version = cache_version(self.backend)
+            cached = cache.get(sha256, version)
+        else:
+            cached = None
+
+        if cached is not None:
+            facts, contexts = cached
+        else:
+            facts, contexts = self._extract()
+            if cache is not None:
+                cache.put(sha256, version, os.path.basename(self.xbrl_path), facts, contexts)
+
+        for fact in facts:
+            self._add_fact(fact)
+        self.contexts.extend(contexts)
+
+    def _extract(self):
+        """バックエンドでファクトを抽出する。lxml で読めなければ bs4 で再解析"""
+        try:
+            return get_backend(self.backend).extract(self)
+        except Exception as e:
+            if self.backend == FALLBACK_BACKEND:
+                raise
+            print(f"警告: {self.backend} で解析できませんでした。{FALLBACK_BACKEND} で再解析します - {self.xbrl_path}: {e}")
+            self.backend = FALLBACK_BACKEND
+            return get_backend(self.backend).extract(self)
+
+    def _get_full_document(self) -> Optional["XbrlDocument"]:
+        """
+        現在のバックエンドが全ファクトを取り出せない（regex）場合に、
+        完全なパーサーで解析した XbrlDocument を返す（初回のみ解析）。
+        """
+        if get_backend(self.backend).complete:
+            return None
+        if self._full_document is None:
+            print(f"[INFO] {self.backend} で見つからないため {FULL_BACKEND} で再解析します - {self.xbrl_path}")
+            self._full_document = self._spawn(FULL_BACKEND)
+        return self._full_document
+
+    def _spawn(self, backend: str) -> "XbrlDocument":
+        """同じ元データを別のバックエンドで解析した XbrlDocument を作る"""
+        return XbrlDocument(self.xbrl_path, backend=backend)
+
+    def _add_fact(self, fact: Fact):
+        if fact.kind == 'nonFraction':
+            self.non_fractions.setdefault((fact.name, fact.contextref), fact)
+            self._first_non_fraction.setdefault(fact.name, fact)
+        else:
+            self.non_numerics.setdefault((fact.name, fact.contextref), fact)
+            self._first_non_numeric.setdefault(fact.name, fact)
+
+
+if __name__ == '__main__':
+    xbrl_path = r"E:\Zip_files\4612\0102010-acbs03-tse-acediffr-46120-2024-12-31-01-2025-02-14-ixbrl.htm"
+
+    document = XbrlDocument.load(xbrl_path)
+    print(f"バックエンド: {document.backend}")
+    print(f"nonFraction: {len(document.non_fractions)}件")
+    print(f"nonNumeric: {len(document.non_numerics)}件")
+    print(f"会社名: {document.get_dei('FilerNameInJapaneseDEI')}")
+    print(f"資産合計: {document.find_fact('jpigp_cor:AssetsIFRS', context_type='instant')}")
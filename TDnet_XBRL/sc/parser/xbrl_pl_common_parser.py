@@ -1,5 +1,5 @@
-from bs4 import BeautifulSoup
 import re
+from sc.parser.xbrl_document import XbrlDocument
 
 # ------------------------------------------------------------
 # 会社名を取得する
@@ -8,13 +8,11 @@ def get_company_name(xbrl_path):
     print(f"[CALL] get_company_name(xbrl_path={xbrl_path})")
 
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+        document = XbrlDocument.load(xbrl_path)
 
         print("[INFO] HTML読み込み完了（会社名取得）")
 
-        soup = BeautifulSoup(html_content, 'html.parser')
-        element = soup.find("ix:nonnumeric", attrs={"name": "jpdei_cor:FilerNameInJapaneseDEI"})
+        element = document.get_non_numeric("jpdei_cor:FilerNameInJapaneseDEI")
 
         if element is None:
             print(f"[WARN] 会社名タグが見つかりませんでした: {xbrl_path}")
@@ -46,8 +44,7 @@ def detect_quarter_from_html(xbrl_path):
     """
 
     try:
-        with open(xbrl_path, 'r', encoding='utf-8', errors='ignore') as f:
-            html_text = f.read()
+        html_text = XbrlDocument.load(xbrl_path).text
 
         print("[INFO] HTML読み込み完了（四半期判定）")
 
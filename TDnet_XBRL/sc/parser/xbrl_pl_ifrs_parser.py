@@ -1,20 +1,18 @@
-from bs4 import BeautifulSoup
-from sc.utils.xbrl_utils import find_tag_with_flexible_context, extract_value_from_tag, extract_per_share_value, find_value_in_table
+from sc.utils.xbrl_utils import extract_value_from_tag, extract_per_share_value, find_value_in_table
+from sc.parser.xbrl_document import XbrlDocument
 
 
 # 売上(億円)を取得する関数
 def get_RevenueIFRS(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jpigp_cor:RevenueIFRS", context_type='duration')
+        tag = document.find_fact("jpigp_cor:RevenueIFRS", context_type='duration')
         value = extract_value_from_tag(tag, xbrl_path, "RevenueIFRS")
 
         # タグが見つからない場合、表形式で探す
         if value is None:
-            value = find_value_in_table(soup, ["売上収益", "売上高", "売上", "収益"])
+            value = find_value_in_table(document.soup, ["売上収益", "売上高", "売上", "収益"])
             print(f'表形式からRevenueIFRSを取得しました - {value}')
         return value
 
@@ -26,16 +24,14 @@ def get_RevenueIFRS(xbrl_path):
 # 販売費及び一般管理費(億円)を取得する関数
 def get_SellingGeneralAndAdministrativeExpensesIFRS(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jpigp_cor:SellingGeneralAndAdministrativeExpensesIFRS", context_type='duration')
+        tag = document.find_fact("jpigp_cor:SellingGeneralAndAdministrativeExpensesIFRS", context_type='duration')
         value = extract_value_from_tag(tag, xbrl_path, "SellingGeneralAndAdministrativeExpensesIFRS")
 
         # タグが見つからない場合、表形式で探す
         if value is None:
-            value = find_value_in_table(soup, ["販売費及び一般管理費", "販売費", "一般管理費"])
+            value = find_value_in_table(document.soup, ["販売費及び一般管理費", "販売費", "一般管理費"])
             print(f'表形式からSellingGeneralAndAdministrativeExpensesIFRSを取得しました - {value}')
         return value
 
@@ -47,16 +43,14 @@ def get_SellingGeneralAndAdministrativeExpensesIFRS(xbrl_path):
 # 営業利益(億円)を取得する関数
 def get_OperatingProfitLossIFRS(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jpigp_cor:OperatingProfitLossIFRS", context_type='duration')
+        tag = document.find_fact("jpigp_cor:OperatingProfitLossIFRS", context_type='duration')
         value = extract_value_from_tag(tag, xbrl_path, "OperatingProfitLossIFRS")
 
         # タグが見つからない場合、表形式で探す
         if value is None:
-            value = find_value_in_table(soup, ["営業利益", "営業"])
+            value = find_value_in_table(document.soup, ["営業利益", "営業"])
             print(f'表形式からOperatingProfitLossIFRSを取得しました - {value}')
         return value
 
@@ -68,16 +62,14 @@ def get_OperatingProfitLossIFRS(xbrl_path):
 # 四半期利益(億円)を取得する関数
 def get_ProfitLossIFRS(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jpigp_cor:ProfitLossIFRS", context_type='duration')
+        tag = document.find_fact("jpigp_cor:ProfitLossIFRS", context_type='duration')
         value = extract_value_from_tag(tag, xbrl_path, "ProfitLossIFRS")
 
         # タグが見つからない場合、表形式で探す
         if value is None:
-            value = find_value_in_table(soup, ["四半期利益", "損益", "当期利益", "当期純利益", "純利益"])
+            value = find_value_in_table(document.soup, ["四半期利益", "損益", "当期利益", "当期純利益", "純利益"])
             print(f'表形式からProfitLossIFRSを取得しました - {value}')
         return value
 
@@ -89,16 +81,14 @@ def get_ProfitLossIFRS(xbrl_path):
 # 希薄化後１株当たり四半期利益を取得する関数
 def get_DilutedEarningsLossPerShareIFRS(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jpigp_cor:DilutedEarningsLossPerShareIFRS", context_type='duration')
+        tag = document.find_fact("jpigp_cor:DilutedEarningsLossPerShareIFRS", context_type='duration')
         value = extract_per_share_value(tag, xbrl_path, "DilutedEarningsLossPerShareIFRS")
 
         # タグが見つからない場合、表形式で探す
         if value is None:
-            value = find_value_in_table(soup, ["希薄化後１株当たり四半期利益","希薄化後1株当たり利益", "希薄化後１株当たり利益", "1株当たり利益", "１株当たり利益"])
+            value = find_value_in_table(document.soup, ["希薄化後１株当たり四半期利益","希薄化後1株当たり利益", "希薄化後１株当たり利益", "1株当たり利益", "１株当たり利益"])
             print(f'表形式からDilutedEarningsLossPerShareIFRSを取得しました - {value}')
         return value
 
@@ -1,22 +1,20 @@
 import os
 import sys
-from bs4 import BeautifulSoup
 
 # 共通関数をインポート
 current_dir = os.path.dirname(os.path.abspath(__file__))
 utils_dir = os.path.join(current_dir, '..', 'utils')
 sys.path.insert(0, utils_dir)
-from sc.utils.xbrl_utils import find_tag_with_flexible_context, extract_value_from_tag
+from sc.utils.xbrl_utils import extract_value_from_tag
+from sc.parser.xbrl_document import XbrlDocument
 
 
 # 売上(億円)を取得する関数
 def get_NetSales(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jppfs_cor:NetSales", context_type='duration')
+        tag = document.find_fact("jppfs_cor:NetSales", context_type='duration')
         return extract_value_from_tag(tag, xbrl_path, "NetSales")
 
     except Exception as e:
@@ -27,12 +25,10 @@ def get_NetSales(xbrl_path):
 # 販売費及び一般管理費(億円)を取得する関数
 def get_SellingGeneralAndAdministrativeExpenses(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jppfs_cor:SellingGeneralAndAdministrativeExpenses",
-                                             context_type='duration')
+        tag = document.find_fact("jppfs_cor:SellingGeneralAndAdministrativeExpenses",
+                                 context_type='duration')
         return extract_value_from_tag(tag, xbrl_path, "SellingGeneralAndAdministrativeExpenses")
 
     except Exception as e:
@@ -43,11 +39,9 @@ def get_SellingGeneralAndAdministrativeExpenses(xbrl_path):
 # 営業利益(億円)を取得する関数
 def get_OperatingIncome(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jppfs_cor:OperatingIncome", context_type='duration')
+        tag = document.find_fact("jppfs_cor:OperatingIncome", context_type='duration')
         return extract_value_from_tag(tag, xbrl_path, "OperatingIncome")
 
     except Exception as e:
@@ -58,11 +52,9 @@ def get_OperatingIncome(xbrl_path):
 # 経常利益(億円)を取得する関数
 def get_OrdinaryIncome(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
-        tag = find_tag_with_flexible_context(soup, "jppfs_cor:OrdinaryIncome", context_type='duration')
+        tag = document.find_fact("jppfs_cor:OrdinaryIncome", context_type='duration')
         return extract_value_from_tag(tag, xbrl_path, "OrdinaryIncome")
 
     except Exception as e:
@@ -73,16 +65,14 @@ def get_OrdinaryIncome(xbrl_path):
 # 純利益(億円)を取得する関数
 def get_NetIncome(xbrl_path):
     try:
-        with open(xbrl_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        soup = BeautifulSoup(html_content, 'html.parser')
+        document = XbrlDocument.load(xbrl_path)
 
         # NetIncomeを探す
-        tag = find_tag_with_flexible_context(soup, "jppfs_cor:NetIncome", context_type='duration')
+        tag = document.find_fact("jppfs_cor:NetIncome", context_type='duration')
 
         # NetIncomeが見つからない場合はProfitLossを試す
         if tag is None:
-            tag = find_tag_with_flexible_context(soup, "jppfs_cor:ProfitLoss", context_type='duration')
+            tag = document.find_fact("jppfs_cor:ProfitLoss", context_type='duration')
 
         return extract_value_from_tag(tag, xbrl_path, "NetIncome/ProfitLoss")
 
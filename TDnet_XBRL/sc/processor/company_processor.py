@@ -1,9 +1,13 @@
 # processor/company_processor.py
 
-from typing import List
-from sc.fileio import zipfile_downloader
+import os
+from typing import List, Optional
+from sc.fileio import archive_store, filing_delta, http_fetcher, rate_limiter, zipfile_downloader
 from sc.fileio.file_manager import FileManager
+from sc.inserter.db_writer import DBWriter
+from sc.parser.parse_cache import get_parse_cache
 from sc.parser.unified_parser import UnifiedXBRLParser
+from sc.processor import parse_worker
 from sc.config.config import Config
 
 
@@ -14,20 +18,55 @@ class CompanyDataProcessor:
     までの全工程を担当するクラス。
     """
 
-    def __init__(self, code: int, config: Config):
+    def __init__(self, code: int, config: Config, writer: Optional[DBWriter] = None):
+        """
+        Args:
+            writer: DB 書き込みに使う DBWriter。複数企業で共有する場合に渡す
+                    （接続だけを共有し、溜める行はこの企業専用の for_company() に分ける）。
+                    None ならこの企業専用のものを作る。どちらも process() の最後に閉じる
+        """
         self.code = code
         self.config = config
+        self.writer = writer.for_company() if writer is not None else DBWriter(flush_rows=config.db_flush_rows)
         self.company_folder = config.xbrlfile_folder / str(code)
-        self.parser = UnifiedXBRLParser()
+
+        # 複数企業を同時に処理する場合は、企業ごとに専用のダウンロードフォルダを使う
+        if config.company_workers > 1:
+            self.download_folder = config.get_staging_folder() / str(code)
+        else:
+            self.download_folder = config.source_folder
+        self._catalog = None
+        self.archive = archive_store.get_archive_store(config.get_archive_folder()) if config.use_archive else None
+        parse_cache = get_parse_cache(config.parse_cache_path) if config.use_parse_cache else None
+        self.parser = UnifiedXBRLParser(backend=config.parser_backend, parse_cache=parse_cache)
 
     def process(self):
         """企業データの全処理を実行"""
         print(f'----- {self.code} の処理開始 -----')
 
-        self.download()
-        self.extract()
-        self.parse_bs()
-        self.parse_pl()
+        try:
+            if self.config.skip_download:
+                # ダウンロードせずに、アーカイブ済みの Zip で処理し直す
+                self.restore()
+            else:
+                self.download()
+            self.extract()
+            if self.config.parallel_parse:
+                self.parse_parallel()
+            else:
+                self.parse_bs()
+                self.parse_pl()
+
+            # 1社分を1トランザクションで書き込む
+            self.writer.flush()
+        except Exception:
+            # 途中まで溜めた行は書き込まない（他の企業の行とは別に溜めている）
+            discarded = self.writer.discard()
+            if discarded:
+                print(f'[ERROR] {self.code}: 処理が失敗したため {discarded}行を書き込まずに破棄しました')
+            raise
+        finally:
+            self.writer.close()
 
         print(f'----- {self.code} の処理完了 -----\n')
 
@@ -36,19 +75,84 @@ class CompanyDataProcessor:
     # ===========================================================================
 
     def download(self):
-        """Zip ダウンロード → 移動 → フォルダ準備"""
+        """
+        Zip ダウンロード → 移動 → フォルダ準備。
+        config.use_archive なら、Zip はアーカイブに保存し、新しい内容の Zip だけを企業フォルダに置く
+        （同じ内容の Zip をダウンロードし直しても保存・処理し直さない。
+        解凍後に削除した過去の Zip も置き直さないので、解凍し直すのは新しい Zip だけ）。
+        """
+        isolated = self.download_folder != self.config.source_folder
+        if isolated:
+            self.download_folder.mkdir(parents=True, exist_ok=True)
+
         print('ダウンロードフォルダ内のzipファイルを削除')
-        FileManager.delete_files(self.config.source_folder)
+        FileManager.delete_files(self.download_folder)
 
         print(f'{self.code} のZipファイルをダウンロード（必要なら有効化）')
         # import zipfile_downloader
-        zipfile_downloader.zip_download(self.code)# ★★ダウンロード実行（必要なら有効化）
+        # ★★ダウンロード実行（必要なら有効化）
+        self._download_zipfiles()
 
         print(f'{self.code} のフォルダを作成')
         FileManager.create_folder(self.company_folder)
 
-        print(f'{self.code} のzipファイルをフォルダに移動')
-        FileManager.move_zipfiles(self.config.source_folder, self.company_folder)
+        if self.archive is not None:
+            print(f'{self.code} のzipファイルをアーカイブに保存')
+            added = self.archive.add_folder(self.code, self.download_folder)
+            print(f'{self.code}: 新しい内容の Zip {len(added)}件をアーカイブに保存しました')
+            self.archive.restore(self.code, self.company_folder, names=added)
+        else:
+            print(f'{self.code} のzipファイルをフォルダに移動')
+            FileManager.move_zipfiles(self.download_folder, self.company_folder)
+
+        if isolated:
+            FileManager.delete_folder(self.download_folder)
+
+    def restore(self):
+        """
+        アーカイブ済みの Zip のうち企業フォルダにないものを全て置く（config.skip_download で処理し直すときだけ）。
+        企業フォルダにだけある Zip（アーカイブを使う前のもの）はアーカイブに取り込む。
+        """
+        if self.archive is None:
+            return
+        FileManager.create_folder(self.company_folder)
+        imported = self.archive.add_folder(self.code, self.company_folder, keep=True)
+        if imported:
+            print(f'{self.code}: 企業フォルダの Zip {len(imported)}件をアーカイブに取り込みました')
+        restored = self.archive.restore(self.code, self.company_folder)
+        if restored:
+            print(f'{self.code}: アーカイブから Zip {restored}件を企業フォルダに置きました')
+
+    def _download_zipfiles(self):
+        """
+        config.downloader に応じて Selenium / HTTP でダウンロードする。
+        Chrome / HTTP の接続は全企業で使い回す（全企業の処理が終わったら XBRLProcessingSystem が閉じる）。
+        config.delta_download なら、DB の最新の公開日以降で、企業フォルダ・アーカイブにまだない Zip だけをダウンロードする。
+        """
+        delta = None
+        if self.config.delta_download:
+            delta = filing_delta.DeltaFilter.for_company(self.writer.latest_public_day(self.code), self.company_folder)
+            if self.archive is not None:
+                delta.known_names.update(self.archive.known_names(self.code))
+
+        if self.config.downloader == 'http':
+            kwargs = dict(max_workers=self.config.download_concurrency,
+                          rate=self.config.requests_per_second, burst=self.config.request_burst)
+            if self.config.listing_url:
+                kwargs['listing_url'] = self.config.listing_url
+            fetcher = http_fetcher.get_fetcher(**kwargs)
+            http_fetcher.zip_download(self.code, download_dir=self.download_folder, fetcher=fetcher, delta=delta)
+            return
+
+        pool = zipfile_downloader.get_session_pool(
+            size=self.config.get_browser_sessions(),
+            headless=self.config.headless_browser,
+            download_timeout=self.config.download_timeout,
+            limiter=rate_limiter.HostLimiter(rate=self.config.requests_per_second,
+                                             burst=self.config.request_burst,
+                                             max_concurrency=self.config.download_concurrency),
+        )
+        zipfile_downloader.zip_download(self.code, download_dir=self.download_folder, pool=pool, delta=delta)
 
     # ===========================================================================
     # 解凍 & クリーニング
@@ -56,6 +160,14 @@ class CompanyDataProcessor:
 
     def extract(self):
         """Zip解凍 → 不要ファイル削除"""
+        # フォルダの中身が変わるのでカタログを作り直す
+        self._catalog = None
+
+        if self.config.read_from_zip:
+            # ZIP 内のファイルを直接読むので解凍しない（ZIP は残す）
+            print(f'{self.code} のZipファイルは解凍せずに直接読み込みます')
+            return
+
         print(f'{self.code} のZipファイルを解凍')
         FileManager.unzip_all(self.company_folder)
 
@@ -81,40 +193,91 @@ class CompanyDataProcessor:
             periods=['annual', 'quarterly', 'semiannual']
         )
 
+    def parse_parallel(self):
+        """
+        BS/PL の全ファイルの抽出をプロセスプールで並列に行い、
+        結果を逐次処理と同じ順番で DB に保存する（DB 書き込みはこのプロセスだけ）。
+        """
+        files = self.plan_files()
+        if not files:
+            return
+
+        workers = self.config.parse_workers or os.cpu_count() or 1
+        workers = min(workers, len(files))
+        print(f'{self.code}: BS/PL {len(files)}ファイルを {workers}プロセスで並列抽出')
+
+        with parse_worker.create_executor(
+                workers, self.config.parser_backend, self.config.use_parse_cache, self.config.parse_cache_path
+        ) as executor:
+            # 投入順に結果を受け取るので、保存順は逐次処理と変わらない
+            # （結果が取れないファイルがあれば企業ごと失敗にする。パイプラインも同じ）
+            futures = [executor.submit(parse_worker.extract_file, file_path) for file_path in files]
+            results = parse_worker.collect_results(futures)
+
+        self.parser.save_records([result for result in results if result[1] is not None], writer=self.writer)
+
     # ===========================================================================
     # 内部ロジック
     # ===========================================================================
 
+    def plan_files(self) -> List[str]:
+        """BS → PL の順に、この企業で処理する全ファイルを処理順に並べて返す"""
+        periods = ['annual', 'quarterly', 'semiannual']
+        return self._plan_statement_files('bs', periods) + self._plan_statement_files('pl', periods)
+
+    @property
+    def catalog(self):
+        """企業フォルダのファイルカタログ（初回アクセス時に1回だけ走査）"""
+        if self._catalog is None:
+            self._catalog = FileManager.build_catalog(
+                self.company_folder, from_zip=self.config.read_from_zip
+            )
+        return self._catalog
+
     def _process_statements(self, statement_type: str, periods: List[str]):
         """期間別に連結→単独の順でファイルを処理"""
+        self._process_file_list(self._plan_statement_files(statement_type, periods))
+
+    def _plan_statement_files(self, statement_type: str, periods: List[str]) -> List[str]:
+        """
+        処理するファイルを処理順に並べたリストを返す。
+        期間別に連結→単独の順で、
+        - 連結がない場合は単独を処理
+        - 中間期だけは両方処理
+        config.incremental なら DB に登録済みのファイルは除く。
+        """
+        files = []
         for period in periods:
             print(f'{self._get_period_name(period)}_連結 {statement_type.upper()} の取得')
-            consolidated_files = FileManager.get_statement_files(
-                self.company_folder, statement_type, period, 'consolidated'
-            )
-            self._process_file_list(consolidated_files)
+            consolidated_files = self.catalog.get_files(statement_type, period, 'consolidated')
+            files.extend(consolidated_files)
 
             # 連結がない場合は単独を処理
             if len(consolidated_files) == 0:
                 print(f'{self._get_period_name(period)}_単独 {statement_type.upper()} の取得')
-                standalone_files = FileManager.get_statement_files(
-                    self.company_folder, statement_type, period, 'standalone'
-                )
-                self._process_file_list(standalone_files)
+                files.extend(self.catalog.get_files(statement_type, period, 'standalone'))
 
             # 中間期だけは両方処理
             elif period == 'semiannual':
                 print(f'{self._get_period_name(period)}_単独 {statement_type.upper()} の取得')
-                standalone_files = FileManager.get_statement_files(
-                    self.company_folder, statement_type, period, 'standalone'
-                )
-                self._process_file_list(standalone_files)
+                files.extend(self.catalog.get_files(statement_type, period, 'standalone'))
+
+        # 連結/単独の判定はファイルの有無で済ませてから、登録済みのファイルを除く
+        if self.config.incremental:
+            new_files = [path for path in files
+                         if not self.writer.is_known(statement_type, os.path.basename(path))]
+            skipped = len(files) - len(new_files)
+            if skipped:
+                print(f'{self.code}: 登録済みの {statement_type.upper()} {skipped}ファイルをスキップ')
+            files = new_files
+
+        return files
 
     def _process_file_list(self, files: List[str]):
         """XBRLファイルをパース → DB保存"""
         for file_path in files:
             self.parser.parse(file_path)
-            self.parser.save_to_db(file_path)
+            self.parser.save_to_db(file_path, writer=self.writer)
 
     @staticmethod
     def _get_period_name(period: str) -> str:
@@ -0,0 +1,116 @@
+# processor/parse_worker.py
+"""
+ProcessPoolExecutor のワーカープロセスで実行する関数。
+
+ワーカーは XBRL ファイルからデータを抽出して、プレーンな dict（レコード）を返すだけで、
+SQLite への書き込みは親プロセスがまとめて行う（ロックの競合を避けるため）。
+プロセス間で受け渡すため、関数はモジュールのトップレベルに置いている（pickle 可能）。
+
+ワーカーは fork ではなく spawn で起動する（create_executor()）。親プロセスは既にパースキャッシュの
+SQLite 接続やダウンロード・書き込みのスレッドを持っていることがあり、fork すると接続や
+取得中のロックがそのまま子プロセスにコピーされてしまう（SQLite は fork をまたいだ接続の使用を禁止している）。
+"""
+
+import multiprocessing
+import os
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from sc.parser.unified_parser import UnifiedXBRLParser
+
+# ワーカープロセスごとに1つだけ作るパーサー
+_parser: Optional[UnifiedXBRLParser] = None
+
+
+def create_executor(max_workers: int, backend: str, use_parse_cache: bool,
+                    parse_cache_path: Optional[Path]) -> ProcessPoolExecutor:
+    """spawn で起動するワーカーのプロセスプールを作る"""
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker,
+        initargs=(backend, use_parse_cache, parse_cache_path),
+    )
+
+
+def start_workers(executor: ProcessPoolExecutor, max_workers: int, timeout: float = 120.0) -> int:
+    """
+    max_workers 個のワーカープロセスを今すぐ全て起動し、起動したプロセス数を返す。
+
+    プールは投入に応じて1つずつワーカーを起動し、1つのワーカーが複数のタスクを続けて受け取ることもあるので、
+    全員がそろうまで待つタスクを max_workers 個投入する（タスクが全て同時に実行中になるまで終わらないため、
+    それぞれ別のプロセスで実行される）。
+    """
+    with multiprocessing.get_context('spawn').Manager() as manager:
+        barrier = manager.Barrier(max_workers, timeout=timeout)
+        futures = [executor.submit(_wait_for_all, barrier) for _ in range(max_workers)]
+        return len({future.result() for future in futures})
+
+
+def _wait_for_all(barrier) -> int:
+    """start_workers() のタスク（全ワーカーがそろうまで待ってからプロセス ID を返す）"""
+    barrier.wait()
+    return os.getpid()
+
+
+def init_worker(backend: str, use_parse_cache: bool, parse_cache_path: Optional[Path]):
+    """ワーカープロセスの初期化（プロセスごとに1回）"""
+    global _parser
+
+    parse_cache = None
+    if use_parse_cache:
+        from sc.parser import parse_cache as parse_cache_module
+        # fork で起動された場合に備え、親プロセスから引き継いだ接続は使わずに開き直す
+        parse_cache_module.forget_instances()
+        parse_cache = parse_cache_module.get_parse_cache(parse_cache_path)
+
+    _parser = UnifiedXBRLParser(backend=backend, parse_cache=parse_cache)
+
+
+def extract_file(file_path: str) -> Tuple[str, Optional[str], Optional[dict]]:
+    """
+    1ファイル分のレコードを抽出する。
+
+    Returns:
+        (file_path, statement_type, record)。
+        抽出に失敗した場合はエラーを表示し、statement_type / record を None で返す
+    """
+    parser = _parser or UnifiedXBRLParser()
+    try:
+        statement_type, record = parser.extract_record(file_path)
+        return file_path, statement_type, record
+    except Exception as e:
+        print(f"[ERROR] 抽出に失敗しました - {file_path}: {e}")
+        traceback.print_exc()
+        return file_path, None, None
+
+
+def collect_results(futures: Iterable[Future], on_done: Optional[Callable[[], None]] = None) -> List[tuple]:
+    """
+    extract_file() の結果を投入順に受け取る（保存順を逐次処理と同じにするため）。
+
+    抽出の失敗は extract_file() がファイル単位で (file_path, None, None) にするので、
+    ここで例外になるのはワーカーの異常終了などで結果そのものが取れない場合だけ。
+    その場合は残りの結果も受け取ってから最初の例外を送出し、企業ごと失敗にする
+    （CompanyDataProcessor.parse_parallel() とパイプラインで同じ扱いにするため、どちらもこの関数を使う）。
+
+    Args:
+        on_done: 1ファイル分の結果（または例外）を受け取るたびに呼ぶ関数
+    """
+    results = []
+    error = None
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            if error is None:
+                error = e
+        finally:
+            if on_done is not None:
+                on_done()
+
+    if error is not None:
+        raise error
+    return results
@@ -0,0 +1,205 @@
+# system/pipeline.py
+"""
+ダウンロード → 解凍/カタログ作成 → 解析 → DB 書き込み を段（ステージ）に分け、
+上限付きキューでつないで重ねて実行するパイプライン。
+
+    codes ─▶ [download] ─▶ q ─▶ [catalog] ─▶ q ─▶ [parse (プロセスプール)] ─▶ q ─▶ [writer]
+
+CompanyDataProcessor.process() は企業ごとに全工程を順番に行うため、
+ダウンロード中は CPU が、解析中はネットワークが遊んでいた。
+パイプラインでは企業 N を解析している間に企業 N+1 をダウンロードできる。
+
+- 各キューは上限付きで、後段が詰まると前段が待つ（バックプレッシャー）
+- DB への書き込みは writer ステージ（1スレッド）だけが行う
+- queue_depths() で各ステージの待ち数を確認でき、どこがボトルネックか分かる
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from sc.config.config import Config
+from sc.inserter.db_writer import DBWriter
+from sc.processor import parse_worker
+from sc.processor.company_processor import CompanyDataProcessor
+
+# ステージの終了を後段に伝える目印
+_STOP = object()
+
+
+class XBRLPipeline:
+    """
+    複数企業をステージ並列で処理するパイプライン。
+
+    - download: config.company_workers 個のスレッドで Zip をダウンロード
+                （config.skip_download なら企業フォルダ・アーカイブの Zip をそのまま使う）
+    - catalog : 解凍（ZIP 直読みなら省略）とファイルカタログ作成、処理順の決定
+    - parse   : ファイル単位でプロセスプールに投入（config.parse_workers）
+    - writer  : 企業単位で抽出結果を順番どおりに DB へ保存
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+
+        size = config.pipeline_queue_size
+        self.queues: Dict[str, queue.Queue] = {
+            'download': queue.Queue(),
+            'catalog': queue.Queue(maxsize=size),
+            'parse': queue.Queue(maxsize=size),
+            'write': queue.Queue(maxsize=size),
+        }
+
+        # プロセスプールに投入済みで、まだ書き込まれていないファイル数
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+        self._done = threading.Event()
+
+        # DB への接続（DB ごとに1つ）。行は企業ごとのライター（for_company()）に溜め、書き込みは writer ステージだけが行う
+        self.writer = DBWriter(flush_rows=config.db_flush_rows)
+
+    # ===========================================================================
+    # 実行
+    # ===========================================================================
+
+    def run(self, codes: List[str]):
+        download_workers = max(1, self.config.company_workers)
+        parse_workers = self.config.parse_workers or os.cpu_count() or 1
+        print(f"=== パイプライン開始: ダウンロード {download_workers}スレッド / 解析 {parse_workers}プロセス ===")
+
+        for code in codes:
+            self.queues['download'].put(code)
+        for _ in range(download_workers):
+            self.queues['download'].put(_STOP)
+
+        # ワーカーは spawn で起動し、ステージのスレッドを始める前に全て起動しておく
+        with parse_worker.create_executor(
+                parse_workers, self.config.parser_backend, self.config.use_parse_cache, self.config.parse_cache_path
+        ) as executor:
+            started = parse_worker.start_workers(executor, parse_workers)
+            print(f"[INFO] 解析ワーカー {started}プロセスを起動しました")
+            downloaders = [
+                threading.Thread(target=self._download_stage, name=f'download-{i}', daemon=True)
+                for i in range(download_workers)
+            ]
+            others = [
+                threading.Thread(target=self._catalog_stage, name='catalog', daemon=True),
+                threading.Thread(target=self._parse_stage, args=(executor,), name='parse', daemon=True),
+                threading.Thread(target=self._writer_stage, name='writer', daemon=True),
+            ]
+            monitor = threading.Thread(target=self._monitor, name='monitor', daemon=True)
+
+            for thread in downloaders + others:
+                thread.start()
+            monitor.start()
+
+            # ダウンロードが全部終わったら後段に終了を伝える
+            for thread in downloaders:
+                thread.join()
+            self.queues['catalog'].put(_STOP)
+
+            for thread in others:
+                thread.join()
+            self._done.set()
+
+        self.writer.close()
+
+        print("=== パイプライン完了 ===")
+
+    def queue_depths(self) -> Dict[str, int]:
+        """各ステージの入力キューに溜まっている件数（と解析中のファイル数）"""
+        depths = {name: q.qsize() for name, q in self.queues.items()}
+        with self._in_flight_lock:
+            depths['parsing_files'] = self._in_flight
+        return depths
+
+    # ===========================================================================
+    # ステージ
+    # ===========================================================================
+
+    def _download_stage(self):
+        while True:
+            code = self.queues['download'].get()
+            if code is _STOP:
+                return
+            try:
+                processor = CompanyDataProcessor(code, self.config, writer=self.writer)
+                if self.config.skip_download:
+                    # ダウンロードせずに、アーカイブ済みの Zip で処理し直す
+                    processor.restore()
+                else:
+                    processor.download()
+                self.queues['catalog'].put(processor)
+            except Exception as e:
+                print(f"[エラー] 企業コード {code} のダウンロード中に例外が発生しました: {e}")
+
+    def _catalog_stage(self):
+        while True:
+            processor = self.queues['catalog'].get()
+            if processor is _STOP:
+                self.queues['parse'].put(_STOP)
+                return
+            try:
+                processor.extract()
+                files = processor.plan_files()
+                self.queues['parse'].put((processor, files))
+            except Exception as e:
+                print(f"[エラー] 企業コード {processor.code} の解凍中に例外が発生しました: {e}")
+
+    def _parse_stage(self, executor: ProcessPoolExecutor):
+        while True:
+            item = self.queues['parse'].get()
+            if item is _STOP:
+                self.queues['write'].put(_STOP)
+                return
+            processor, files = item
+
+            # 投入だけして待たずに writer に渡す（次の企業の投入をすぐ始められる）
+            futures = [executor.submit(parse_worker.extract_file, file_path) for file_path in files]
+            with self._in_flight_lock:
+                self._in_flight += len(futures)
+            self.queues['write'].put((processor, futures))
+
+    def _writer_stage(self):
+        while True:
+            item = self.queues['write'].get()
+            if item is _STOP:
+                return
+            processor, futures = item
+
+            try:
+                # 投入順に結果を受け取るので、保存順は逐次処理と変わらない
+                # （結果が取れないファイルがあれば企業ごと失敗にする。parse_parallel() と同じ）
+                results = parse_worker.collect_results(futures, on_done=self._file_done)
+
+                # 1社分を1トランザクションで書き込む（企業ごとのライターに溜めるので他の企業の行は含まない）
+                processor.parser.save_records([result for result in results if result[1] is not None],
+                                              writer=processor.writer)
+                print(f'----- {processor.code} の処理完了 -----\n')
+            except Exception as e:
+                processor.writer.discard()
+                print(f"[エラー] 企業コード {processor.code} の解析・DB 保存中に例外が発生しました: {e}")
+
+    def _file_done(self):
+        with self._in_flight_lock:
+            self._in_flight -= 1
+
+    def _monitor(self):
+        """一定間隔で各ステージの待ち数を表示する"""
+        interval = self.config.pipeline_report_interval
+        if not interval:
+            return
+        while not self._done.wait(interval):
+            depths = ' '.join(f'{name}={depth}' for name, depth in self.queue_depths().items())
+            print(f"[PIPELINE] {depths}")
+
+
+if __name__ == "__main__":
+    config = Config.from_defaults()
+    pipeline = XBRLPipeline(config)
+    start = time.perf_counter()
+    pipeline.run(config.codes)
+    print(f"処理時間: {time.perf_counter() - start:.1f}秒")
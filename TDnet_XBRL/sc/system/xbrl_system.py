@@ -1,5 +1,9 @@
 # system/xbrl_system.py
 
+from concurrent.futures import ThreadPoolExecutor
+
+from sc.fileio import http_fetcher, zipfile_downloader
+from sc.inserter.db_writer import DBWriter
 from sc.processor.company_processor import CompanyDataProcessor
 from sc.config.config import Config
 
@@ -17,23 +21,61 @@ class XBRLProcessingSystem:
     # メイン実行
     # ----------------------------------------------------------------------
     def run(self):
-        """全企業コードに対してXBRL処理を順次実行する"""
+        """
+        全企業コードに対してXBRL処理を実行する。
+        config.company_workers が2以上なら、その数の企業を同時に処理する。
+        config.use_pipeline なら、ステージ並列のパイプライン（pipeline.py）で処理する。
+        config.update_fundamentals なら、最後に全企業の指標（FUNDAMENTALS）を計算し直す。
+        ダウンロードに使う Chrome / HTTP の接続は全企業で使い回し、最後に閉じる。
+        """
         print("=== XBRL Processing System 開始 ===")
         print(f"対象企業コード: {self.config.codes}")
         print(f"ダウンロードフォルダ: {self.config.source_folder}")
         print("----------------------------------------------------")
 
-        for code in self.config.codes:
-            try:
-                processor = CompanyDataProcessor(code, self.config)
-                processor.process()
-            except Exception as e:
-                print(f"[エラー] 企業コード {code} の処理中に例外が発生しました: {e}")
-                # continue により他のコード処理は継続可能
-                continue
+        workers = self.config.company_workers
+        try:
+            if self.config.use_pipeline:
+                # ダウンロード・解析・DB 書き込みを重ねて実行する
+                from sc.system.pipeline import XBRLPipeline
+                XBRLPipeline(self.config).run(self.config.codes)
+            else:
+                # DB への接続は全企業で共有する（企業ごとにまとめてコミット）
+                with DBWriter(flush_rows=self.config.db_flush_rows) as writer:
+                    if workers > 1:
+                        # 企業ごとに専用のダウンロードフォルダを使うので同時に処理できる
+                        print(f"同時処理企業数: {workers}")
+                        with ThreadPoolExecutor(max_workers=workers) as executor:
+                            list(executor.map(lambda code: self._process_company(code, writer), self.config.codes))
+                    else:
+                        for code in self.config.codes:
+                            self._process_company(code, writer)
+        finally:
+            # ダウンロードに使った Chrome / HTTP の接続を閉じる
+            zipfile_downloader.close_session_pool()
+            http_fetcher.close_fetcher()
+
+        if self.config.update_fundamentals:
+            self._update_fundamentals()
 
         print("=== 全てのXBRL処理が完了しました ===")
 
+    def _process_company(self, code, writer: DBWriter):
+        """1社分を処理する。例外が起きても他のコード処理は継続可能"""
+        try:
+            processor = CompanyDataProcessor(code, self.config, writer=writer)
+            processor.process()
+        except Exception as e:
+            print(f"[エラー] 企業コード {code} の処理中に例外が発生しました: {e}")
+
+    def _update_fundamentals(self):
+        """全企業の指標を計算し直す（失敗しても取り込み結果には影響しない）"""
+        try:
+            from sc.analytics import fundamentals
+            fundamentals.rebuild()
+        except Exception as e:
+            print(f"[エラー] 指標（FUNDAMENTALS）の計算中に例外が発生しました: {e}")
+
 if __name__ == "__main__":
     # テスト実行用コード（必要に応じて削除可能）
     config = Config.from_defaults()
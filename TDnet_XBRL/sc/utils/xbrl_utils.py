@@ -4,6 +4,39 @@ BS/PL両方で使用する
 """
 from bs4 import BeautifulSoup
 
+# contextref の候補（優先順）。find_tag_with_flexible_context と XbrlDocument で共有する
+CONTEXTREF_CANDIDATES = {
+    # BS用の contextref リスト
+    'instant': [
+        "CurrentYearInstant",
+        "CurrentQuarterInstant",
+        "CurrentYTDInstant",
+        "CurrentPeriodInstant",
+        "CurrentYearInstant_NonConsolidatedMember",
+        "CurrentQuarterInstant_NonConsolidatedMember",
+        "InterimInstant"
+    ],
+    # PL用の contextref リスト
+    'duration': [
+        "CurrentYearDuration",
+        "CurrentQuarterDuration",
+        "CurrentYTDDuration",
+        "InterimDuration",
+        "CurrentYearDuration_NonConsolidatedMember",
+        "CurrentQuarterDuration_NonConsolidatedMember",
+        "CurrentYTDDuration_NonConsolidatedMember",
+        "Prior1YTDDuration_NonConsolidatedMember",
+    ],
+}
+
+
+def get_contextref_candidates(context_type):
+    """context_type（'instant' / 'duration'）に対応する contextref 候補を返す"""
+    if context_type not in CONTEXTREF_CANDIDATES:
+        raise ValueError(f"Invalid context_type: {context_type}")
+    return CONTEXTREF_CANDIDATES[context_type]
+
+
 def find_tag_with_flexible_context(soup, tag_name, context_type='instant'):
     """
     複数の contextref を試して、タグを取得する共通関数
@@ -16,31 +49,7 @@ def find_tag_with_flexible_context(soup, tag_name, context_type='instant'):
     Returns:
         見つかったタグ、または None
     """
-    if context_type == 'instant':
-        # BS用の contextref リスト
-        contextref_candidates = [
-            "CurrentYearInstant",
-            "CurrentQuarterInstant",
-            "CurrentYTDInstant",
-            "CurrentPeriodInstant",
-            "CurrentYearInstant_NonConsolidatedMember",
-            "CurrentQuarterInstant_NonConsolidatedMember",
-            "InterimInstant"
-        ]
-    elif context_type == 'duration':
-        # PL用の contextref リスト
-        contextref_candidates = [
-            "CurrentYearDuration",
-            "CurrentQuarterDuration",
-            "CurrentYTDDuration",
-            "InterimDuration",
-            "CurrentYearDuration_NonConsolidatedMember",
-            "CurrentQuarterDuration_NonConsolidatedMember",
-            "CurrentYTDDuration_NonConsolidatedMember",
-            "Prior1YTDDuration_NonConsolidatedMember",
-        ]
-    else:
-        raise ValueError(f"Invalid context_type: {context_type}")
+    contextref_candidates = get_contextref_candidates(context_type)
 
     # タグタイプのリスト（大文字小文字両方対応）
     tag_types = ["ix:nonfraction", "ix:nonFraction", "ix:nonNumeric"]
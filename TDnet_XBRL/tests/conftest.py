@@ -0,0 +1,51 @@
+# tests/conftest.py
+
+import hashlib
+import zipfile
+from pathlib import Path
+
+import pytest
+
+# リポジトリに含まれている DB（テストでは読み書きしない。DB を使うテストは tmp_path に作る）
+TRACKED_DBS = [Path(__file__).resolve().parent.parent / 'db' / name for name in ('BS_DB.db', 'PL_DB.db')]
+
+
+def _digest(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest() if path.exists() else None
+
+
+@pytest.fixture(scope='session', autouse=True)
+def tracked_dbs_unchanged():
+    """テストの実行でリポジトリの DB が変わっていないことを確認する（journal_mode の変更などのヘッダーも含む）"""
+    before = {path: _digest(path) for path in TRACKED_DBS}
+    yield
+    changed = [path.name for path in TRACKED_DBS if _digest(path) != before[path]]
+    assert not changed, f'テストがリポジトリの DB を変更しました: {changed}'
+
+
+def make_filing_zip(path, code='2780', public_day='2024-08-09', period_end='2024-06-30', padding=0):
+    """
+    開示の Zip（BS の iXBRL を1つ含む）を作る。
+    ファイル名の公開日が fixture_server.write_listing() の一覧の開示日になる。
+    padding バイトの詰め物を足すと、Range で続きから取得する確認に使える大きさにできる。
+    """
+    member = (f'XBRLData/Attachment/0101010-qcbs01-tse-qcedjpfr-{code}0-'
+              f'{period_end}-01-{public_day}-ixbrl.htm')
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as zip_ref:
+        zip_ref.writestr(member, f'<html><body>{code} {public_day}</body></html>')
+        if padding:
+            zip_ref.writestr('XBRLData/padding.bin', bytes(range(256)) * (padding // 256 + 1))
+    return str(path)
+
+
+@pytest.fixture
+def filing_zips(tmp_path):
+    """公開日の異なる3つの Zip（古い順）"""
+    folder = tmp_path / 'zips'
+    folder.mkdir()
+    return [
+        make_filing_zip(folder / '0000A.zip', public_day='2023-01-01', period_end='2022-12-31'),
+        make_filing_zip(folder / '0000B.zip', public_day='2024-05-13', period_end='2024-03-31'),
+        make_filing_zip(folder / '0000C.zip', public_day='2025-01-10', period_end='2024-12-31',
+                        padding=512 * 1024),
+    ]
@@ -0,0 +1,65 @@
+# tests/test_archive_store.py
+
+import os
+import shutil
+
+from conftest import make_filing_zip
+from sc.fileio.archive_store import ArchiveStore
+
+
+def test_add_moves_zip_into_sharded_object(tmp_path):
+    store = ArchiveStore(tmp_path / 'archive')
+    path = make_filing_zip(tmp_path / 'a.zip')
+
+    sha256, is_new = store.add('2780', path)
+
+    assert is_new
+    assert not os.path.exists(path)
+    assert store.object_path(sha256) == tmp_path / 'archive' / 'objects' / sha256[:2] / sha256[2:4] / f'{sha256}.zip'
+    assert store.object_path(sha256).exists()
+    assert store.lookup('2780', 'a.zip') == sha256
+
+
+def test_same_content_is_stored_once(tmp_path):
+    store = ArchiveStore(tmp_path / 'archive')
+    downloads = tmp_path / 'downloads'
+    downloads.mkdir()
+    make_filing_zip(downloads / 'a.zip')
+
+    assert store.add_folder('2780', downloads) == ['a.zip']
+
+    # 同じ内容をダウンロードし直しても新しい Zip にはならない
+    make_filing_zip(downloads / 'a.zip')
+    assert store.add_folder('2780', downloads) == []
+    assert os.listdir(downloads) == []
+
+    # 別の企業の同じ内容は、その企業にとっては新しい（本体は1つ）
+    make_filing_zip(downloads / 'b.zip')
+    assert store.add_folder('9999', downloads) == ['b.zip']
+    stats = store.stats()
+    assert (stats['entries'], stats['objects']) == (2, 1)
+
+
+def test_restore_places_only_requested_names(tmp_path):
+    store = ArchiveStore(tmp_path / 'archive')
+    downloads = tmp_path / 'downloads'
+    downloads.mkdir()
+    make_filing_zip(downloads / 'old.zip', public_day='2023-01-01')
+    make_filing_zip(downloads / 'new.zip', public_day='2024-01-01')
+    store.add_folder('2780', downloads)
+
+    company = tmp_path / 'company'
+    assert store.restore('2780', company, names=['new.zip']) == 1
+    assert os.listdir(company) == ['new.zip']
+
+    assert store.restore('2780', company) == 1
+    assert sorted(os.listdir(company)) == ['new.zip', 'old.zip']
+
+
+def test_restore_drops_entries_without_object(tmp_path):
+    store = ArchiveStore(tmp_path / 'archive')
+    sha256, _ = store.add('2780', make_filing_zip(tmp_path / 'a.zip'))
+    shutil.rmtree(store.objects_dir)
+
+    assert store.restore('2780', tmp_path / 'company') == 0
+    assert store.known_names('2780') == []
@@ -0,0 +1,45 @@
+# tests/test_config.py
+
+from pathlib import Path
+
+import pytest
+
+from sc.config.config import Config
+
+
+def make_config(**kwargs):
+    return Config(codes=['2780'], source_folder=Path('downloads'), xbrlfile_folder=Path('zips'), **kwargs)
+
+
+def test_parse_cache_is_off_by_default():
+    assert make_config().use_parse_cache is False
+
+
+def test_zips_are_extracted_by_default():
+    assert make_config().read_from_zip is False
+
+
+def test_incremental_ingest_is_off_by_default():
+    assert make_config().incremental is False
+
+
+def test_fundamentals_are_not_recomputed_by_default():
+    assert make_config().update_fundamentals is False
+
+
+def test_delta_download_is_off_by_default():
+    assert make_config().delta_download is False
+
+
+def test_archive_is_off_by_default():
+    assert make_config().use_archive is False
+
+
+@pytest.mark.parametrize('backend', ['lxml', 'bs4', 'regex'])
+def test_validate_accepts_known_parser_backends(backend):
+    make_config(parser_backend=backend).validate()
+
+
+def test_validate_rejects_unknown_parser_backend():
+    with pytest.raises(ValueError, match='parser_backend'):
+        make_config(parser_backend='lxm').validate()
@@ -0,0 +1,85 @@
+# tests/test_db_writer.py
+
+import sqlite3
+
+import pytest
+
+from sc.inserter.db_writer import DBWriter
+
+
+def bs_record(code, filename, public_day='2024-08-09', assets=100):
+    columns = ('FileName', 'CompanyName', 'Code', 'FinancialReportType', 'AccountingStandard',
+               'PublicDay', 'StartDay', 'EndDay', 'FiscalYear', 'CashAndDeposits', 'CurrentAssets',
+               'PropertyPlantAndEquipment', 'Assets', 'RetainedEarnings', 'NetAssets')
+    values = (filename, f'会社{code}', code, 'Q1', 'Japan GAAP', public_day, '2024-04-01',
+              '2024-06-30', 2024, 10, 50, 20, assets, 30, 60)
+    return {'columns': columns, 'values': values, 'accounting_standard': 'Japan GAAP'}
+
+
+@pytest.fixture
+def db_paths(tmp_path):
+    return {'bs': str(tmp_path / 'BS_DB.db'), 'pl': str(tmp_path / 'PL_DB.db')}
+
+
+def count(db_path, table, where='1=1', params=()):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(f'SELECT COUNT(*) FROM {table} WHERE {where}', params).fetchone()[0]
+
+
+def test_upsert_keeps_one_row_per_file(db_paths):
+    with DBWriter(db_paths=db_paths) as writer:
+        writer.add('bs', bs_record('1000', 'a-ixbrl.htm', assets=100))
+        writer.flush()
+        writer.add('bs', bs_record('1000', 'a-ixbrl.htm', assets=200))
+        writer.flush()
+
+    with sqlite3.connect(db_paths['bs']) as conn:
+        rows = conn.execute('SELECT Assets FROM BS WHERE FileName = ?', ('a-ixbrl.htm',)).fetchall()
+    assert rows == [(200,)]
+
+
+def test_is_known_covers_db_and_pending_rows(db_paths):
+    with DBWriter(db_paths=db_paths) as writer:
+        writer.add('bs', bs_record('1000', 'a-ixbrl.htm'))
+        writer.flush()
+
+    with DBWriter(db_paths=db_paths) as writer:
+        assert writer.is_known('bs', 'a-ixbrl.htm')
+        assert not writer.is_known('bs', 'b-ixbrl.htm')
+        writer.add('bs', bs_record('1000', 'b-ixbrl.htm'))
+        assert writer.is_known('bs', 'b-ixbrl.htm')
+        assert writer.latest_public_day('1000') == '2024-08-09'
+
+
+def test_company_writers_flush_only_their_own_rows(db_paths):
+    shared = DBWriter(db_paths=db_paths)
+    first = shared.for_company()
+    second = shared.for_company()
+
+    first.add('bs', bs_record('1000', 'a-ixbrl.htm'))
+    second.add('bs', bs_record('2000', 'b-ixbrl.htm'))
+    first.flush()
+
+    assert count(db_paths['bs'], 'BS', 'Code = ?', ('1000',)) == 1
+    assert count(db_paths['bs'], 'BS', 'Code = ?', ('2000',)) == 0
+
+    second.close()
+    shared.close()
+    assert count(db_paths['bs'], 'BS', 'Code = ?', ('2000',)) == 1
+
+
+def test_discard_drops_only_that_company(db_paths):
+    shared = DBWriter(db_paths=db_paths)
+    first = shared.for_company()
+    second = shared.for_company()
+
+    first.add('bs', bs_record('1000', 'a-ixbrl.htm'))
+    second.add('bs', bs_record('2000', 'b-ixbrl.htm'))
+    assert first.discard() == 1
+    assert not first.is_known('bs', 'a-ixbrl.htm')
+
+    first.close()
+    second.close()
+    shared.close()
+    assert count(db_paths['bs'], 'BS', 'Code = ?', ('1000',)) == 0
+    assert count(db_paths['bs'], 'BS', 'Code = ?', ('2000',)) == 1
@@ -0,0 +1,123 @@
+# tests/test_downsample.py
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from flask_app import downsample
+
+
+def make_series(start='2024-01-01', days=120):
+    """平日だけの日足（終値は上下に揺れる）"""
+    dates = []
+    day = date.fromisoformat(start)
+    while len(dates) < days:
+        if day.weekday() < 5:
+            dates.append(day.isoformat())
+        day += timedelta(days=1)
+
+    index = np.arange(days, dtype=np.float64)
+    close = 100 + 10 * np.sin(index / 5) + index / 10
+    return {
+        'dates': np.array(dates, dtype='U10'),
+        'open': close - 0.5,
+        'high': close + 1 + (index % 3),
+        'low': close - 1 - (index % 4),
+        'close': close,
+        'volume': 1000 + index,
+    }
+
+
+def reference_ohlc(series, key):
+    """期間ごとに Python でまとめた OHLC（resample() と比べる）"""
+    groups = {}
+    for i, day in enumerate(series['dates'].tolist()):
+        groups.setdefault(key(date.fromisoformat(day)), []).append(i)
+    rows = []
+    for indexes in groups.values():
+        rows.append((series['dates'][indexes[-1]],
+                     series['open'][indexes[0]],
+                     max(series['high'][i] for i in indexes),
+                     min(series['low'][i] for i in indexes),
+                     series['close'][indexes[-1]],
+                     sum(0.0 if np.isnan(series['volume'][i]) else series['volume'][i] for i in indexes)))
+    return rows
+
+
+def as_rows(series):
+    return list(zip(series['dates'], *(series[column] for column in downsample.PRICE_COLUMNS)))
+
+
+# ===========================================================================
+# LTTB
+# ===========================================================================
+
+@pytest.mark.parametrize('points', [3, 10, 50, 119])
+def test_lttb_returns_requested_points_keeping_first_and_last(points):
+    series = make_series()
+    result = downsample.lttb(series, points)
+
+    assert all(len(values) == points for values in result.values())
+    assert result['dates'][0] == series['dates'][0]
+    assert result['dates'][-1] == series['dates'][-1]
+    # 元の点から選んでいて、日付順のまま
+    assert list(result['dates']) == sorted(set(result['dates']))
+    assert set(result['dates']) <= set(series['dates'])
+
+
+@pytest.mark.parametrize('points', [120, 500, 2])
+def test_lttb_returns_series_unchanged_when_nothing_to_drop(points):
+    series = make_series()
+    assert downsample.lttb(series, points) is series
+
+
+def test_lttb_keeps_a_spike():
+    series = make_series()
+    series['close'][60] = 1000.0
+
+    result = downsample.lttb(series, 10)
+
+    assert series['dates'][60] in result['dates']
+
+
+# ===========================================================================
+# 週足・月足
+# ===========================================================================
+
+def test_weekly_ohlc():
+    series = make_series()
+    series['volume'][7] = np.nan
+
+    result = downsample.resample(series, 'weekly')
+
+    expected = reference_ohlc(series, lambda day: day.isocalendar()[:2])
+    assert len(result['dates']) == len(expected)
+    for actual, wanted in zip(as_rows(result), expected):
+        assert actual[0] == wanted[0]
+        assert list(actual[1:]) == pytest.approx(list(wanted[1:]))
+
+
+def test_monthly_ohlc():
+    series = make_series(start='2024-01-15')
+
+    result = downsample.resample(series, 'monthly')
+
+    expected = reference_ohlc(series, lambda day: (day.year, day.month))
+    assert len(result['dates']) == len(expected)
+    for actual, wanted in zip(as_rows(result), expected):
+        assert actual[0] == wanted[0]
+        assert list(actual[1:]) == pytest.approx(list(wanted[1:]))
+
+
+def test_daily_and_empty_series_are_returned_unchanged():
+    series = make_series()
+    assert downsample.resample(series, 'daily') is series
+
+    empty = {key: values[:0] for key, values in series.items()}
+    assert downsample.resample(empty, 'monthly') is empty
+
+
+def test_unknown_resolution_raises():
+    with pytest.raises(ValueError):
+        downsample.resample(make_series(), 'yearly')
@@ -0,0 +1,36 @@
+# tests/test_fact_backends.py
+
+import pytest
+
+from sc.parser.xbrl_document import XbrlDocument
+
+NESTED = b'''<html xmlns="http://www.w3.org/1999/xhtml" xmlns:ix="http://www.xbrl.org/2013/inlineXBRL">
+<body>
+<ix:nonNumeric name="jpcrp:CompanyName" contextRef="CurrentYearDuration">ABC<ix:nonNumeric name="x:Inner" contextRef="CurrentYearDuration">inner</ix:nonNumeric> Corp</ix:nonNumeric>
+<ix:nonFraction name="jppfs_cor:Assets" contextRef="CurrentYearInstant" decimals="-6" scale="6" unitRef="JPY">1,234</ix:nonFraction>
+</body>
+</html>
+'''
+
+
+@pytest.fixture
+def nested_file(tmp_path):
+    path = tmp_path / 'nested-ixbrl.htm'
+    path.write_bytes(NESTED)
+    return str(path)
+
+
+@pytest.mark.parametrize('backend', ['lxml', 'bs4', 'regex'])
+def test_nested_non_numeric_is_read_in_full(nested_file, backend):
+    document = XbrlDocument(nested_file, backend=backend)
+
+    assert document.get_non_numeric('jpcrp:CompanyName').text == 'ABCinner Corp'
+    assert document.get_non_numeric('x:Inner').text == 'inner'
+    assert document.find_fact('jppfs_cor:Assets').text == '1,234'
+
+
+def test_regex_does_not_return_truncated_text(nested_file):
+    document = XbrlDocument(nested_file, backend='regex')
+
+    # 入れ子のファクトは regex では見つからなかったことにする（完全なパーサーで探し直す）
+    assert 'jpcrp:CompanyName' not in {name for name, _ in document.non_numerics}
@@ -0,0 +1,89 @@
+# tests/test_filing_catalog.py
+
+import zipfile
+
+import pytest
+
+from sc.fileio import zip_reader
+from sc.fileio.filing_catalog import FILENAME_PATTERN, FilingCatalog, FilingRecord
+
+# 実際に DB に登録されているファイル名 → (コード, 期間, 連結/単独, 財務諸表, 会計基準, 期末日, 公開日)
+REAL_FILE_NAMES = {
+    '0300000-acbs03-tse-acediffr-36790-2019-03-31-01-2019-05-14-ixbrl.htm':
+        ('3679', 'a', 'c', 'bs', 'iffr', '2019-03-31', '2019-05-14'),
+    '0500000-anbs02-tse-anedjpfr-61960-2016-08-31-01-2016-09-29-ixbrl.htm':
+        ('6196', 'a', 'n', 'bs', 'jpfr', '2016-08-31', '2016-09-29'),
+    '0101010-qcfs03-tse-qcediffr-24710-2024-02-29-01-2024-04-12-ixbrl.htm':
+        ('2471', 'q', 'c', 'fs', 'iffr', '2024-02-29', '2024-04-12'),
+    '1200000-snbs16-tse-snedjpfr-14290-2024-06-30-01-2024-08-09-ixbrl.htm':
+        ('1429', 's', 'n', 'bs', 'jpfr', '2024-06-30', '2024-08-09'),
+    '0301000-acpc01-tse-acedjpfr-13010-2020-03-31-01-2020-05-12-ixbrl.htm':
+        ('1301', 'a', 'c', 'pc', 'jpfr', '2020-03-31', '2020-05-12'),
+    '0102010-qcpl13-tse-qcediffr-94330-2019-06-30-01-2019-08-01-ixbrl.htm':
+        ('9433', 'q', 'c', 'pl', 'iffr', '2019-06-30', '2019-08-01'),
+    '1200000-snpl05-tse-scedjpfr-83060-2015-09-30-01-2015-11-13-ixbrl.htm':
+        ('8306', 's', 'n', 'pl', 'jpfr', '2015-09-30', '2015-11-13'),
+}
+
+
+@pytest.mark.parametrize('file_name, expected', REAL_FILE_NAMES.items())
+def test_filename_pattern_parses_real_file_names(file_name, expected):
+    match = FILENAME_PATTERN.match(file_name)
+
+    assert match is not None
+    assert match.group('code')[:4] == expected[0]
+    assert (match.group('period'), match.group('consolidation'), match.group('statement'),
+            match.group('standard'), match.group('period_end'), match.group('public_day')) == expected[1:]
+
+
+@pytest.mark.parametrize('file_name', [
+    '0000000-qcss01-tse-qcedjpfr-36790-2014-06-30-01-2014-08-12-ixbrl.htm',
+    '0300000-acbs03-tse-acediffr-36790-2019-03-31-01-2019-05-14-ixbrl.html',
+    'qualitative.htm',
+])
+def test_filename_pattern_rejects_other_files(file_name):
+    assert FILENAME_PATTERN.match(file_name) is None
+
+
+def test_record_from_member_path_with_windows_separators():
+    file_name = '0101010-qcfs03-tse-qcediffr-24710-2024-02-29-01-2024-04-12-ixbrl.htm'
+    # ZIP 内で '\\' 区切りのメンバーも list_statement_members() が '/' に揃える
+    path = zip_reader.make_member_path(r'E:\Zip_files\2471\0001.zip', f'XBRLData/Attachment/{file_name}')
+
+    record = FilingRecord.from_path(path)
+
+    assert record.file_name == file_name
+    assert record.path == path
+    assert (record.code, record.statement_type, record.public_day) == ('2471', 'bs', '2024-04-12')
+
+
+def names(paths):
+    return [path.replace('\\', '/').rsplit('/', 1)[-1] for path in paths]
+
+
+def test_catalog_from_folder_and_zip(tmp_path):
+    folder = tmp_path / '2780'
+    folder.mkdir()
+    extracted = [
+        '0500000-qcbs01-tse-qcedjpfr-27800-2024-06-30-01-2024-08-09-ixbrl.htm',
+        '0500000-qcbs01-tse-qcedjpfr-27800-2023-06-30-01-2023-08-10-ixbrl.htm',
+        '0500000-qcfs01-tse-qcedjpfr-27800-2022-06-30-01-2022-08-10-ixbrl.htm',
+    ]
+    for name in extracted:
+        (folder / name).write_text('<html></html>')
+    in_zip = '0500000-qcbs01-tse-qcedjpfr-27800-2021-06-30-01-2021-08-10-ixbrl.htm'
+    with zipfile.ZipFile(folder / 'a.zip', 'w') as zip_ref:
+        zip_ref.writestr('XBRLData\\Attachment\\' + in_zip, '<html></html>')
+        # 解凍済みのファイルと同じ名前のメンバーは含めない
+        zip_ref.writestr('XBRLData\\Attachment\\' + extracted[0], '<html></html>')
+
+    catalog = FilingCatalog.build(str(folder))
+    # 解凍済みのファイルはファイル名順（glob の順ではない）、bs系 → fs系
+    assert names(catalog.get_files('bs', 'quarterly', 'consolidated')) == [extracted[1], extracted[0], extracted[2]]
+    assert catalog.get_files('bs', 'annual', 'consolidated') == []
+
+    catalog = FilingCatalog.build(str(folder), include_zip=True)
+    assert len(catalog) == 4
+    assert names(catalog.get_files('bs', 'quarterly', 'consolidated')) == [extracted[1], extracted[0], in_zip,
+                                                                           extracted[2]]
+    assert zip_reader.is_member_path(catalog.get_files('bs', 'quarterly', 'consolidated')[2])
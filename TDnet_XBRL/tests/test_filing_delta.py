@@ -0,0 +1,30 @@
+# tests/test_filing_delta.py
+
+from sc.fileio.filing_delta import DeltaFilter, parse_listing_date
+
+
+def test_parse_listing_date_formats():
+    assert parse_listing_date('2024/08/09 15:00') == '2024-08-09'
+    assert parse_listing_date('2024-8-9') == '2024-08-09'
+    assert parse_listing_date('2024年8月9日') == '2024-08-09'
+    assert parse_listing_date('開示日なし') is None
+
+
+def test_wants_new_or_undated_filings_only():
+    delta = DeltaFilter(since='2024-08-09', known_names={'known.zip'})
+
+    assert delta.wants('new.zip', '2024-11-08')
+    assert delta.wants('same-day.zip', '2024-08-09')
+    assert delta.wants('undated.zip', None)
+    assert not delta.wants('old.zip', '2024-05-13')
+    assert not delta.wants('known.zip', '2025-01-01')
+    assert delta.skipped == 2
+
+
+def test_for_company_reads_existing_zips(tmp_path):
+    (tmp_path / 'a.zip').write_bytes(b'')
+    (tmp_path / 'note.txt').write_bytes(b'')
+
+    delta = DeltaFilter.for_company(None, tmp_path)
+    assert delta.known_names == {'a.zip'}
+    assert DeltaFilter.for_company(None, tmp_path / 'missing').known_names == set()
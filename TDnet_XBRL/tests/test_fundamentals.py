@@ -0,0 +1,91 @@
+# tests/test_fundamentals.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sc.analytics import fundamentals
+
+# (企業, 年度, 四半期, 売上高の累計)。1000 の 2024年度は Q2 が抜けている
+CUMULATIVE_REVENUE = [
+    ('1000', 2023, 1, 100), ('1000', 2023, 2, 220), ('1000', 2023, 3, 360), ('1000', 2023, 4, 500),
+    ('1000', 2024, 1, 150), ('1000', 2024, 3, 480),
+    ('2000', 2023, 4, 999), ('2000', 2024, 1, 50),
+]
+
+
+def make_pl():
+    """load_pl() と同じ形の frame（営業利益は売上高の 1/10、経常利益・純利益は売上高の 1/20）"""
+    rows = []
+    for code, fiscal_year, quarter, revenue in CUMULATIVE_REVENUE:
+        rows.append({
+            'Code': code, 'FiscalYear': fiscal_year, 'Quarter': quarter,
+            'PeriodEnd': f'{fiscal_year}-{quarter * 3:02d}-30', 'PublicDay': None,
+            'Revenue': float(revenue), 'OperatingIncome': revenue / 10,
+            'OrdinaryIncome': revenue / 20, 'NetIncome': revenue / 20,
+        })
+    return pd.DataFrame(rows)
+
+
+def make_bs():
+    return pd.DataFrame({'Code': ['1000'], 'PeriodEnd': ['2024-03-30'], 'Assets': [1000.0], 'Equity': [400.0]})
+
+
+@pytest.fixture
+def result():
+    frame = fundamentals.compute_fundamentals(make_pl(), make_bs())
+    return frame.set_index(['Code', 'FiscalYear', 'Quarter'])
+
+
+def test_lag_matches_same_company_only():
+    frame = pd.DataFrame({'Code': ['A', 'A', 'A', 'B'], '_index': [10, 11, 14, 11], 'value': [1.0, 2.0, 3.0, 4.0]})
+
+    lagged = fundamentals._lag(frame, ['value'], 1)['value']
+    assert lagged.index.equals(frame.index)
+    assert np.isnan(lagged.iloc[0])
+    assert lagged.iloc[1] == 1.0
+    # _index 13 の行はない
+    assert np.isnan(lagged.iloc[2])
+    # B の1四半期前（_index 10）は A の行なので使わない
+    assert np.isnan(lagged.iloc[3])
+
+    assert fundamentals._lag(frame, ['value'], 4)['value'].iloc[2] == 1.0
+
+
+def test_quarterly_values_from_cumulative(result):
+    assert result.loc[('1000', 2023, 1), 'Revenue'] == 100
+    assert result.loc[('1000', 2023, 2), 'Revenue'] == 120
+    assert result.loc[('1000', 2023, 4), 'Revenue'] == 140
+    # 前の四半期（Q2）がないので計算できない
+    assert np.isnan(result.loc[('1000', 2024, 3), 'Revenue'])
+
+
+def test_ttm_needs_four_consecutive_quarters(result):
+    assert result.loc[('1000', 2023, 4), 'RevenueTTM'] == 500
+    # 2023 Q2〜Q4 + 2024 Q1
+    assert result.loc[('1000', 2024, 1), 'RevenueTTM'] == 120 + 140 + 140 + 150
+    assert result.loc[('1000', 2024, 1), 'OperatingIncomeTTM'] == pytest.approx(55)
+    assert np.isnan(result.loc[('1000', 2023, 3), 'RevenueTTM'])
+    assert np.isnan(result.loc[('1000', 2024, 3), 'RevenueTTM'])
+
+
+def test_yoy_against_same_quarter_last_year(result):
+    assert result.loc[('1000', 2024, 1), 'RevenueYoY'] == pytest.approx(0.5)
+    assert result.loc[('1000', 2024, 1), 'OperatingIncomeYoY'] == pytest.approx(0.5)
+    # 前年がない / 今年の値が計算できない
+    assert np.isnan(result.loc[('1000', 2023, 1), 'RevenueYoY'])
+    assert np.isnan(result.loc[('1000', 2024, 3), 'RevenueYoY'])
+    # 別の企業の前年の値は使わない
+    assert np.isnan(result.loc[('2000', 2024, 1), 'RevenueYoY'])
+
+
+def test_margin_and_balance_sheet_ratios(result):
+    assert result.loc[('1000', 2023, 2), 'OperatingMargin'] == pytest.approx(0.1)
+    assert result.loc[('1000', 2024, 1), 'EquityRatio'] == pytest.approx(0.4)
+    # 前年同期末の自己資本がないので、期末の自己資本だけで割る
+    assert result.loc[('1000', 2024, 1), 'ROE'] == pytest.approx(550 / 20 / 400)
+    assert np.isnan(result.loc[('1000', 2023, 4), 'EquityRatio'])
+
+
+def test_output_columns(result):
+    assert list(result.reset_index().columns) == fundamentals.FUNDAMENTAL_COLUMNS
@@ -0,0 +1,132 @@
+# tests/test_http_fetcher.py
+
+import os
+
+import pytest
+import requests
+
+from sc.fileio import zip_reader
+from sc.fileio.fixture_server import FixtureServer, write_listing
+from sc.fileio.http_fetcher import PARTIAL_SUFFIX, HttpFetcher, zip_download
+
+
+@pytest.fixture
+def fixture_root(tmp_path, filing_zips):
+    root = tmp_path / 'fixture'
+    write_listing(root, '2780', filing_zips)
+    return root
+
+
+@pytest.fixture
+def server(fixture_root):
+    with FixtureServer(fixture_root) as server:
+        yield server
+
+
+def make_fetcher(server, **kwargs):
+    kwargs.setdefault('rate', 0)
+    return HttpFetcher(listing_url=server.listing_url, **kwargs)
+
+
+def test_lists_filings_newest_first(server):
+    fetcher = make_fetcher(server)
+    try:
+        filings = fetcher.list_filings('2780')
+    finally:
+        fetcher.close()
+
+    assert [filing.name for filing in filings] == ['0000C.zip', '0000B.zip', '0000A.zip']
+    assert [filing.public_day for filing in filings] == ['2025-01-10', '2024-05-13', '2023-01-01']
+
+
+def test_downloads_every_filing(server, tmp_path):
+    out = tmp_path / 'out'
+    fetcher = make_fetcher(server)
+    try:
+        assert zip_download('2780', download_dir=out, fetcher=fetcher) == 3
+    finally:
+        fetcher.close()
+
+    assert sorted(os.listdir(out)) == ['0000A.zip', '0000B.zip', '0000C.zip']
+    assert all(zip_reader.is_valid_zip(str(out / name)) for name in os.listdir(out))
+
+
+def test_resumes_partial_download_with_range(server, fixture_root, tmp_path):
+    source = fixture_root / 'disc' / '2780' / '0000C.zip'
+    size = source.stat().st_size
+    out = tmp_path / 'out'
+    out.mkdir()
+
+    # 途中で切れたファイルを置いておく
+    with open(source, 'rb') as f:
+        (out / ('0000C.zip' + PARTIAL_SUFFIX)).write_bytes(f.read(size // 2))
+
+    fetcher = make_fetcher(server)
+    try:
+        path = fetcher.download_file(f'{server.url}/disc/2780/0000C.zip', out)
+        downloaded = fetcher.meter.bytes
+    finally:
+        fetcher.close()
+
+    assert open(path, 'rb').read() == source.read_bytes()
+    assert downloaded == size - size // 2
+    assert not os.path.exists(path + PARTIAL_SUFFIX)
+
+
+def test_corrupt_partial_is_fetched_again(server, fixture_root, tmp_path):
+    source = fixture_root / 'disc' / '2780' / '0000B.zip'
+    out = tmp_path / 'out'
+    out.mkdir()
+    (out / ('0000B.zip' + PARTIAL_SUFFIX)).write_bytes(b'x' * 100)
+
+    fetcher = make_fetcher(server, retries=3)
+    try:
+        path = fetcher.download_file(f'{server.url}/disc/2780/0000B.zip', out)
+    finally:
+        fetcher.close()
+
+    assert open(path, 'rb').read() == source.read_bytes()
+
+
+def test_missing_listing_is_not_retried(server, tmp_path):
+    fetcher = make_fetcher(server, retries=5)
+    try:
+        with pytest.raises(requests.HTTPError):
+            fetcher.download('9999', tmp_path / 'out')
+    finally:
+        fetcher.close()
+    # 404 はやり直さない
+    assert server.requests == 1
+
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_backs_off_and_retries_injected_errors(fixture_root, tmp_path, status):
+    out = tmp_path / 'out'
+    with FixtureServer(fixture_root, latency=(0.01, 0.03), error_rate=0.3, error_status=status, seed=1) as server:
+        fetcher = make_fetcher(server, retries=8)
+        try:
+            assert zip_download('2780', download_dir=out, fetcher=fetcher) == 3
+            limiter = fetcher.limiter.limiter(server.url)
+        finally:
+            fetcher.close()
+
+    assert server.errors > 0
+    assert server.requests >= 4 + server.errors
+    assert limiter.decreases >= 1
+    assert sorted(os.listdir(out)) == ['0000A.zip', '0000B.zip', '0000C.zip']
+
+
+def test_delta_downloads_only_new_filings(server, tmp_path):
+    from sc.fileio.filing_delta import DeltaFilter
+
+    out = tmp_path / 'out'
+    delta = DeltaFilter(since='2024-05-13', known_names={'0000C.zip'})
+    fetcher = make_fetcher(server)
+    try:
+        assert zip_download('2780', download_dir=out, fetcher=fetcher, delta=delta) == 1
+    finally:
+        fetcher.close()
+
+    # A は since より古く、C はダウンロード済み。since と同じ日の B だけを取得する
+    assert os.listdir(out) == ['0000B.zip']
+    assert delta.skipped == 2
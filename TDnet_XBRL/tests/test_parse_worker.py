@@ -0,0 +1,47 @@
+# tests/test_parse_worker.py
+
+from concurrent.futures import Future
+
+import pytest
+
+from sc.processor import parse_worker
+
+FILES = ['good-1.htm', 'broken.htm', 'good-2.htm']
+
+
+def fake_extract(file_path):
+    """ワーカーの異常終了の代わりに、broken.htm だけ例外にする"""
+    if file_path == 'broken.htm':
+        raise RuntimeError('worker died')
+    return file_path, 'pl', {
+        'file_type': 'GAAP',
+        'metadata': {'code': '1000', 'filename': file_path, 'publicday': '2024-08-10',
+                     'period': 'Q1', 'fiscal_year': 2024},
+        'data': {'netsales': 100, 'sga': 1, 'op': 10, 'ordinary': 11, 'netincome': 5},
+    }
+
+
+def done_future(file_path):
+    future = Future()
+    try:
+        future.set_result(fake_extract(file_path))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def test_start_workers_starts_every_process():
+    with parse_worker.create_executor(3, 'lxml', False, None) as executor:
+        assert parse_worker.start_workers(executor, 3) == 3
+
+
+def test_collect_results_keeps_submission_order():
+    files = ['good-2.htm', 'good-1.htm']
+    assert [result[0] for result in parse_worker.collect_results([done_future(path) for path in files])] == files
+
+
+def test_collect_results_waits_for_every_future_before_raising():
+    done = []
+    with pytest.raises(RuntimeError):
+        parse_worker.collect_results([done_future(path) for path in FILES], on_done=lambda: done.append(1))
+    assert len(done) == len(FILES)
@@ -0,0 +1,97 @@
+# tests/test_pipeline.py
+"""結果が取れないファイルがあるときの扱いが parse_parallel() とパイプラインで同じであること"""
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip('selenium')
+
+from sc.config.config import Config
+from sc.inserter.db_writer import DBWriter
+from sc.processor import parse_worker
+from sc.processor.company_processor import CompanyDataProcessor
+from sc.system import pipeline as pipeline_module
+from test_parse_worker import FILES, done_future, fake_extract
+
+
+@pytest.fixture
+def config(tmp_path):
+    return Config(codes=['1000'], source_folder=tmp_path / 'downloads', xbrlfile_folder=tmp_path / 'zips',
+                  use_parse_cache=False, use_archive=False, incremental=False)
+
+
+def make_writer(folder):
+    folder.mkdir(exist_ok=True)
+    return DBWriter(db_paths={'bs': str(folder / 'BS_DB.db'), 'pl': str(folder / 'PL_DB.db')})
+
+
+@pytest.fixture
+def writer(tmp_path):
+    writer = make_writer(tmp_path)
+    yield writer
+    writer.close()
+
+
+def pl_rows(writer):
+    conn = sqlite3.connect(writer.db_paths['pl'])
+    try:
+        return conn.execute('SELECT COUNT(*) FROM PL').fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+    finally:
+        conn.close()
+
+
+def test_parse_parallel_fails_the_company(config, writer, monkeypatch):
+    monkeypatch.setattr(parse_worker, 'create_executor', lambda *args: ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(parse_worker, 'extract_file', fake_extract)
+    processor = CompanyDataProcessor('1000', config, writer=writer)
+    monkeypatch.setattr(processor, 'plan_files', lambda: FILES)
+
+    with pytest.raises(RuntimeError):
+        processor.parse_parallel()
+    processor.writer.discard()
+    processor.writer.close()
+
+    assert pl_rows(writer) == 0
+
+
+def test_pipeline_fails_the_company(config, writer):
+    pipeline = pipeline_module.XBRLPipeline(config)
+    processor = CompanyDataProcessor('1000', config, writer=writer)
+    pipeline.queues['write'].put((processor, [done_future(path) for path in FILES]))
+    pipeline.queues['write'].put(pipeline_module._STOP)
+    pipeline._in_flight = len(FILES)
+
+    pipeline._writer_stage()
+    processor.writer.close()
+
+    assert pl_rows(writer) == 0
+    assert pipeline.queue_depths()['parsing_files'] == 0
+    assert not writer.is_known('pl', 'good-1.htm')
+
+
+def test_both_paths_save_the_same_rows_when_every_file_succeeds(config, tmp_path, monkeypatch):
+    files = ['good-1.htm', 'good-2.htm']
+    monkeypatch.setattr(parse_worker, 'create_executor', lambda *args: ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(parse_worker, 'extract_file', fake_extract)
+
+    parallel_writer = make_writer(tmp_path / 'parallel')
+    processor = CompanyDataProcessor('1000', config, writer=parallel_writer)
+    monkeypatch.setattr(processor, 'plan_files', lambda: files)
+    processor.parse_parallel()
+    processor.writer.close()
+
+    pipeline_writer = make_writer(tmp_path / 'pipeline')
+    pipeline = pipeline_module.XBRLPipeline(config)
+    processor = CompanyDataProcessor('1000', config, writer=pipeline_writer)
+    pipeline.queues['write'].put((processor, [done_future(path) for path in files]))
+    pipeline.queues['write'].put(pipeline_module._STOP)
+    pipeline._writer_stage()
+    processor.writer.close()
+
+    assert pl_rows(parallel_writer) == pl_rows(pipeline_writer) == 2
+    parallel_writer.close()
+    pipeline_writer.close()
@@ -0,0 +1,165 @@
+# tests/test_pl_quarterly.py
+
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from flask_app import app as flask_app
+from sc.inserter import db_schema, pl_quarterly
+from sc.inserter.db_writer import DBWriter
+from sc.inserter.pl_db_inserter import PlDBInserter
+
+COMPARED_KEYS = ('fiscalYear', 'period', 'publicDay', 'netSales', 'operatingIncome', 'ordinaryIncome', 'netIncome')
+
+
+def gaap(code, period, fiscal_year, netsales, op, ordinary, netincome, public_day):
+    return {
+        'file_type': 'GAAP',
+        'metadata': {'code': code, 'filename': f'{code}-{fiscal_year}-{period}-{public_day}-ixbrl.htm',
+                     'publicday': public_day, 'period': period, 'fiscal_year': fiscal_year},
+        'data': {'netsales': netsales, 'sga': 1, 'op': op, 'ordinary': ordinary, 'netincome': netincome},
+    }
+
+
+def ifrs(code, period, fiscal_year, revenue, op, profit, public_day):
+    return {
+        'file_type': 'IFRS',
+        'metadata': {'code': code, 'filename': f'{code}-{fiscal_year}-{period}-{public_day}-ixbrl.htm',
+                     'publicday': public_day, 'period': period, 'fiscal_year': fiscal_year},
+        'data': {'revenue': revenue, 'sga': 1, 'op': op, 'profit': profit, 'eps': 1.5},
+    }
+
+
+@pytest.fixture
+def pl_conn(tmp_path):
+    db_paths = {'bs': str(tmp_path / 'BS_DB.db'), 'pl': str(tmp_path / 'PL_DB.db')}
+    with DBWriter(db_paths=db_paths) as writer:
+        for record in (
+                # 2023年度: Q1〜Q4 が揃っている（累計値）
+                gaap('1000', 'Q1', 2023, 100, 10, 11, 5, '2023-08-10'),
+                gaap('1000', 'Q2', 2023, 250, 25, 27, 12, '2023-11-10'),
+                gaap('1000', 'Q3', 2023, 390, 36, 40, 18.5, '2024-02-10'),
+                gaap('1000', 'Q4', 2023, 520, 50, 55, 26, '2024-05-10'),
+                # 2024年度: Q2 が抜けている（Q3 は前の四半期がないので値なし）
+                gaap('1000', 'Q1', 2024, 120, 12, 13, 6, '2024-08-10'),
+                gaap('1000', 'Q3', 2024, 400, 40, None, 20, '2025-02-10'),
+                # IFRS の企業は IFRS のカラムの値を使う
+                ifrs('2000', 'Q1', 2024, 1000, 100, 70, '2024-08-01'),
+                ifrs('2000', 'Q2', 2024, 2100, 230, 150, '2024-11-01'),
+        ):
+            writer.add('pl', record)
+
+    conn = sqlite3.connect(db_paths['pl'])
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize('code', ['1000', '2000'])
+def test_materialized_quarters_match_app_conversion(pl_conn, code):
+    materialized = flask_app.get_pl_quarterly(pl_conn, code)
+    on_the_fly = flask_app.convert_to_quarterly_from_period(flask_app.load_pl_rows(pl_conn, code))
+
+    assert materialized is not None
+    assert [{key: row[key] for key in COMPARED_KEYS} for row in materialized] == \
+           [{key: row[key] for key in COMPARED_KEYS} for row in on_the_fly]
+
+
+def test_quarter_values(pl_conn):
+    rows = {(row['fiscalYear'], row['period']): row for row in flask_app.get_pl_quarterly(pl_conn, '1000')}
+
+    assert rows[(2023, 'Q1')]['netSales'] == 100
+    assert rows[(2023, 'Q3')]['netSales'] == 140
+    assert rows[(2023, 'Q3')]['netIncome'] == 6.5
+    assert rows[(2024, 'Q3')]['netSales'] is None
+
+
+def test_rebuild_matches_incremental_refresh(pl_conn):
+    before = pl_conn.execute('SELECT * FROM PL_QUARTERLY ORDER BY Code, FiscalYear, Quarter').fetchall()
+    pl_quarterly.rebuild(pl_conn)
+    after = pl_conn.execute('SELECT * FROM PL_QUARTERLY ORDER BY Code, FiscalYear, Quarter').fetchall()
+
+    assert [tuple(row) for row in before] == [tuple(row) for row in after]
+
+
+# ===========================================================================
+# PL_QUARTERLY を作る前に取り込んだ DB
+# ===========================================================================
+
+SHIPPED_PL_DB = Path(__file__).resolve().parent.parent / 'db' / 'PL_DB.db'
+
+
+def insert_legacy_rows(db_path, records):
+    """DBWriter を使わずに PL だけに行を入れる（PL_QUARTERLY を作る前の DB と同じ状態）"""
+    conn = sqlite3.connect(db_path)
+    conn.execute(db_schema.PL_TABLE_DDL)
+    for record in records:
+        table, columns, values = PlDBInserter.record_to_row(record)
+        conn.execute(db_schema.build_insert_sql(table, columns, upsert=False), values)
+    conn.commit()
+    conn.close()
+
+
+def ingest(tmp_path, *records):
+    db_paths = {'bs': str(tmp_path / 'BS_DB.db'), 'pl': str(tmp_path / 'PL_DB.db')}
+    with DBWriter(db_paths=db_paths) as writer:
+        for record in records:
+            writer.add('pl', record)
+
+
+def assert_matches_app(db_path, code):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        materialized = flask_app.get_pl_quarterly(conn, code)
+        on_the_fly = flask_app.convert_to_quarterly_from_period(flask_app.load_pl_rows(conn, code))
+    finally:
+        conn.close()
+
+    assert materialized is not None
+    assert [{key: row[key] for key in COMPARED_KEYS} for row in materialized] == \
+           [{key: row[key] for key in COMPARED_KEYS} for row in on_the_fly]
+    return materialized
+
+
+def test_first_ingest_into_existing_db_backfills_history(tmp_path):
+    db_path = str(tmp_path / 'PL_DB.db')
+    insert_legacy_rows(db_path, [
+        gaap('1000', 'Q1', 2022, 90, 9, 10, 4, '2022-08-10'),
+        gaap('1000', 'Q2', 2022, 200, 20, 22, 9, '2022-11-10'),
+        gaap('2000', 'Q1', 2022, 50, 5, 5, 2, '2022-08-01'),
+    ])
+
+    ingest(tmp_path, gaap('1000', 'Q1', 2023, 100, 10, 11, 5, '2023-08-10'))
+
+    assert len(assert_matches_app(db_path, '1000')) == 3
+    # 取り込んでいない企業も PL_QUARTERLY から読める
+    assert len(assert_matches_app(db_path, '2000')) == 1
+
+
+def test_ingest_backfills_company_missing_from_pl_quarterly(tmp_path):
+    db_path = str(tmp_path / 'PL_DB.db')
+    ingest(tmp_path, gaap('1000', 'Q1', 2023, 100, 10, 11, 5, '2023-08-10'))
+    # PL_QUARTERLY に行があるが、2000 は PL にしか入っていない
+    insert_legacy_rows(db_path, [
+        gaap('2000', 'Q1', 2022, 50, 5, 5, 2, '2022-08-01'),
+        gaap('2000', 'Q2', 2022, 120, 12, 12, 5, '2022-11-01'),
+    ])
+
+    ingest(tmp_path, gaap('2000', 'Q1', 2023, 60, 6, 6, 3, '2023-08-01'))
+
+    assert len(assert_matches_app(db_path, '2000')) == 3
+
+
+@pytest.mark.skipif(not SHIPPED_PL_DB.exists(), reason='db/PL_DB.db がない')
+def test_ingest_into_copy_of_shipped_db_keeps_history(tmp_path):
+    db_path = tmp_path / 'PL_DB.db'
+    shutil.copy(SHIPPED_PL_DB, db_path)
+
+    ingest(tmp_path, gaap('1301', 'Q3', 2026, 1, 1, 1, 1, '2026-02-04'))
+
+    quarters = assert_matches_app(str(db_path), '1301')
+    assert len(quarters) > 1
+    assert len(assert_matches_app(str(db_path), '4612')) > 1
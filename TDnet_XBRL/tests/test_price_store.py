@@ -0,0 +1,149 @@
+# tests/test_price_store.py
+
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from flask_app.price_store import PriceStore, SingleFlight
+
+
+class FakeFetcher:
+    """呼び出しを記録し、指定された期間の日足（毎日1行）を返す偽の fetcher"""
+
+    def __init__(self):
+        self.calls = []
+        self.error = None
+
+    def __call__(self, code, start, end):
+        self.calls.append((code, start, end))
+        if self.error is not None:
+            raise self.error
+        rows = []
+        day = start
+        while day < end:
+            close = 100.0 + (day - start).days
+            rows.append((day.isoformat(), close - 1, close + 1, close - 2, close, 1000.0))
+            day += timedelta(days=1)
+        return rows
+
+
+@pytest.fixture
+def fetcher():
+    return FakeFetcher()
+
+
+def make_store(tmp_path, fetcher, **kwargs):
+    return PriceStore(str(tmp_path / 'PRICE_DB.db'), fetcher=fetcher, history_years=1, **kwargs)
+
+
+def test_first_fetch_requests_history(tmp_path, fetcher):
+    store = make_store(tmp_path, fetcher)
+
+    prices = store.get_prices('2780')
+
+    code, start, end = fetcher.calls[0]
+    assert code == '2780'
+    assert start == date.today() - timedelta(days=365)
+    assert end == date.today() + timedelta(days=1)
+    assert prices[-1]['date'] == date.today().isoformat()
+
+
+def test_incremental_fetch_starts_at_cached_last_date(tmp_path, fetcher):
+    store = make_store(tmp_path, fetcher, refresh_interval=timedelta(0))
+    store.get_prices('2780')
+    last = store.last_date('2780')
+
+    store.get_prices('2780')
+
+    assert len(fetcher.calls) == 2
+    _, start, end = fetcher.calls[1]
+    # 最終日だけは取り直す（取引時間中の値を確定値で上書きするため）。それより前は取得しない
+    assert start == date.fromisoformat(last)
+    assert end == date.today() + timedelta(days=1)
+
+
+def test_no_fetch_within_refresh_interval(tmp_path, fetcher):
+    store = make_store(tmp_path, fetcher)
+    store.get_prices('2780')
+    store.get_prices('2780')
+
+    assert len(fetcher.calls) == 1
+    assert store.fetch_count == 1
+
+
+def test_fetch_error_falls_back_to_stored_prices(tmp_path, fetcher):
+    store = make_store(tmp_path, fetcher, refresh_interval=timedelta(0))
+    first = store.get_prices('2780')
+
+    fetcher.error = RuntimeError('network down')
+    assert store.get_prices('2780') == first
+
+    with pytest.raises(RuntimeError):
+        store.get_prices('9999')
+
+
+def test_concurrent_requests_for_same_code_fetch_once(tmp_path, fetcher):
+    entered = threading.Event()
+    release = threading.Event()
+
+    def slow_fetcher(code, start, end):
+        entered.set()
+        release.wait(5)
+        return fetcher(code, start, end)
+
+    # refresh_interval=0 なので、取得をまとめなければ後から来たリクエストもそれぞれ取得する
+    store = make_store(tmp_path, slow_fetcher, refresh_interval=timedelta(0))
+    results = []
+
+    def request():
+        results.append(store.update('2780'))
+
+    leader = threading.Thread(target=request)
+    leader.start()
+    assert entered.wait(5)
+    followers = [threading.Thread(target=request) for _ in range(5)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(fetcher.calls) == 1
+    assert store.fetch_count == 1
+    assert len(results) == 6 and len(set(results)) == 1
+
+
+def test_single_flight_shares_errors_with_waiters():
+    flight = SingleFlight()
+    entered = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        entered.set()
+        release.wait(5)
+        raise ValueError('boom')
+
+    def call():
+        try:
+            flight.do('key', failing)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    assert entered.wait(5)
+    threads += [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(errors) == 4
+    # 次の呼び出しは新しく実行される
+    assert flight.do('key', lambda: 'ok') == 'ok'
@@ -0,0 +1,37 @@
+# tests/test_rate_limiter.py
+
+import time
+
+from sc.fileio.rate_limiter import AIMDLimiter, TokenBucket, jittered_backoff
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    # 1個目はすぐ取れ、残り4個は 1/20 秒ずつ待つ
+    assert time.monotonic() - start >= 4 / 20 * 0.9
+
+
+def test_aimd_halves_on_throttle_and_grows_per_round():
+    limiter = AIMDLimiter(initial=4, maximum=8, cooldown=0)
+    limiter.on_throttle()
+    assert limiter.limit == 2
+
+    limiter.on_success()
+    assert limiter.limit == 2
+    limiter.on_success()
+    assert limiter.limit == 3
+
+
+def test_aimd_cooldown_ignores_burst_of_failures():
+    limiter = AIMDLimiter(initial=8, maximum=8, cooldown=60)
+    for _ in range(5):
+        limiter.on_throttle()
+    assert limiter.limit == 4
+    assert limiter.decreases == 1
+
+
+def test_jittered_backoff_is_capped():
+    assert all(0 <= jittered_backoff(attempt, base=0.5, cap=2) <= 2 for attempt in range(10))
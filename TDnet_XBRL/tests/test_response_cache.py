@@ -0,0 +1,98 @@
+# tests/test_response_cache.py
+
+import os
+
+import pytest
+from flask import Flask, jsonify
+
+from flask_app.response_cache import ResponseCache
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / 'BS_DB.db'
+    path.write_bytes(b'v1')
+    return str(path)
+
+
+@pytest.fixture
+def cache(db_path):
+    return ResponseCache([db_path])
+
+
+@pytest.fixture
+def client(cache):
+    app = Flask(__name__)
+    app.calls = 0
+
+    @app.route('/api/items')
+    @cache.cached
+    def items():
+        app.calls += 1
+        response = jsonify({'calls': app.calls})
+        response.headers['X-Total-Count'] = '42'
+        return response
+
+    @app.route('/api/missing')
+    @cache.cached
+    def missing():
+        app.calls += 1
+        return jsonify({'error': 'not found'}), 404
+
+    test_client = app.test_client()
+    test_client.app_under_test = app
+    return test_client
+
+
+def test_if_none_match_returns_304(client, cache):
+    first = client.get('/api/items')
+    assert first.status_code == 200
+    assert first.headers['ETag']
+
+    second = client.get('/api/items', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.data == b''
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert cache.stats()['not_modified'] == 1
+    assert client.app_under_test.calls == 1
+
+
+def test_cache_hit_keeps_body_and_x_headers(client, cache):
+    first = client.get('/api/items')
+    second = client.get('/api/items')
+
+    assert second.status_code == 200
+    assert second.get_json() == first.get_json() == {'calls': 1}
+    assert second.headers['X-Total-Count'] == '42'
+    assert second.mimetype == 'application/json'
+    assert cache.stats()['hits'] == 1
+    assert client.app_under_test.calls == 1
+
+
+def test_query_string_is_part_of_the_key(client):
+    client.get('/api/items?page=1')
+    response = client.get('/api/items?page=2')
+
+    assert response.get_json() == {'calls': 2}
+
+
+def test_db_update_invalidates_cache_and_etag(client, db_path):
+    first = client.get('/api/items')
+
+    with open(db_path, 'ab') as f:
+        f.write(b'v2')
+    os.utime(db_path, ns=(0, os.stat(db_path).st_mtime_ns + 1_000_000_000))
+
+    # 古い ETag では 304 にならず、作り直したレスポンスが返る
+    second = client.get('/api/items', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.get_json() == {'calls': 2}
+    assert second.headers['ETag'] != first.headers['ETag']
+
+
+def test_errors_are_not_cached(client, cache):
+    assert client.get('/api/missing').status_code == 404
+    assert client.get('/api/missing').status_code == 404
+
+    assert client.app_under_test.calls == 2
+    assert cache.stats()['entries'] == 0
@@ -0,0 +1,12 @@
+# tests/test_xbrl_document.py
+
+from sc.parser import xbrl_pl_common_parser
+from sc.parser.xbrl_document import XbrlDocument
+
+
+def test_text_tolerates_invalid_bytes(tmp_path):
+    path = tmp_path / 'broken-ixbrl.htm'
+    path.write_bytes('<html><body><p>当第２四半期'.encode('utf-8') + b'\xff\xfe' + '連結累計期間</p></body></html>'.encode('utf-8'))
+
+    assert '当第２四半期' in XbrlDocument(str(path)).text
+    assert xbrl_pl_common_parser.detect_quarter_from_html(str(path)) == 'Q2'
@@ -0,0 +1,87 @@
+# tests/test_zip_reader.py
+
+import zipfile
+
+import pytest
+
+from sc.fileio import zip_reader
+
+# 実際に DB に登録されているファイル名
+STATEMENT_NAMES = [
+    '0300000-acbs01-tse-acedjpfr-36790-2015-03-31-01-2015-05-15-ixbrl.htm',
+    '0101010-qcfs03-tse-qcediffr-24710-2024-02-29-01-2024-04-12-ixbrl.htm',
+    '1200000-snbs16-tse-snedjpfr-14290-2024-06-30-01-2024-08-09-ixbrl.htm',
+    '0301000-acpc01-tse-acedjpfr-13010-2020-03-31-01-2020-05-12-ixbrl.htm',
+    '0102010-qcpl13-tse-qcediffr-94330-2019-06-30-01-2019-08-01-ixbrl.htm',
+    '1200000-snpl05-tse-scedjpfr-83060-2015-09-30-01-2015-11-13-ixbrl.htm',
+]
+
+OTHER_NAMES = [
+    'qualitative.htm',
+    '0000000-qcss01-tse-qcedjpfr-36790-2014-06-30-01-2014-08-12-ixbrl.htm',
+    '0300000-acbs01-tse-acedjpfr-36790-2015-03-31-01-2015-05-15-ixbrl.xsd',
+    'tse-acedjpfr-36790-2015-03-31-01-2015-05-15-ixbrl.htm',
+]
+
+
+@pytest.mark.parametrize('name', STATEMENT_NAMES + [STATEMENT_NAMES[0].upper()])
+def test_statement_member_pattern_matches_statement_files(name):
+    assert zip_reader.STATEMENT_MEMBER_PATTERN.match(name)
+
+
+@pytest.mark.parametrize('name', OTHER_NAMES)
+def test_statement_member_pattern_rejects_other_files(name):
+    assert not zip_reader.STATEMENT_MEMBER_PATTERN.match(name)
+
+
+def test_member_path_round_trip_with_windows_zip_path():
+    zip_path = r'E:\Zip_files\2780\081220241011543262.zip'
+    member = f'XBRLData/Attachment/{STATEMENT_NAMES[0]}'
+
+    path = zip_reader.make_member_path(zip_path, member)
+
+    assert zip_reader.split_member_path(path) == (zip_path, member)
+    assert zip_reader.split_member_path(r'E:\Zip_files\2780\a.htm') is None
+
+
+def make_zip(path, members):
+    with zipfile.ZipFile(path, 'w') as zip_ref:
+        for member, content in members.items():
+            zip_ref.writestr(member, content)
+    return str(path)
+
+
+def test_members_stored_with_windows_separators(tmp_path):
+    member = 'XBRLData\\Attachment\\' + STATEMENT_NAMES[1]
+    zip_path = make_zip(tmp_path / 'a.zip', {member: b'<html>fs</html>', 'XBRLData\\Summary\\tse.htm': b''})
+
+    members = zip_reader.list_statement_members(zip_path)
+
+    assert members == [f'XBRLData/Attachment/{STATEMENT_NAMES[1]}']
+    assert zip_reader.read_member(zip_reader.make_member_path(zip_path, members[0])) == b'<html>fs</html>'
+
+
+def test_open_member_is_readable_after_zipfile_is_closed(tmp_path):
+    content = b'<html>' + b'x' * 100000 + b'</html>'
+    member = f'XBRLData/Attachment/{STATEMENT_NAMES[0]}'
+    zip_path = make_zip(tmp_path / 'a.zip', {member: content})
+
+    # open_member() の中で ZipFile は閉じているが、返したファイルは読める
+    with zip_reader.open_member(zip_reader.make_member_path(zip_path, member)) as f:
+        assert f.read(6) == b'<html>'
+        assert f.read() == content[6:]
+
+
+def test_list_statement_files_skips_duplicates_and_excluded(tmp_path):
+    folder = tmp_path / '2780'
+    folder.mkdir()
+    bs, pl = STATEMENT_NAMES[0], STATEMENT_NAMES[3]
+    make_zip(folder / 'a.zip', {f'XBRLData/Attachment/{bs}': b'1', f'XBRLData/Attachment/{pl}': b'2'})
+    make_zip(folder / 'b.zip', {f'XBRLData/Attachment/{bs}': b'1'})
+
+    files = zip_reader.list_statement_files(str(folder), ['acbs', 'acpc'])
+    assert files['acbs'] == [zip_reader.make_member_path(str(folder / 'a.zip'), f'XBRLData/Attachment/{bs}')]
+    assert len(files['acpc']) == 1
+
+    files = zip_reader.list_statement_files(str(folder), ['acbs', 'acpc'], exclude=[str(folder / bs)])
+    assert files['acbs'] == []